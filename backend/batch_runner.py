@@ -0,0 +1,101 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+
+import llm_client
+
+load_dotenv()
+
+
+class HostConcurrencyLimiter:
+    def __init__(self, global_limit: Optional[int] = None, per_host_limit: Optional[int] = None):
+        """
+        Caps concurrent work both overall and per hostname, so a large batch cannot
+        hammer a single job board or exhaust the browser pool on its own.
+        """
+        self.global_limit = global_limit or int(os.getenv("BATCH_GLOBAL_CONCURRENCY", "16"))
+        self.per_host_limit = per_host_limit or int(os.getenv("BATCH_PER_HOST_CONCURRENCY", "4"))
+        self._global = asyncio.Semaphore(self.global_limit)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = (urlsplit(url).hostname or "").lower()
+        host_semaphore = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+        # Take the host slot first so URLs waiting on a busy host don't hold global capacity
+        async with host_semaphore:
+            async with self._global:
+                yield
+
+
+class RateLimitAwareScheduler:
+    def __init__(self, concurrency: Optional[int] = None, max_retries: int = 3, base_delay: float = 2.0):
+        """
+        Runs LLM-bound calls with a concurrency cap. When any call hits a provider 429,
+        new calls are held back until the Retry-After window (or an exponential backoff)
+        has passed, and the rate-limited call is retried instead of failing.
+        """
+        self.concurrency = concurrency or int(os.getenv("BULK_EMAIL_CONCURRENCY", "8"))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._resume_at = 0.0
+        self.rate_limited = 0
+
+    async def run(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        for attempt in range(self.max_retries + 1):
+            # Respect a pause set by any rate-limited call before taking a slot
+            while (delay := self._resume_at - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            async with self._semaphore:
+                try:
+                    return await fn()
+                except Exception as e:
+                    retry_after = llm_client.rate_limit_retry_after(e)
+                    if retry_after is None or attempt == self.max_retries:
+                        raise
+                    self.rate_limited += 1
+                    wait = retry_after or self.base_delay * (2 ** attempt)
+                    self._resume_at = max(self._resume_at, time.monotonic() + wait)
+
+
+@asynccontextmanager
+async def _unbounded(_item: Any):
+    yield
+
+
+async def run_bounded(
+    items: List[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    slot: Callable[[Any], Any] = _unbounded,
+) -> AsyncIterator[Tuple[int, Any, Any, Optional[Exception]]]:
+    """
+    Runs `worker` over every item, each inside `slot(item)`, and yields
+    `(index, item, result, error)` tuples in completion order. A failing item
+    only produces an error tuple; it never stops the rest of the batch.
+    If the consumer stops iterating, outstanding work is cancelled.
+    """
+    done: asyncio.Queue = asyncio.Queue()
+
+    async def run_one(index: int, item: Any) -> None:
+        try:
+            async with slot(item):
+                result = await worker(item)
+            done.put_nowait((index, item, result, None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            done.put_nowait((index, item, None, e))
+
+    tasks = [asyncio.create_task(run_one(index, item)) for index, item in enumerate(items)]
+    try:
+        for _ in range(len(tasks)):
+            yield await done.get()
+    finally:
+        for task in tasks:
+            task.cancel()
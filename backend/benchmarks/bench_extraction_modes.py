@@ -0,0 +1,136 @@
+"""
+Compares LLM extraction modes over the recorded page corpus: the few-shot prompt against
+structured output (JSON mode, a forced tool call and a strict JSON schema). Reports prompt
+tokens, latency, LLM calls and parse outcomes per extraction.
+
+    python benchmarks/bench_extraction_modes.py --rounds 5 --malformed-rate 0.2
+
+Every corpus page is fetched and reduced once, as in production, and the reduced text is sent
+through the same LLM step the scraper uses. The LLM is the stub server: it reports prompt tokens
+from the request size, adds --ms-per-1k-prompt-tokens of latency for reading the prompt, and
+answers a plain prompt with malformed JSON at --malformed-rate, while structured requests always
+get valid JSON. The parse figures therefore show what the tolerant parser and re-asks do with
+a given malformed rate, not how often a particular model breaks its output.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "benchmarks"))
+
+from bench_llm_concurrency import _free_port, _wait_for_port
+from stub_llm_server import EXTRACTION_REPLY
+
+MODES = ("prompt", "json_object", "tools", "json_schema")
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else None
+
+
+async def _pages(scraper, load_manifest):
+    """Reduced text of every corpus page, as the scraper would send it to the LLM."""
+    pages = []
+    for entry in load_manifest():
+        adapter = scraper.site_adapters.resolve(entry["url"])
+        page = await scraper.page_fetcher.fetch(entry["url"], adapter)
+        if page.text and len(page.text.strip()) >= 100:
+            pages.append((entry["site"], scraper.content_reducer.reduce(page.text).text))
+    return pages
+
+
+async def _run_mode(scraper, mode: str, pages, rounds: int, reasks: int):
+    import llm_client
+    import metrics
+    from json_repair import TolerantJsonParser
+
+    scraper.extraction_mode = "prompt" if mode == "prompt" else "structured"
+    backend = llm_client.get_router().backends[0]
+    backend.structured_output = "none" if mode == "prompt" else mode
+    scraper.json_parser = TolerantJsonParser("bench_extract_" + mode, max_reasks=reasks)
+    metrics.current_endpoint.set("bench_" + mode)
+    calls_before = backend.requests
+
+    latencies, recovered, used = [], 0, set()
+    for _ in range(rounds):
+        for _, text in pages:
+            started = time.perf_counter()
+            try:
+                job_data, used_mode = await scraper._llm_extract(text)
+            except Exception:
+                latencies.append(time.perf_counter() - started)
+                continue
+            latencies.append(time.perf_counter() - started)
+            used.add(used_mode)
+            recovered += all(job_data.get(key) == EXTRACTION_REPLY[key] for key in ("role", "company", "skills"))
+
+    extractions = rounds * len(pages)
+    prompt_tokens = metrics.LLM_TOKENS.labels("bench_" + mode, "prompt")._value.get()
+    return {
+        "mode": mode,
+        "sent_as": ",".join(sorted(used)),
+        "prompt_tokens": round(prompt_tokens / extractions),
+        "llm_calls": round((backend.requests - calls_before) / extractions, 2),
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000),
+        "recovered": recovered / extractions,
+        "outcomes": scraper.json_parser.stats()["outcomes"],
+    }
+
+
+async def _run(args, llm_port: int):
+    # Set before the services are imported so the LLM router is built against the stub
+    os.environ["GROQ_API_BASE"] = f"http://127.0.0.1:{llm_port}"
+    os.environ.setdefault("GROQ_API_KEY", "offline")
+    os.environ["LLM_BACKENDS"] = ""
+    os.environ["LLM_LOCAL_BASE_URL"] = ""
+    os.environ["LLM_HEDGE_DELAY"] = "0"
+    from offline_server import install, load_manifest
+    install(render_latency=0)
+
+    import llm_client
+    from job_scraper_selenium import JobScraper
+
+    scraper = JobScraper()
+    try:
+        pages = await _pages(scraper, load_manifest)
+        print(f"{len(pages)} corpus pages, {args.rounds} rounds, malformed rate {args.malformed_rate} for plain prompts\n")
+        return [await _run_mode(scraper, mode, pages, args.rounds, args.reasks) for mode in MODES]
+    finally:
+        await scraper.page_fetcher.close()
+        await llm_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5, help="passes over the corpus per mode")
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--ms-per-1k-prompt-tokens", type=float, default=100)
+    parser.add_argument("--malformed-rate", type=float, default=0.2)
+    parser.add_argument("--reasks", type=int, default=1, help="re-asks allowed per unrepairable answer")
+    args = parser.parse_args()
+
+    llm_port = _free_port()
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "stub_llm_server.py"), "--port", str(llm_port),
+         "--latency-ms", str(args.llm_latency_ms), "--malformed-rate", str(args.malformed_rate),
+         "--ms-per-1k-prompt-tokens", str(args.ms_per_1k_prompt_tokens)]
+    )
+    try:
+        _wait_for_port(llm_port)
+        results = asyncio.run(_run(args, llm_port))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    print(f"{'mode':<12} {'prompt tok':>10} {'LLM calls':>9} {'p50 ms':>7} {'p95 ms':>7} {'recovered':>9}  parse outcomes")
+    for row in results:
+        outcomes = " ".join(f"{name}={count}" for name, count in row["outcomes"].items())
+        print(f"{row['mode']:<12} {row['prompt_tokens']:>10} {row['llm_calls']:>9} {row['p50_ms']:>7} {row['p95_ms']:>7} "
+              f"{row['recovered']:>9.0%}  {outcomes}")
@@ -0,0 +1,111 @@
+"""
+Compares the HTML-to-text parsers (selectolax, lxml, BeautifulSoup's html.parser) on the page
+corpus in benchmarks/corpus/pages, and measures how much converting large pages stalls the
+event loop on a thread compared with the process pool.
+
+    python benchmarks/bench_html_parsers.py --rounds 20 --large-mb 3 --large-pages 8
+
+Each corpus page is converted with its site adapter's selectors, as the page fetcher does, and
+every parser's text is checked against html.parser's. The recorded pages are 20-60 KB, so the
+large page is the LinkedIn page with its body repeated up to --large-mb, standing in for the
+1-5 MB DOMs a full render returns. Parsers that are not installed are skipped.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from html_cleaner import AVAILABLE_PARSERS, HtmlCleaner, html_to_text
+from site_adapters import build_default_registry
+
+CORPUS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "corpus", "pages")
+REMOVE_SELECTORS = ["header", "footer", "nav", "script", "style"]
+
+
+def _pages():
+    """(file name, UTF-8 HTML, body selectors) for every HTML page in the corpus."""
+    registry = build_default_registry()
+    with open(os.path.join(CORPUS_DIR, "manifest.json")) as f:
+        manifest = json.load(f)
+    pages = []
+    for entry in manifest:
+        if entry.get("file", "").endswith(".html"):
+            with open(os.path.join(CORPUS_DIR, entry["file"]), "rb") as f:
+                pages.append((entry["file"], f.read(), registry.resolve(entry["url"]).body_selectors))
+    return pages
+
+
+def _inflate(html: bytes, megabytes: float) -> bytes:
+    """The page with its body content repeated until the document reaches `megabytes`."""
+    start = html.index(b">", html.index(b"<body")) + 1
+    end = html.rindex(b"</body>")
+    body = html[start:end]
+    copies = max(1, int(megabytes * 1024 * 1024 / len(body)))
+    return html[:start] + body * copies + html[end:]
+
+
+def _ms_per_page(parser, pages, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for _, html, body_selectors in pages:
+            html_to_text(html, REMOVE_SELECTORS, body_selectors, parser)
+    return (time.perf_counter() - started) / (rounds * len(pages)) * 1000
+
+
+async def _loop_stall(cleaner: HtmlCleaner, html: bytes, body_selectors, count: int):
+    """Converts `count` copies of a page at once; returns (wall seconds, worst and p99 loop lag in ms)."""
+    lags, running = [], True
+
+    async def ticker():
+        interval = 0.005
+        while running:
+            before = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - before - interval)
+
+    await cleaner.start()
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(cleaner.to_text(html, REMOVE_SELECTORS, body_selectors) for _ in range(count)))
+    elapsed = time.perf_counter() - started
+    running = False
+    await tick
+    cleaner.close()
+    lags.sort()
+    return elapsed, lags[-1] * 1000, lags[int(0.99 * (len(lags) - 1))] * 1000
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rounds", type=int, default=20, help="timing passes over the corpus")
+    arg_parser.add_argument("--large-mb", type=float, default=3, help="size of the inflated page")
+    arg_parser.add_argument("--large-pages", type=int, default=8, help="inflated pages converted at once")
+    arg_parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = arg_parser.parse_args()
+
+    pages = _pages()
+    name, linkedin, linkedin_selectors = next(page for page in pages if page[0] == "linkedin.html")
+    large = _inflate(linkedin, args.large_mb)
+    print(f"{len(pages)} corpus pages ({sum(len(html) for _, html, _ in pages) // len(pages) // 1024} KB mean), "
+          f"large page {len(large) / 1024 / 1024:.1f} MB; parsers installed: {', '.join(AVAILABLE_PARSERS)}\n")
+
+    reference = {name: html_to_text(html, REMOVE_SELECTORS, selectors, "html.parser") for name, html, selectors in pages}
+    print(f"{'parser':<12} {'corpus ms/page':>14} {'large page ms':>13} {'same text':>9}")
+    for parser in AVAILABLE_PARSERS:
+        same = sum(html_to_text(html, REMOVE_SELECTORS, selectors, parser) == reference[name] for name, html, selectors in pages)
+        corpus_ms = _ms_per_page(parser, pages, args.rounds)
+        large_ms = _ms_per_page(parser, [(name, large, linkedin_selectors)], 1)
+        print(f"{parser:<12} {corpus_ms:>14.2f} {large_ms:>13.0f} {same:>5}/{len(pages)}")
+
+    print(f"\nEvent loop lag while converting {args.large_pages} large pages at once ({os.cpu_count()} CPUs):")
+    print(f"{'parser':<12} {'executor':<16} {'wall ms':>8} {'max lag ms':>10} {'p99 lag ms':>10}")
+    for parser in AVAILABLE_PARSERS:
+        for label, workers in (("thread", 0), (f"{args.workers} processes", args.workers)):
+            cleaner = HtmlCleaner(workers=workers, inline_bytes=0, parser=parser)
+            elapsed, worst, p99 = asyncio.run(_loop_stall(cleaner, large, linkedin_selectors, args.large_pages))
+            print(f"{parser:<12} {label:<16} {elapsed * 1000:>8.0f} {worst:>10.1f} {p99:>10.1f}")
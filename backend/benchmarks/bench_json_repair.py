@@ -0,0 +1,97 @@
+"""
+Compares the tolerant JSON parser with LangChain's JsonOutputParser on a corpus of malformed LLM
+answers (benchmarks/corpus/llm_outputs/malformed.jsonl): how many each recovers correctly, what
+is left for a re-ask, and the parse time per answer.
+
+    python benchmarks/bench_json_repair.py --rounds 200
+
+An answer counts as recovered when the parsed object has every expected key with the expected
+value. Re-asks need an LLM and are not run here; answers that local repair cannot recover are
+the ones that would be sent back.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from langchain_core.output_parsers import JsonOutputParser
+
+from json_repair import IncrementalJsonParser, parse
+
+CORPUS_FILE = os.path.join(BACKEND_DIR, "benchmarks", "corpus", "llm_outputs", "malformed.jsonl")
+
+
+def _load():
+    with open(CORPUS_FILE) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _recovered(value, expected) -> bool:
+    if isinstance(value, list) and value and isinstance(value[0], dict):
+        value = value[0]
+    return expected is not None and isinstance(value, dict) and all(value.get(key) == want for key, want in expected.items())
+
+
+def _try(parse_fn, text):
+    try:
+        return parse_fn(text)
+    except Exception:
+        return None
+
+
+def _microseconds(parse_fn, texts, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            _try(parse_fn, text)
+    return (time.perf_counter() - started) / (rounds * len(texts)) * 1e6
+
+
+def _streamed(text: str, chunk_chars: int = 12):
+    parser = IncrementalJsonParser()
+    for i in range(0, len(text), chunk_chars):
+        parser.feed(text[i:i + chunk_chars])
+    return parser
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rounds", type=int, default=200, help="timing passes over the corpus")
+    args = arg_parser.parse_args()
+
+    samples = _load()
+    langchain = JsonOutputParser()
+    rows, totals = [], Counter()
+    for sample in samples:
+        ours = _try(lambda text: parse(text)[0], sample["text"])
+        theirs = _try(langchain.parse, sample["text"])
+        ok, baseline_ok = _recovered(ours, sample["expected"]), _recovered(theirs, sample["expected"])
+        totals["tolerant"] += ok
+        totals["langchain"] += baseline_ok
+        rows.append((sample["stage"], sample["kind"], baseline_ok, ok))
+
+    print(f"{'stage':<16} {'malformation':<28} {'langchain':>9} {'tolerant':>9}")
+    for stage, kind, baseline_ok, ok in rows:
+        print(f"{stage:<16} {kind:<28} {'ok' if baseline_ok else '-':>9} {'ok' if ok else 're-ask':>9}")
+    print(f"\nRecovered: langchain {totals['langchain']}/{len(samples)}, tolerant {totals['tolerant']}/{len(samples)} "
+          f"({len(samples) - totals['tolerant']} left for a re-ask)")
+
+    texts = [sample["text"] for sample in samples]
+    valid = [sample["text"] for sample in samples if sample["kind"].startswith("valid")]
+    print(f"\nParse time per answer (mean over {args.rounds} rounds):")
+    print(f"  langchain, whole corpus   {_microseconds(langchain.parse, texts, args.rounds):8.1f} us")
+    print(f"  tolerant, whole corpus    {_microseconds(lambda text: parse(text), texts, args.rounds):8.1f} us")
+    print(f"  langchain, valid only     {_microseconds(langchain.parse, valid, args.rounds):8.1f} us")
+    print(f"  tolerant, valid only      {_microseconds(lambda text: parse(text), valid, args.rounds):8.1f} us")
+    # While streaming, the scan happens as chunks arrive; only closing and json.loads remain at the end
+    parsers = [_streamed(text) for text in texts]
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        for streamed in parsers:
+            _try(lambda _: streamed.value(), None)
+    print(f"  tolerant, after streaming {(time.perf_counter() - started) / (args.rounds * len(parsers)) * 1e6:8.1f} us")
@@ -0,0 +1,95 @@
+"""
+Compares LLM call throughput through the thread pool (`asyncio.to_thread(chain.invoke)`,
+the old code path) against the native async path in `llm_client.ainvoke`.
+
+    python benchmarks/bench_llm_concurrency.py --requests 400 --concurrency 200 --latency-ms 300
+
+A local stub LLM server is started automatically, so no network or API key is needed.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Stub LLM server did not start on port {port}")
+
+
+async def _run(label: str, call, total: int, concurrency: int) -> float:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate:
+            await call()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    rps = total / elapsed
+    print(f"{label:<28} {total} requests in {elapsed:6.2f}s  ->  {rps:8.1f} req/s")
+    return rps
+
+
+async def main(args) -> None:
+    # Imported after GROQ_API_BASE is set so the chat model points at the stub
+    import llm_client
+    from email_service import EmailService
+
+    service = EmailService()
+    prompt_data = {key: "x" for key in service.email_prompt.input_variables}
+
+    threaded = await _run(
+        "to_thread(chain.invoke)",
+        lambda: asyncio.to_thread(service.generation_chain.invoke, prompt_data),
+        args.requests, args.concurrency,
+    )
+    native = await _run(
+        "llm_client.ainvoke(chain)",
+        lambda: llm_client.ainvoke(service.generation_chain, prompt_data),
+        args.requests, args.concurrency,
+    )
+    print(f"speed-up: {native / threaded:.1f}x")
+    await llm_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "stub_llm_server.py"),
+         "--port", str(port), "--latency-ms", str(args.latency_ms)]
+    )
+    try:
+        _wait_for_port(port)
+        os.environ["GROQ_API_BASE"] = f"http://127.0.0.1:{port}"
+        os.environ.setdefault("GROQ_API_KEY", "stub-key")
+        os.environ.setdefault("LLM_MAX_CONCURRENCY", str(args.concurrency))
+        asyncio.run(main(args))
+    finally:
+        server.terminate()
+        server.wait()
@@ -0,0 +1,91 @@
+"""
+Measures LLM latency through the router when the primary backend is slow and flaky, with
+and without hedging, against two local stub LLM servers.
+
+    python benchmarks/bench_llm_router.py --requests 200 --primary-latency-ms 1500 --primary-error-rate 0.2
+
+The primary stub stands in for a degraded Groq, the secondary for a local OpenAI-compatible server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from bench_llm_concurrency import _free_port, _wait_for_port
+
+
+def _start_stub(port: int, latency_ms: float, error_rate: float) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "stub_llm_server.py"),
+         "--port", str(port), "--latency-ms", str(latency_ms), "--error-rate", str(error_rate)]
+    )
+
+
+async def _run(label: str, hedge_delay: float, args, ports) -> None:
+    import llm_client
+    from llm_router import LLMRouter, LLMBackend
+
+    backends = [
+        LLMBackend("primary", f"http://127.0.0.1:{ports[0]}/v1", "stub-model"),
+        LLMBackend("secondary", f"http://127.0.0.1:{ports[1]}/v1", "stub-model"),
+    ]
+    router = LLMRouter(backends, llm_client.shared_async_http_client, hedge_delay=hedge_delay)
+    messages = [{"role": "user", "content": "Write a cold email"}]
+    gate = asyncio.Semaphore(args.concurrency)
+    latencies, served, failures = [], Counter(), 0
+
+    async def one():
+        nonlocal failures
+        async with gate:
+            started = time.perf_counter()
+            try:
+                _, backend = await router.complete(messages, 0.3)
+            except Exception:
+                failures += 1
+                return
+            latencies.append(time.perf_counter() - started)
+            served[backend] += 1
+
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    latencies.sort()
+
+    def pct(fraction):
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000 if latencies else float("nan")
+
+    print(f"{label:<20} p50 {pct(0.5):7.0f} ms  p95 {pct(0.95):7.0f} ms  p99 {pct(0.99):7.0f} ms  "
+          f"failed {failures:3d}  served {dict(served)}")
+    print(f"{'':<20} router {json.dumps({k: v for k, v in router.stats().items() if k != 'backends'})}")
+    await llm_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--primary-latency-ms", type=float, default=1500)
+    parser.add_argument("--primary-error-rate", type=float, default=0.2)
+    parser.add_argument("--secondary-latency-ms", type=float, default=300)
+    parser.add_argument("--hedge-delay", type=float, default=0.5)
+    args = parser.parse_args()
+
+    ports = (_free_port(), _free_port())
+    servers = [
+        _start_stub(ports[0], args.primary_latency_ms, args.primary_error_rate),
+        _start_stub(ports[1], args.secondary_latency_ms, 0),
+    ]
+    try:
+        for port in ports:
+            _wait_for_port(port)
+        asyncio.run(_run("failover only", 0, args, ports))
+        asyncio.run(_run(f"hedged @ {args.hedge_delay}s", args.hedge_delay, args, ports))
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
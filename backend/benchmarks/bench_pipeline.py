@@ -0,0 +1,195 @@
+"""
+Offline load test of the full pipeline: drives /api/extract-job over the recorded page corpus and
+/api/generate-email against the stub LLM, then reports latency percentiles, throughput and the
+server's peak RSS.
+
+    python benchmarks/bench_pipeline.py --requests 300 --concurrency 30 --llm-latency-ms 300 --record
+
+No network access or API key is needed: the server runs through benchmarks/offline_server.py.
+With --record the result is appended to benchmarks/results/pipeline.jsonl and compared with the
+previous record; the script exits non-zero when p95 latency or peak RSS grew, or throughput
+fell, by more than --threshold.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "benchmarks"))
+
+from bench_llm_concurrency import _free_port, _wait_for_port
+from bench_startup import _commit, _previous_record
+from offline_server import CACHE_BUSTER, load_manifest
+
+RESULTS_FILE = os.path.join(BACKEND_DIR, "benchmarks", "results", "pipeline.jsonl")
+
+PERSONAL_INFO = {
+    "name": "Jane Doe",
+    "email": "jane.doe@example.com",
+    "skills": "Python, FastAPI and PostgreSQL services; five years of backend engineering",
+    "experience": "5 years",
+    "location": "Remote",
+}
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else None
+
+
+def _peak_rss_mb(pid: int):
+    """Peak resident set size of a running process (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+async def _drive(client: httpx.AsyncClient, requests, concurrency: int):
+    """Sends (label, path, body) requests with bounded concurrency; returns timings and outcomes."""
+    gate = asyncio.Semaphore(concurrency)
+    latencies, by_label, statuses = [], defaultdict(list), Counter()
+
+    async def one(label, path, body):
+        async with gate:
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, json=body)
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                return
+            elapsed = time.perf_counter() - started
+            if response.status_code == 200:
+                latencies.append(elapsed)
+                by_label[label].append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(*request) for request in requests))
+    return latencies, by_label, statuses, time.perf_counter() - started
+
+
+def _extract_requests(total: int):
+    manifest = load_manifest()
+    for i in range(total):
+        entry = manifest[i % len(manifest)]
+        separator = "&" if "?" in entry["url"] else "?"
+        # A unique URL per request, so the job cache and request coalescing do not absorb the load
+        yield entry["site"], "/api/extract-job", {"url": f"{entry['url']}{separator}{CACHE_BUSTER}={i}"}
+
+
+def _generate_requests(total: int):
+    manifest = load_manifest()
+    for i in range(total):
+        job = {
+            "role": "Senior Backend Engineer",
+            "company": f"Company {i % 50}",
+            "description": "Build and operate the APIs behind the hiring platform.",
+            "skills": ["Python", "FastAPI", "PostgreSQL"],
+            "location": "Remote",
+        }
+        personal = dict(PERSONAL_INFO, name=f"Applicant {i}")
+        yield manifest[i % len(manifest)]["site"], "/api/generate-email", {"jobData": job, "personalInfo": personal}
+
+
+def _summarize(name, latencies, statuses, elapsed):
+    total = sum(statuses.values())
+    summary = {
+        "requests": total,
+        "ok": statuses.get(200, 0),
+        "rps": round(statuses.get(200, 0) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000) if latencies else None,
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000) if latencies else None,
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000) if latencies else None,
+    }
+    failures = {str(status): count for status, count in statuses.items() if status != 200}
+    print(f"{name:<16} {summary['ok']:4d}/{total:<4d} ok  {summary['rps']:7.1f} req/s  "
+          f"p50 {summary['p50_ms']} ms  p95 {summary['p95_ms']} ms  p99 {summary['p99_ms']} ms"
+          + (f"  failures {failures}" if failures else ""))
+    return summary
+
+
+async def _run(args, port: int) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=120, limits=limits) as client:
+        result = {}
+        latencies, by_site, statuses, elapsed = await _drive(client, list(_extract_requests(args.requests)), args.concurrency)
+        result["extract_job"] = _summarize("/api/extract-job", latencies, statuses, elapsed)
+        for site, values in sorted(by_site.items()):
+            print(f"{'':<16}   {site:<24} p50 {round(_percentile(values, 0.5) * 1000):6d} ms")
+        latencies, _, statuses, elapsed = await _drive(client, list(_generate_requests(args.requests)), args.concurrency)
+        result["generate_email"] = _summarize("/api/generate-email", latencies, statuses, elapsed)
+    return result
+
+
+def _regressions(previous: dict, result: dict, threshold: float):
+    regressed = []
+    for endpoint in ("extract_job", "generate_email"):
+        before, after = previous.get(endpoint) or {}, result[endpoint]
+        if before.get("p95_ms") and after["p95_ms"] and after["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressed.append(f"{endpoint} p95 {before['p95_ms']} -> {after['p95_ms']} ms")
+        if before.get("rps") and after["rps"] < before["rps"] * (1 - threshold):
+            regressed.append(f"{endpoint} {before['rps']} -> {after['rps']} req/s")
+    if previous.get("peak_rss_mb") and result["peak_rss_mb"] and result["peak_rss_mb"] > previous["peak_rss_mb"] * (1 + threshold):
+        regressed.append(f"peak RSS {previous['peak_rss_mb']} -> {result['peak_rss_mb']} MB")
+    return regressed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--render-latency-ms", type=float, default=800)
+    parser.add_argument("--record", action="store_true", help="append the result and compare with the previous one")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression when recording")
+    args = parser.parse_args()
+
+    llm_port, api_port = _free_port(), _free_port()
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "stub_llm_server.py"),
+         "--port", str(llm_port), "--latency-ms", str(args.llm_latency_ms)]
+    )
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, "benchmarks", "offline_server.py"), "--port", str(api_port),
+         "--llm-url", f"http://127.0.0.1:{llm_port}", "--render-latency-ms", str(args.render_latency_ms)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for_port(llm_port)
+        _wait_for_port(api_port, timeout=60)
+        result = {"commit": _commit(), "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "settings": vars(args).copy()}
+        result["settings"].pop("record")
+        result.update(asyncio.run(_run(args, api_port)))
+        result["peak_rss_mb"] = _peak_rss_mb(server.pid)
+        print(f"{'server peak RSS':<16} {result['peak_rss_mb']} MB")
+    finally:
+        for process in (server, stub):
+            process.terminate()
+            process.wait()
+
+    if args.record:
+        previous = _previous_record(RESULTS_FILE)
+        os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+        with open(RESULTS_FILE, "a") as f:
+            f.write(json.dumps(result) + "\n")
+        if previous and previous.get("settings") != result["settings"]:
+            print("Settings differ from the previous record; not comparing")
+        elif previous:
+            regressed = _regressions(previous, result, args.threshold)
+            if regressed:
+                print(f"Pipeline regressed against {previous['commit']}: " + ", ".join(regressed))
+                sys.exit(1)
@@ -0,0 +1,125 @@
+"""
+Measures cold start of the API: the time to `import main`, and the time from launching uvicorn
+until `/health/live` answers (socket bound) and until `/health/ready` answers 200 (pre-warm done).
+
+    python benchmarks/bench_startup.py --runs 5 --record
+
+With --record the medians are appended to benchmarks/results/startup.jsonl and compared with
+the previous record; the script exits non-zero if either time regressed by more than --threshold.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from bench_llm_concurrency import _free_port
+
+RESULTS_FILE = os.path.join(BACKEND_DIR, "benchmarks", "results", "startup.jsonl")
+
+
+def _import_seconds() -> float:
+    output = subprocess.check_output(
+        [sys.executable, "-c", "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"],
+        cwd=BACKEND_DIR,
+    )
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def _status(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def _serve_seconds(timeout: float) -> tuple:
+    """Launches uvicorn and returns (seconds until live, seconds until ready)."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    live = ready = None
+    try:
+        while time.perf_counter() - started < timeout and ready is None:
+            if live is None and _status(f"http://127.0.0.1:{port}/health/live") == 200:
+                live = time.perf_counter() - started
+            if live is not None and _status(f"http://127.0.0.1:{port}/health/ready") == 200:
+                ready = time.perf_counter() - started
+            time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+    if live is None:
+        raise RuntimeError(f"Server did not answer /health/live within {timeout}s")
+    return live, ready
+
+
+def _commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _previous_record(path: str = RESULTS_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--record", action="store_true", help="append the result and compare with the previous one")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression when recording")
+    args = parser.parse_args()
+
+    imports, lives, readies = [], [], []
+    for _ in range(args.runs):
+        imports.append(_import_seconds())
+        live, ready = _serve_seconds(args.timeout)
+        lives.append(live)
+        if ready is not None:
+            readies.append(ready)
+
+    result = {
+        "commit": _commit(),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "import_ms": round(statistics.median(imports) * 1000),
+        "live_ms": round(statistics.median(lives) * 1000),
+        "ready_ms": round(statistics.median(readies) * 1000) if readies else None,
+    }
+    print(f"import main     {result['import_ms']:6d} ms")
+    print(f"/health/live    {result['live_ms']:6d} ms")
+    print(f"/health/ready   {result['ready_ms'] if result['ready_ms'] is not None else 'timeout':>6} ms")
+
+    if args.record:
+        previous = _previous_record()
+        os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+        with open(RESULTS_FILE, "a") as f:
+            f.write(json.dumps(result) + "\n")
+        regressed = []
+        for metric in ("import_ms", "live_ms"):
+            if previous and previous.get(metric) and result[metric] > previous[metric] * (1 + args.threshold):
+                regressed.append(f"{metric} {previous[metric]} -> {result[metric]} ms")
+        if regressed:
+            print(f"Startup regressed against {previous['commit']}: " + ", ".join(regressed))
+            sys.exit(1)
@@ -0,0 +1,121 @@
+"""
+Runs the API fully offline for benchmarking: page and job-board API fetches are answered from
+the recorded corpus in benchmarks/corpus/pages, pooled browsers are replaced by a fake driver
+that serves the same pages after a simulated render time, and the LLM is the stub server.
+
+    python benchmarks/offline_server.py --port 8000 --llm-url http://127.0.0.1:8901 --render-latency-ms 800
+
+Nothing in the application is changed beyond those two seams, so every other stage (cleaning,
+content reduction, structured data, caching, routing, rate limiting) runs as in production.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+CORPUS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "corpus", "pages")
+# Added by the load generator so each request misses the job cache; ignored when serving
+CACHE_BUSTER = "_bench"
+
+
+def _key(url: str) -> Tuple[str, str, tuple]:
+    parts = urlsplit(url)
+    query = tuple(sorted((k, v) for k, v in parse_qsl(parts.query) if k != CACHE_BUSTER))
+    return (parts.hostname or "").lower(), parts.path.rstrip("/"), query
+
+
+def load_manifest() -> list:
+    with open(os.path.join(CORPUS_DIR, "manifest.json")) as f:
+        return json.load(f)
+
+
+def load_corpus() -> Dict[tuple, Tuple[str, str]]:
+    """Maps every recorded URL (job pages and board API endpoints) to (content type, body)."""
+    corpus = {}
+    for entry in load_manifest():
+        for url, name in ((entry["url"], entry.get("file")), (entry.get("api", {}).get("url"), entry.get("api", {}).get("file"))):
+            if url and name:
+                with open(os.path.join(CORPUS_DIR, name)) as f:
+                    content_type = "application/json" if name.endswith(".json") else "text/html; charset=utf-8"
+                    corpus[_key(url)] = (content_type, f.read())
+    return corpus
+
+
+CORPUS = load_corpus()
+
+
+def _serve(request: httpx.Request) -> httpx.Response:
+    recorded = CORPUS.get(_key(str(request.url)))
+    if recorded is None:
+        return httpx.Response(404, text="Not in the recorded corpus")
+    content_type, body = recorded
+    return httpx.Response(200, headers={"content-type": content_type}, text=body)
+
+
+class FakeDriver:
+    """Just enough of a Selenium WebDriver for BrowserPool, serving pages from the corpus."""
+
+    def __init__(self, render_latency: float):
+        self.render_latency = render_latency
+        self.page_source = ""
+
+    def get(self, url: str) -> None:
+        time.sleep(self.render_latency)
+        recorded = CORPUS.get(_key(url))
+        self.page_source = recorded[1] if recorded else "<html><body></body></html>"
+
+    def find_element(self, by, value):
+        return object()
+
+    def execute_script(self, script, *args):
+        return 1
+
+    def set_page_load_timeout(self, seconds) -> None:
+        pass
+
+    def quit(self) -> None:
+        pass
+
+
+def install(render_latency: float) -> None:
+    from browser_pool import BrowserPool
+    from page_fetcher import PageFetcher
+
+    client: Optional[httpx.AsyncClient] = None
+
+    def corpus_client(self) -> httpx.AsyncClient:
+        nonlocal client
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(transport=httpx.MockTransport(_serve))
+        return client
+
+    PageFetcher.client = property(corpus_client)
+    BrowserPool._create_driver = lambda self: FakeDriver(render_latency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--llm-url", default="http://127.0.0.1:8901")
+    parser.add_argument("--render-latency-ms", type=float, default=800)
+    args = parser.parse_args()
+
+    # Set before main is imported so the LLM router is built against the stub
+    os.environ["GROQ_API_BASE"] = args.llm_url
+    os.environ.setdefault("GROQ_API_KEY", "offline")
+    os.environ["LLM_BACKENDS"] = ""
+    os.environ["LLM_LOCAL_BASE_URL"] = ""
+    install(args.render_latency_ms / 1000)
+
+    import uvicorn
+    import main
+
+    uvicorn.run(main.app, host="127.0.0.1", port=args.port, log_level="warning")
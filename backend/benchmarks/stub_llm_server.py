@@ -0,0 +1,188 @@
+"""
+Deterministic stand-in for an OpenAI-compatible chat completions API (Groq included),
+used by the benchmarks so they run without network access or API credits.
+
+    python benchmarks/stub_llm_server.py --port 8901 --latency-ms 300
+
+Point the backend at it with GROQ_API_BASE=http://127.0.0.1:8901 and any GROQ_API_KEY.
+
+Requests with a JSON schema response format, JSON mode or a forced tool call always get
+well-formed JSON; plain prompts can be made to get malformed answers some of the time
+(`--malformed-rate`), as small models produce without constrained decoding.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "300"))
+# Fraction of requests answered with a 503, to exercise failover and circuit breakers
+ERROR_RATE = float(os.getenv("STUB_LLM_ERROR_RATE", "0"))
+# Fraction of answers to plain prompts (no response format or tool) that come back malformed
+MALFORMED_RATE = float(os.getenv("STUB_LLM_MALFORMED_RATE", "0"))
+# Extra latency per 1000 prompt tokens, for the time a real server spends reading the prompt
+MS_PER_1K_PROMPT_TOKENS = float(os.getenv("STUB_LLM_MS_PER_1K_PROMPT_TOKENS", "0"))
+# Structured output modes the stub accepts ("json_schema,tools,json_object"); others get an HTTP 400
+STRUCTURED_OUTPUT = os.getenv("STUB_LLM_STRUCTURED_OUTPUT", "json_schema,tools,json_object")
+
+EXTRACTION_REPLY = {
+    "role": "Senior Backend Engineer",
+    "company": "Acme Corp",
+    "description": "Build and operate the APIs behind Acme's hiring platform.",
+    "skills": ["Python", "FastAPI", "PostgreSQL"],
+    "experience": "5+ years",
+    "location": "Remote",
+}
+EMAIL_REPLY = {
+    "subject": "Application for Senior Backend Engineer at Acme Corp",
+    "content": "Dear Hiring Manager,\n\nI am excited to apply for the Senior Backend Engineer role at Acme Corp. "
+               "I have spent five years building Python and FastAPI services backed by PostgreSQL.\n\n"
+               "I would welcome the chance to talk.\n\nBest regards,\nJane Doe",
+}
+
+app = FastAPI(title="Stub LLM")
+
+# Leading system messages seen before, to report prefix-cache hits like OpenAI-compatible servers do
+_seen_prefixes = set()
+
+
+def _reply_for(messages, schema=None) -> str:
+    prompt = "\n".join(str(message.get("content", "")) for message in messages)
+    payload = EMAIL_REPLY if "cold email" in prompt.lower() else EXTRACTION_REPLY
+    if schema:
+        # Constrained decoding fills every property the schema requires
+        payload = {key: payload.get(key) for key in schema.get("properties", {})}
+    return json.dumps(payload)
+
+
+def _malformed(content: str) -> str:
+    """The reply broken the way unconstrained models break JSON, repairable or not."""
+    payload = json.loads(content)
+    return random.choice([
+        lambda: "Here is the extracted information:\n```json\n" + content + "\n```",
+        lambda: content[:-1] + ",}",
+        lambda: repr(payload),
+        lambda: content[:len(content) * 2 // 3],
+        lambda: "\n".join(f"{key}: {value}" for key, value in payload.items()),
+    ])()
+
+
+def _structured_request(body):
+    """(mode, schema) of the structured output asked for, or (None, None) for a plain prompt."""
+    if body.get("tools"):
+        return "tools", body["tools"][0]["function"].get("parameters")
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return "json_schema", response_format["json_schema"].get("schema")
+    if response_format.get("type") == "json_object":
+        return "json_object", None
+    return None, None
+
+
+def _stream_chunks(model: str, content: str, chunk_chars: int = 12):
+    """Yields the reply as OpenAI-style SSE chunks, spreading the latency across them."""
+    pieces = [content[i:i + chunk_chars] for i in range(0, len(content), chunk_chars)]
+
+    async def generate():
+        await asyncio.sleep(LATENCY_MS / 1000 / 4)  # time to first token
+        for piece in pieces:
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(LATENCY_MS / 1000 * 0.75 / max(len(pieces), 1))
+        done = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        yield f"data: {json.dumps(done)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(generate(), media_type="text/event-stream")
+
+
+@app.get("/openai/v1/models")
+@app.get("/v1/models")
+async def list_models():
+    return {"object": "list", "data": [{"id": "stub-model", "object": "model", "owned_by": "stub"}]}
+
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        return JSONResponse({"error": {"message": "stub overloaded"}}, status_code=503)
+    mode, schema = _structured_request(body)
+    if mode and mode not in STRUCTURED_OUTPUT.split(","):
+        return JSONResponse({"error": {"message": f"{mode} is not supported by this model"}}, status_code=400)
+    content = _reply_for(body.get("messages", []), schema)
+    if mode is None and MALFORMED_RATE and random.random() < MALFORMED_RATE:
+        content = _malformed(content)
+    if body.get("stream"):
+        return _stream_chunks(body.get("model", "stub"), content)
+    messages = body.get("messages", [])
+    # Schemas and tool definitions are read as part of the prompt
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in messages)
+    prompt_chars += len(json.dumps(body.get("tools") or body.get("response_format") or ""))
+    prompt_tokens = prompt_chars // 4
+    await asyncio.sleep((LATENCY_MS + MS_PER_1K_PROMPT_TOKENS * prompt_tokens / 1000) / 1000)
+    prefix = str(messages[0].get("content", "")) if messages and messages[0].get("role") == "system" else ""
+    cached_tokens = len(prefix) // 4 if prefix in _seen_prefixes else 0
+    if prefix:
+        _seen_prefixes.add(prefix)
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": _message(mode, body, content), "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        },
+    }
+
+
+def _message(mode, body, content):
+    if mode != "tools":
+        return {"role": "assistant", "content": content}
+    name = body["tools"][0]["function"]["name"]
+    return {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [{"id": "call_stub", "type": "function", "function": {"name": name, "arguments": content}}],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS)
+    parser.add_argument("--error-rate", type=float, default=ERROR_RATE)
+    parser.add_argument("--malformed-rate", type=float, default=MALFORMED_RATE)
+    parser.add_argument("--ms-per-1k-prompt-tokens", type=float, default=MS_PER_1K_PROMPT_TOKENS)
+    parser.add_argument("--structured-output", default=STRUCTURED_OUTPUT,
+                        help="comma-separated modes to accept; an empty string rejects them all")
+    args = parser.parse_args()
+    LATENCY_MS = args.latency_ms
+    ERROR_RATE = args.error_rate
+    MALFORMED_RATE = args.malformed_rate
+    MS_PER_1K_PROMPT_TOKENS = args.ms_per_1k_prompt_tokens
+    STRUCTURED_OUTPUT = args.structured_output
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,293 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+import tracing
+
+load_dotenv()
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class BrowserPoolExhausted(Exception):
+    """Raised when no browser becomes free within the acquire timeout."""
+
+
+class _DriverSlot:
+    """A pooled WebDriver plus the bookkeeping needed to decide when to recycle it."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_served = 0
+        self.broken = False
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        max_pages_per_driver: Optional[int] = None,
+        acquire_timeout: Optional[float] = None,
+        max_waiters: Optional[int] = None,
+        page_load_timeout: Optional[float] = None,
+        replace_backoff: Optional[float] = None,
+    ):
+        """
+        A bounded pool of long-lived headless Chrome sessions.
+
+        Drivers are started once (see `start`) and then checked out per page render,
+        so the browser cold start stays off the request path. A driver is recycled
+        after `max_pages_per_driver` renders or as soon as it stops responding. That
+        happens in the background once the driver is released (or found dead at
+        checkout), so no request waits for a browser to launch. A replacement that
+        fails to launch is retried with exponential backoff from `replace_backoff`
+        seconds, up to a minute apart; meanwhile the pool reports itself degraded.
+        """
+        self.size = size or int(os.getenv("BROWSER_POOL_SIZE", "2"))
+        self.max_pages_per_driver = max_pages_per_driver or int(os.getenv("BROWSER_MAX_PAGES_PER_DRIVER", "50"))
+        self.acquire_timeout = acquire_timeout or float(os.getenv("BROWSER_ACQUIRE_TIMEOUT", "20"))
+        self.max_waiters = max_waiters if max_waiters is not None else int(os.getenv("BROWSER_POOL_MAX_WAITERS", str(self.size * 4)))
+        self.page_load_timeout = page_load_timeout or float(os.getenv("BROWSER_PAGE_LOAD_TIMEOUT", "25"))
+        self.wait_timeout = float(os.getenv("BROWSER_WAIT_TIMEOUT", "10"))
+        self.replace_backoff = replace_backoff or float(os.getenv("BROWSER_REPLACE_BACKOFF", "1"))
+        self.max_replace_backoff = 60.0
+
+        self._idle: Optional[asyncio.Queue] = None
+        self._slots: List[_DriverSlot] = []
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._started = False
+        self._waiting = 0
+        self._in_use = 0
+        self._recycled = 0
+        self._rejected = 0
+        self._replace_failures = 0
+        # Replacements in progress; the event loop only keeps weak references to tasks
+        self._replacements: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Pre-warms every driver in the pool. Safe to call more than once."""
+        if self._started:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._started:
+                return
+            self._idle = asyncio.Queue()
+            results = await asyncio.gather(
+                *(asyncio.to_thread(self._create_driver) for _ in range(self.size)),
+                return_exceptions=True,
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    print(f"Failed to start pooled browser: {result}")
+                    continue
+                slot = _DriverSlot(result)
+                self._slots.append(slot)
+                self._idle.put_nowait(slot)
+            if not self._slots:
+                raise Exception("Unable to start any browser for the pool")
+            self._started = True
+            # Top up in the background if some of the drivers failed to launch
+            for _ in range(self.size - len(self._slots)):
+                self._replace_in_background(None)
+
+    async def close(self) -> None:
+        """Quits every driver owned by the pool."""
+        replacements = list(self._replacements)
+        for task in replacements:
+            task.cancel()
+        await asyncio.gather(*replacements, return_exceptions=True)
+        slots, self._slots = self._slots, []
+        self._started = False
+        self._idle = None
+        await asyncio.gather(*(asyncio.to_thread(self._quit_driver, slot.driver) for slot in slots))
+
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        Checks out a healthy driver, waiting up to `acquire_timeout` for one to free up.
+        Raises BrowserPoolExhausted when the wait queue is full or the timeout expires.
+        """
+        await self.start()
+
+        if self._waiting >= self.max_waiters:
+            self._rejected += 1
+            raise BrowserPoolExhausted("All browsers are busy, please retry shortly")
+
+        self._waiting += 1
+        try:
+            with tracing.span("browser_pool.acquire", {"browser_pool.waiting": self._waiting - 1}):
+                deadline = asyncio.get_running_loop().time() + self.acquire_timeout
+                while True:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    slot = await asyncio.wait_for(self._idle.get(), timeout=max(remaining, 0))
+                    try:
+                        alive = await asyncio.to_thread(self._is_alive, slot.driver)
+                    except BaseException:
+                        # Cancelled mid-check: the slot is checked out and its health unknown, so
+                        # replace it rather than leak it out of the pool
+                        self._replace_in_background(slot)
+                        raise
+                    if alive:
+                        break
+                    # Died while idle: replace it in the background and take the next one
+                    self._replace_in_background(slot)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise BrowserPoolExhausted(f"No browser became available within {self.acquire_timeout:.0f}s")
+        finally:
+            self._waiting -= 1
+
+        self._in_use += 1
+        try:
+            yield slot.driver
+        except Exception as e:
+            if self._is_crash(e):
+                slot.broken = True
+            raise
+        finally:
+            self._in_use -= 1
+            slot.pages_served += 1
+            if slot.broken or slot.pages_served >= self.max_pages_per_driver:
+                self._replace_in_background(slot)
+            else:
+                self._idle.put_nowait(slot)
+
+    async def render(self, url: str, remove_selectors: Optional[List[str]] = None, wait_selector: Optional[str] = None) -> str:
+        """
+        Loads `url` in a pooled browser and returns the rendered page source. With a
+        `wait_selector`, the page is captured as soon as that element is present.
+        """
+        with tracing.span("browser.render", {"url.host": tracing.host(url)}) as span:
+            async with self.acquire() as driver:
+                load = asyncio.ensure_future(asyncio.to_thread(
+                    self._load_page, driver, url, remove_selectors or [], wait_selector, self.wait_timeout
+                ))
+                try:
+                    html = await asyncio.shield(load)
+                except asyncio.CancelledError:
+                    # The worker thread still owns the driver; hold the slot until it lets go
+                    await asyncio.wait([load])
+                    raise
+            span.set_attribute("content.length", len(html or ""))
+            return html
+
+    def stats(self) -> Dict:
+        """Returns a snapshot of the pool state for health and metrics endpoints."""
+        return {
+            "size": self.size,
+            "alive": len(self._slots),
+            "idle": self._idle.qsize() if self._idle else 0,
+            "in_use": self._in_use,
+            "waiting": self._waiting,
+            "recycled": self._recycled,
+            "rejected": self._rejected,
+            "replacing": len(self._replacements),
+            "replace_failures": self._replace_failures,
+            "degraded": self._started and len(self._slots) < self.size,
+        }
+
+    def _replace_in_background(self, slot: Optional[_DriverSlot]) -> None:
+        task = asyncio.create_task(self._replace(slot))
+        self._replacements.add(task)
+        task.add_done_callback(self._replacements.discard)
+
+    async def _replace(self, slot: Optional[_DriverSlot]) -> None:
+        """
+        Quits a worn-out or dead driver (if any) and launches a fresh one into the pool,
+        retrying with backoff until it starts or the pool is closed.
+        """
+        if slot is not None:
+            if slot in self._slots:
+                self._slots.remove(slot)
+            await asyncio.to_thread(self._quit_driver, slot.driver)
+        delay = self.replace_backoff
+        while True:
+            try:
+                driver = await asyncio.to_thread(self._create_driver)
+                break
+            except Exception as e:
+                self._replace_failures += 1
+                print(f"Failed to replace pooled browser, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_replace_backoff)
+        if self._idle is None:
+            # The pool was closed while the driver launched
+            await asyncio.to_thread(self._quit_driver, driver)
+            return
+        fresh = _DriverSlot(driver)
+        self._slots.append(fresh)
+        if slot is not None:
+            self._recycled += 1
+        self._idle.put_nowait(fresh)
+
+    def _create_driver(self):
+        from selenium import webdriver
+
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-extensions")
+        options.add_argument(f"--user-agent={os.getenv('USER_AGENT', DEFAULT_USER_AGENT)}")
+        # Return once the DOM is parsed instead of waiting for every image and tracker
+        options.page_load_strategy = "eager"
+
+        driver = webdriver.Chrome(options=options)
+        driver.set_page_load_timeout(self.page_load_timeout)
+        return driver
+
+    @staticmethod
+    def _load_page(driver, url: str, remove_selectors: List[str], wait_selector: Optional[str], wait_timeout: float) -> str:
+        # Spans here run in the worker thread; asyncio.to_thread carried the trace context over
+        with tracing.span("browser.page_load"):
+            driver.get(url)
+        if wait_selector:
+            from selenium.common.exceptions import TimeoutException
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support import expected_conditions
+            from selenium.webdriver.support.ui import WebDriverWait
+
+            try:
+                with tracing.span("browser.wait_for_render", {"wait_selector": wait_selector}):
+                    WebDriverWait(driver, wait_timeout).until(
+                        expected_conditions.presence_of_element_located((By.CSS_SELECTOR, wait_selector))
+                    )
+            except TimeoutException:
+                # Capture whatever rendered; the content checks downstream decide if it is usable
+                pass
+        if remove_selectors:
+            driver.execute_script(
+                "for (const sel of arguments[0]) {"
+                "  document.querySelectorAll(sel).forEach(el => el.remove());"
+                "}",
+                remove_selectors,
+            )
+        return driver.page_source
+
+    @staticmethod
+    def _is_alive(driver) -> bool:
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _is_crash(error: Exception) -> bool:
+        # Page-load timeouts leave the browser usable; anything else from WebDriver does not
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+
+        return isinstance(error, WebDriverException) and not isinstance(error, TimeoutException)
+
+    @staticmethod
+    def _quit_driver(driver) -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error quitting pooled browser: {e}")
@@ -0,0 +1,35 @@
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, convert_to_openai_messages
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class RoutedChatModel(BaseChatModel):
+    """
+    LangChain chat model that sends every call through the LLM router, so prompt | model
+    chains get backend selection, hedging and failover without knowing about them.
+    """
+
+    router: Any
+    temperature: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed-openai-compatible"
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        content = self.router.complete_sync(convert_to_openai_messages(messages), self.temperature)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        content, backend = await self.router.complete(convert_to_openai_messages(messages), self.temperature)
+        message = AIMessage(content=content, response_metadata={"backend": backend})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs):
+        async for delta, backend in self.router.stream(convert_to_openai_messages(messages), self.temperature):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=delta, response_metadata={"backend": backend}))
+            if run_manager:
+                await run_manager.on_llm_new_token(delta, chunk=chunk)
+            yield chunk
@@ -0,0 +1,140 @@
+import os
+import re
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Headings that open the parts of a posting the extraction prompt actually needs
+JOB_SECTION_HEADING = re.compile(
+    r"^\s*(?:#+\s*)?(job description|description|about (?:the|this) (?:role|job|position|team)|the role|overview|"
+    r"responsibilit\w*|what you(?:'ll| will) do|your role|requirements?|qualifications?|minimum qualifications|"
+    r"preferred qualifications|basic qualifications|what we(?:'re| are) looking for|who you are|about you|"
+    r"skills|experience|nice to have|bonus points|tech stack|benefits|compensation|salary|location|job type|"
+    r"employment type|seniority level)\b[\s:]*",
+    re.IGNORECASE,
+)
+# Headings that open page chrome unrelated to the posting itself
+BOILERPLATE_HEADING = re.compile(
+    r"^\s*(similar jobs|people also viewed|more jobs|related jobs|recommended jobs|jobs you may like|"
+    r"explore collaborative articles|other jobs|see more jobs|looking for talent|trending searches)\b",
+    re.IGNORECASE,
+)
+BOILERPLATE_LINE = re.compile(
+    r"(sign in|sign up|join now|log in|create (?:job )?alert|cookie|accept all|privacy policy|user agreement|"
+    r"terms of (?:service|use)|copyright|all rights reserved|show more|show less|report this job|"
+    r"skip to main content|get notified|forgot password|continue with google|by clicking|save job|share this job)",
+    re.IGNORECASE,
+)
+SKILL_KEYWORDS = {
+    "python", "java", "javascript", "typescript", "react", "angular", "vue", "node", "node.js", "go", "golang",
+    "rust", "c++", "c#", ".net", "ruby", "rails", "php", "kotlin", "swift", "scala", "sql", "postgresql", "mysql",
+    "mongodb", "redis", "kafka", "spark", "aws", "azure", "gcp", "docker", "kubernetes", "terraform", "linux",
+    "git", "ci/cd", "graphql", "rest", "api", "apis", "microservices", "django", "flask", "fastapi", "spring",
+    "html", "css", "tailwind", "figma", "tensorflow", "pytorch", "machine", "learning", "ml", "ai", "llm",
+    "data", "analytics", "tableau", "excel", "agile", "scrum", "jira", "devops", "security", "testing",
+}
+JOB_WORDS = re.compile(
+    r"\b(experience|years?|degree|bachelor|master|proficien\w*|familiar\w*|knowledge|responsib\w*|"
+    r"requir\w*|qualif\w*|skills?|team|build|design|develop\w*|salary|remote|hybrid|on-?site|full[- ]time|"
+    r"part[- ]time|contract|benefits|apply|role|position|engineer\w*|manager|analyst|developer)\b",
+    re.IGNORECASE,
+)
+WORD = re.compile(r"[A-Za-z][A-Za-z0-9+#./-]*")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English prose)."""
+    return (len(text) + 3) // 4
+
+
+class ReductionResult:
+    def __init__(self, text: str, tokens_before: int, tokens_after: int):
+        self.text = text
+        self.tokens_before = tokens_before
+        self.tokens_after = tokens_after
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+class ContentReducer:
+    def __init__(self, token_budget: Optional[int] = None, header_lines: int = 15):
+        """
+        Shrinks scraped page text to the parts relevant to a job posting before it is sent
+        to the LLM: drops repeated blocks and page chrome, scores what is left for
+        job-posting relevance and keeps the best segments within `token_budget`.
+        """
+        self.token_budget = token_budget or int(os.getenv("EXTRACT_TOKEN_BUDGET", "3000"))
+        # The title and company almost always sit at the top of the page
+        self.header_lines = header_lines
+
+    def reduce(self, text: str) -> ReductionResult:
+        tokens_before = estimate_tokens(text)
+        segments = self._segment(text)
+
+        if tokens_before <= self.token_budget:
+            reduced = "\n".join(segment["text"] for segment in segments if segment["score"] > -2)
+            return ReductionResult(reduced, tokens_before, estimate_tokens(reduced))
+
+        # Greedily keep the highest scoring segments, then restore page order
+        kept: List[Dict] = []
+        used = 0
+        for segment in sorted(segments, key=lambda s: (-s["score"], s["index"])):
+            if segment["score"] <= 0:
+                break
+            cost = estimate_tokens(segment["text"]) + 1
+            if used + cost > self.token_budget:
+                continue
+            kept.append(segment)
+            used += cost
+
+        kept.sort(key=lambda s: s["index"])
+        reduced = "\n".join(segment["text"] for segment in kept)
+        return ReductionResult(reduced, tokens_before, estimate_tokens(reduced))
+
+    def _segment(self, text: str) -> List[Dict]:
+        """Splits text into deduplicated line segments, each tagged with a relevance score."""
+        segments: List[Dict] = []
+        seen = set()
+        section = "unknown"
+        for index, raw_line in enumerate(text.splitlines()):
+            line = " ".join(raw_line.split())
+            if not line:
+                continue
+            fingerprint = line.lower()
+            if fingerprint in seen:
+                continue
+            seen.add(fingerprint)
+
+            if len(line) < 80 and JOB_SECTION_HEADING.match(line):
+                section = "job"
+            elif len(line) < 80 and BOILERPLATE_HEADING.match(line):
+                section = "boilerplate"
+            segments.append({"index": index, "text": line, "score": self._score(line, index, section)})
+        return segments
+
+    def _score(self, line: str, index: int, section: str) -> float:
+        if BOILERPLATE_LINE.search(line) and len(line) < 160:
+            return -5
+        if section == "boilerplate":
+            return -2
+
+        words = WORD.findall(line.lower())
+        score = 0.0
+        if index < self.header_lines:
+            score += 3
+        if section == "job":
+            score += 2
+        if len(line) < 80 and JOB_SECTION_HEADING.match(line):
+            score += 4
+        if words:
+            skill_hits = sum(1 for word in words if word.strip(".,;:") in SKILL_KEYWORDS)
+            score += min(4.0, 10.0 * skill_hits / len(words))
+        score += min(3, len(JOB_WORDS.findall(line)))
+        if len(words) < 3 and score < 3:
+            # Stray menu labels and button text
+            score -= 1
+        return score
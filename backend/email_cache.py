@@ -0,0 +1,203 @@
+import os
+import re
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+# Applicant fields that identify the sender; a similar draft is re-addressed by swapping them
+IDENTITY_FIELDS = ("name", "email", "phone", "portfolio", "linkedin", "github")
+# The applicant's own words, which a draft may quote; a similar draft is only reused when they match
+FREE_TEXT_FIELDS = ("experience", "location")
+# Partition of requests that name no tenant: its applicants may be unrelated users, so no similarity tier
+SHARED_TENANT = "default"
+
+MINHASH_PERMUTATIONS = 64
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed (a, b) pairs for the universal hashes h(x) = (a*x + b) mod p, so signatures are stable across restarts
+_PERMUTATIONS = [
+    (
+        int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % (_MERSENNE_PRIME - 1) + 1,
+        int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME,
+    )
+    for i in range(MINHASH_PERMUTATIONS)
+]
+_WORD = re.compile(r"[a-z0-9+#.]+")
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    if isinstance(value, list):
+        return sorted(_normalize(item) for item in value)
+    return value
+
+
+def job_hash(job_data: Dict) -> str:
+    """
+    Hash of a posting that ignores formatting noise: case, whitespace, skill order and
+    empty fields, so the same job extracted twice lands on the same entries.
+    """
+    normalized = {key: _normalize(value) for key, value in job_data.items() if value not in (None, "", [])}
+    encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def free_text_hash(personal_info: Dict) -> str:
+    """Hash of the applicant's FREE_TEXT_FIELDS, ignoring case and whitespace."""
+    normalized = {field: _normalize(personal_info.get(field) or "") for field in FREE_TEXT_FIELDS}
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def minhash(text: str) -> Tuple[int, ...]:
+    """
+    MinHash signature of the words and word pairs in `text`; the fraction of positions two
+    signatures agree on estimates the Jaccard similarity of those sets.
+    """
+    words = _WORD.findall(text.lower())
+    shingles = set(words) | {f"{first} {second}" for first, second in zip(words, words[1:])}
+    if not shingles:
+        return ()
+    hashed = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashed) for a, b in _PERMUTATIONS)
+
+
+def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+    if not first or not second:
+        return 0.0
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+class EmailCache:
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        similarity_threshold: Optional[float] = None,
+    ):
+        """
+        In-memory LRU with TTL for generated emails, partitioned by tenant. Exact entries are
+        keyed by the posting's `job_hash` plus the hash of the fully rendered prompt. When
+        EMAIL_CACHE_SIMILARITY is set (0 to 1), a miss can still be served from a draft for the
+        same posting whose applicant skills have at least that estimated Jaccard similarity
+        and whose free-text fields (experience, location) are the same; the caller re-addresses
+        it to the new applicant. That tier only serves named tenants, never SHARED_TENANT.
+        EMAIL_CACHE_MAX_ENTRIES=0 disables the cache.
+        """
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("EMAIL_CACHE_TTL", str(6 * 60 * 60)))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("EMAIL_CACHE_MAX_ENTRIES", "1000"))
+        self.similarity_threshold = (
+            similarity_threshold if similarity_threshold is not None else float(os.getenv("EMAIL_CACHE_SIMILARITY", "0"))
+        )
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # (tenant, job hash) -> exact keys of the drafts written for that posting, for the similarity tier
+        self._by_job: Dict[Tuple[str, str], List[str]] = {}
+        self._hits = {"exact": 0, "similar": 0}
+        self._misses = 0
+        self._skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def lookup(
+        self, tenant: str, job_key: str, prompt_key: str, applicant_skills: str, identity: Dict, text_key: str = ""
+    ) -> Optional[Tuple[str, Dict, Dict]]:
+        """
+        Returns ("exact" or "similar", a copy of the email, the identity it was written for),
+        or None. The exact tier needs the same rendered prompt; the similarity tier takes the
+        closest draft for the same posting and named tenant among those whose sender filled in
+        the same identity fields, so every detail can be swapped for the new applicant's, and
+        had the same `free_text_hash` (`text_key`), so none of the other applicant's own
+        words are left in.
+        """
+        kind, entry = "exact", self._live_entry(self._key(tenant, job_key, prompt_key))
+        if entry is None and self.similarity_threshold > 0 and tenant != SHARED_TENANT:
+            similar_key = self._most_similar(tenant, job_key, applicant_skills, identity, text_key)
+            kind, entry = "similar", self._live_entry(similar_key) if similar_key else None
+        if entry is None:
+            self._misses += 1
+            metrics.CACHE_LOOKUPS.labels("email", "miss").inc()
+            return None
+        self._hits[kind] += 1
+        metrics.CACHE_LOOKUPS.labels("email", f"{kind}_hit").inc()
+        return kind, json.loads(entry[1]), dict(entry[3])
+
+    def set(
+        self, tenant: str, job_key: str, prompt_key: str, email: Dict, applicant_skills: str, identity: Dict, text_key: str = ""
+    ) -> None:
+        if not self.enabled:
+            return
+        key = self._key(tenant, job_key, prompt_key)
+        signature = minhash(applicant_skills) if self.similarity_threshold > 0 else ()
+        # Stored serialized so callers can never mutate a cached entry in place
+        self._entries[key] = (time.time() + self.ttl_seconds, json.dumps(email), signature, dict(identity), (tenant, job_key), text_key)
+        self._entries.move_to_end(key)
+        keys = self._by_job.setdefault((tenant, job_key), [])
+        if key not in keys:
+            keys.append(key)
+        while len(self._entries) > self.max_entries:
+            self._forget(next(iter(self._entries)))
+
+    def skip(self) -> None:
+        """Counts a draft that was not cached, because its JSON had to be repaired."""
+        self._skipped += 1
+
+    def stats(self) -> Dict:
+        lookups = self._misses + sum(self._hits.values())
+        return {
+            "entries": len(self._entries),
+            "tenants": len({tenant for tenant, _ in self._by_job}),
+            "hits": dict(self._hits),
+            "misses": self._misses,
+            "skipped": self._skipped,
+            "hit_rate": round(sum(self._hits.values()) / lookups, 3) if lookups else None,
+            "similarity_threshold": self.similarity_threshold or None,
+        }
+
+    def _most_similar(self, tenant: str, job_key: str, applicant_skills: str, identity: Dict, text_key: str) -> Optional[str]:
+        signature = minhash(applicant_skills)
+        present = {field for field in IDENTITY_FIELDS if identity.get(field)}
+        best, best_score = None, self.similarity_threshold
+        for key in list(self._by_job.get((tenant, job_key), [])):
+            entry = self._live_entry(key, touch=False)
+            if entry is None or entry[5] != text_key or {field for field in IDENTITY_FIELDS if entry[3].get(field)} != present:
+                continue
+            score = similarity(signature, entry[2])
+            if score >= best_score:
+                best, best_score = key, score
+        return best
+
+    def _key(self, tenant: str, job_key: str, prompt_key: str) -> str:
+        return f"{tenant}:{job_key}:{prompt_key}"
+
+    def _live_entry(self, key: str, touch: bool = True) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            self._forget(key)
+            return None
+        if touch:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _forget(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        keys = self._by_job.get(entry[4], [])
+        if key in keys:
+            keys.remove(key)
+        if not keys:
+            self._by_job.pop(entry[4], None)
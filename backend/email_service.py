@@ -1,48 +1,47 @@
-import os
-import asyncio
-from typing import Dict, Optional
-from langchain_groq import ChatGroq
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+import re
+import json
+from typing import AsyncIterator, Dict, Optional, Tuple
 from dotenv import load_dotenv
 
+import email_cache
+import llm_client
+import metrics
+import tracing
+from email_cache import EmailCache, IDENTITY_FIELDS, SHARED_TENANT
+from json_repair import IncrementalJsonParser, TolerantJsonParser
+from prompts import SplitPrompt
+
 load_dotenv()
 
+# Matches the subject value only once its closing quote has streamed in
+SUBJECT_PATTERN = re.compile(r'"subject"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+def _parse_complete_subject(partial_json: str) -> Optional[str]:
+    """Extract the subject from partially streamed JSON, or None if it is not complete yet"""
+    match = SUBJECT_PATTERN.search(partial_json)
+    if not match:
+        return None
+    try:
+        return json.loads(f'"{match.group(1)}"').strip()
+    except ValueError:
+        return match.group(1).strip()
+
+def _identity(personal_info: Dict) -> Dict:
+    """The applicant's identifying details as strings (URLs arrive as pydantic objects)"""
+    return {field: str(personal_info[field]) if personal_info.get(field) else "" for field in IDENTITY_FIELDS}
+
 class EmailService:
     def __init__(self):
-        # Initialize Groq LLM
-        self.llm = ChatGroq(
-            temperature=0.3,  # Slightly more creative for email generation
-            groq_api_key=os.getenv("GROQ_API_KEY"),
-            model_name="llama-3.1-8b-instant"  # Updated to a currently supported model
-        )
+        # Initialize Groq LLM on the shared async connection pool
+        self.llm = llm_client.create_chat_model(temperature=0.3)  # Slightly more creative for email generation
         
-        # Email generation prompt template
-        self.email_prompt = PromptTemplate.from_template(
+        # Email generation prompt: fixed instructions first so providers can reuse their cached
+        # prefix, then the applicant (identical across a bulk request) and finally the job
+        self.email_prompt = SplitPrompt(
+            "generate_email",
             """
-            You are an expert cold email writer. Generate a professional, personalized cold email for a job application.
-            
-            ### JOB INFORMATION:
-            Role: {role}
-            Company: {company}
-            Description: {description}
-            Required Skills: {skills}
-            Experience Level: {experience}
-            Location: {location}
-            Salary: {salary}
-            Remote: {remote}
-            Job Type: {jobType}
-            
-            ### APPLICANT INFORMATION:
-            Name: {name}
-            Email: {email}
-            Skills & Experience: {applicant_skills}
-            Portfolio: {portfolio}
-            Phone: {phone}
-            LinkedIn: {linkedin}
-            GitHub: {github}
-            Personal Experience: {personal_experience}
-            Personal Location: {personal_location}
+            You are an expert cold email writer. Generate a professional, personalized cold email for a job application,
+            using the APPLICANT INFORMATION and JOB INFORMATION in the user message.
             
             ### INSTRUCTIONS:
             1. Create a compelling subject line that mentions the specific role and company
@@ -59,69 +58,229 @@ class EmailService:
             
             Return the result in JSON format with keys 'subject' and 'content'.
             Only return valid JSON without any preamble.
+            """,
+            [
+                ("applicant", """
+            ### APPLICANT INFORMATION:
+            Name: {name}
+            Email: {email}
+            Skills & Experience: {applicant_skills}
+            Portfolio: {portfolio}
+            Phone: {phone}
+            LinkedIn: {linkedin}
+            GitHub: {github}
+            Personal Experience: {personal_experience}
+            Personal Location: {personal_location}
+            """),
+                ("job", """
+            ### JOB INFORMATION:
+            Role: {role}
+            Company: {company}
+            Description: {description}
+            Required Skills: {skills}
+            Experience Level: {experience}
+            Location: {location}
+            Salary: {salary}
+            Remote: {remote}
+            Job Type: {jobType}
             
             ### VALID JSON (NO PREAMBLE):
-            """
+            """)
+            ],
+            memoize=["applicant"]
         )
         
-        # Initialize JSON parser
-        self.json_parser = JsonOutputParser()
+        # Tolerant JSON parser: repairs malformed answers instead of failing the request
+        self.json_parser = TolerantJsonParser("generate_email")
         
         # Create email generation chain
         self.generation_chain = self.email_prompt | self.llm
+        
+        # Drafts already generated per tenant, so repeat and near-duplicate requests skip the LLM
+        self.cache = EmailCache()
 
-    def test_connection(self) -> str:
+    async def test_connection(self) -> str:
         """Test if the email service is working"""
         try:
-            # Test with a simple prompt
-            test_response = self.llm.invoke("Test")
-            return "online" if test_response else "offline"
+            # Checks that an LLM backend is reachable without spending tokens on a test prompt
+            return await llm_client.probe()
         except Exception as e:
             print(f"Email service test failed: {e}")
             return "offline"
 
-    async def generate_email(self, job_data: Dict, personal_info: Dict) -> Optional[Dict]:
-        """Generate a personalized cold email"""
+    async def generate_email(
+        self,
+        job_data: Dict,
+        personal_info: Dict,
+        applicant_fields: Optional[Dict] = None,
+        tenant: str = SHARED_TENANT,
+        force: bool = False
+    ) -> Optional[Dict]:
+        """Generate a personalized cold email.
+
+        `applicant_fields` lets bulk callers pass prompt fields prepared once with
+        `build_applicant_fields` instead of rebuilding them for every job. Drafts are cached
+        per `tenant`; `force` skips the cache and replaces the entry with a fresh generation.
+        The returned dict carries a `_meta` entry saying how it was served.
+        """
         try:
-            # Prepare the prompt data
-            prompt_data = {
-                "role": job_data.get("role", ""),
-                "company": job_data.get("company", ""),
-                "description": job_data.get("description", ""),
-                "skills": ", ".join(job_data.get("skills", [])),
-                "experience": job_data.get("experience", ""),
-                "location": job_data.get("location", ""),
-                "salary": job_data.get("salary", ""),
-                "remote": "Yes" if job_data.get("remote") else "No" if job_data.get("remote") is not None else "",
-                "jobType": job_data.get("jobType", ""),
-                "name": personal_info.get("name", ""),
-                "email": personal_info.get("email", ""),
-                "applicant_skills": personal_info.get("skills", ""),
-                "portfolio": personal_info.get("portfolio", ""),
-                "phone": personal_info.get("phone", ""),
-                "linkedin": personal_info.get("linkedin", ""),
-                "github": personal_info.get("github", ""),
-                "personal_experience": personal_info.get("experience", ""),
-                "personal_location": personal_info.get("location", "")
-            }
-            
-            # Generate email using LLM
-            response = await asyncio.to_thread(
-                self.generation_chain.invoke,
-                prompt_data
-            )
+            with tracing.span("email_service.generate_email", {"job.company": job_data.get("company")}) as span:
+                # Prepare the prompt data
+                prompt_data = self._build_prompt_data(job_data, personal_info, applicant_fields)
+                cache_keys = self._cache_keys(job_data, prompt_data)
+                
+                cached = None if force else self._cached_email(tenant, cache_keys, job_data, personal_info)
+                span.set_attribute("cache", cached["_meta"]["cache"] if cached else "bypass" if force else "miss")
+                if cached is not None:
+                    return cached
+                
+                # Generate email using LLM (natively async, bounded by LLM_MAX_CONCURRENCY)
+                response = await llm_client.ainvoke(self.generation_chain, prompt_data)
+                
+                # Parse, validate and enhance the result
+                email_result, outcome = await self._finish_email(response.content, job_data, personal_info)
+                return self._remember_email(tenant, cache_keys, email_result, personal_info, force, outcome)
             
-            # Parse JSON response
-            email_result = self.json_parser.parse(response.content)
+        except Exception as e:
+            print(f"Error in generate_email: {str(e)}")
+            raise Exception(f"Failed to generate email: {str(e)}") from e
+
+    async def stream_email(self, job_data: Dict, personal_info: Dict, tenant: str = SHARED_TENANT, force: bool = False) -> AsyncIterator[Dict]:
+        """
+        Generate a cold email incrementally. Yields events as dicts with an `event` name:
+        `token` for every chunk of model output, `subject` once the subject line is complete,
+        then `complete` with the enhanced result (or `error` if generation fails). A cached
+        draft is sent as `subject` and `complete` straight away.
+        """
+        prompt_data = self._build_prompt_data(job_data, personal_info)
+        cache_keys = self._cache_keys(job_data, prompt_data)
+        buffer = ""
+        # Scans the answer as it streams in, so only the closing brackets are left to parse at the end
+        parser = IncrementalJsonParser()
+        subject_sent = False
+        try:
+            cached = None if force else self._cached_email(tenant, cache_keys, job_data, personal_info)
+            if cached is not None:
+                cached.pop("_meta")
+                yield {"event": "subject", "data": {"subject": cached["subject"]}}
+                yield {"event": "complete", "data": cached}
+                return
             
-            # Validate and enhance the result
-            enhanced_result = self._enhance_email_result(email_result, job_data, personal_info)
+            async for chunk in llm_client.astream(self.generation_chain, prompt_data):
+                text = chunk.content if isinstance(chunk.content, str) else ""
+                if not text:
+                    continue
+                buffer += text
+                parser.feed(text)
+                yield {"event": "token", "data": {"text": text}}
+                
+                if not subject_sent:
+                    subject = _parse_complete_subject(buffer)
+                    if subject is not None:
+                        subject_sent = True
+                        yield {"event": "subject", "data": {"subject": subject}}
             
-            return enhanced_result
+            email_result, outcome = await self._finish_email(buffer, job_data, personal_info, parser)
+            email_result = self._remember_email(tenant, cache_keys, email_result, personal_info, force, outcome)
+            email_result.pop("_meta")
+            yield {"event": "complete", "data": email_result}
             
         except Exception as e:
-            print(f"Error in generate_email: {str(e)}")
-            raise Exception(f"Failed to generate email: {str(e)}")
+            print(f"Error in stream_email: {str(e)}")
+            yield {"event": "error", "data": {"message": f"Failed to generate email: {str(e)}"}}
+
+    def _cache_keys(self, job_data: Dict, prompt_data: Dict) -> tuple:
+        """(posting hash, rendered prompt hash) identifying a draft in the cache"""
+        return email_cache.job_hash(job_data), email_cache.prompt_hash(self.email_prompt.format(**prompt_data))
+
+    def _cached_email(self, tenant: str, cache_keys: tuple, job_data: Dict, personal_info: Dict) -> Optional[Dict]:
+        """A cached draft for this request, re-addressed to the applicant if it was written for someone else"""
+        if not self.cache.enabled:
+            return None
+        identity = _identity(personal_info)
+        cached = self.cache.lookup(
+            tenant, *cache_keys, personal_info.get("skills") or "", identity, email_cache.free_text_hash(personal_info)
+        )
+        if cached is None:
+            return None
+        kind, email_result, previous_identity = cached
+        if kind == "similar":
+            email_result = self._readdress(email_result, previous_identity, identity, job_data, personal_info)
+        email_result["_meta"] = {"cache": kind}
+        return email_result
+
+    def _remember_email(
+        self, tenant: str, cache_keys: tuple, email_result: Dict, personal_info: Dict, force: bool, outcome: str = "clean"
+    ) -> Dict:
+        # A repaired answer may have been cut short or had text guessed back into shape; serve it once, never again
+        if outcome == "clean":
+            self.cache.set(
+                tenant, *cache_keys, email_result, personal_info.get("skills") or "", _identity(personal_info),
+                email_cache.free_text_hash(personal_info)
+            )
+        else:
+            self.cache.skip()
+        email_result["_meta"] = {"cache": "bypass" if force else "miss"}
+        return email_result
+
+    def _readdress(self, email_result: Dict, previous: Dict, identity: Dict, job_data: Dict, personal_info: Dict) -> Dict:
+        """Use another applicant's draft as a template: swap in this applicant's details and rescore it"""
+        replacements = [(previous[field], identity[field]) for field in IDENTITY_FIELDS if previous.get(field)]
+        # After the full name, a salutation or sign-off may still use just the first name
+        old_first, new_first = previous.get("name", "").split(" ")[0], identity.get("name", "").split(" ")[0]
+        
+        def swap(text: str) -> str:
+            for old, new in replacements:
+                text = text.replace(old, new)
+            if old_first and new_first:
+                text = re.sub(rf"\b{re.escape(old_first)}\b", lambda _: new_first, text)
+            return text
+        
+        return self._enhance_email_result(
+            {"subject": swap(email_result["subject"]), "content": swap(email_result["content"])}, job_data, personal_info
+        )
+
+    async def _finish_email(
+        self, text: str, job_data: Dict, personal_info: Dict, parser: Optional[IncrementalJsonParser] = None
+    ) -> Tuple[Dict, str]:
+        """Parse the model's JSON answer and enhance it, timing both stages; also returns the parse outcome"""
+        email_result, outcome = await self.json_parser.parse_with_outcome(text, parser)
+        with metrics.stage("enhance_email_result"):
+            return self._enhance_email_result(email_result, job_data, personal_info), outcome
+
+    def _build_prompt_data(self, job_data: Dict, personal_info: Dict, applicant_fields: Optional[Dict] = None) -> Dict:
+        """Map job and applicant fields onto the email prompt variables"""
+        prompt_data = self._build_job_fields(job_data)
+        prompt_data.update(applicant_fields if applicant_fields is not None else self.build_applicant_fields(personal_info))
+        return prompt_data
+
+    def _build_job_fields(self, job_data: Dict) -> Dict:
+        """Prompt variables describing the job posting"""
+        return {
+            "role": job_data.get("role", ""),
+            "company": job_data.get("company", ""),
+            "description": job_data.get("description", ""),
+            "skills": ", ".join(job_data.get("skills", [])),
+            "experience": job_data.get("experience", ""),
+            "location": job_data.get("location", ""),
+            "salary": job_data.get("salary", ""),
+            "remote": "Yes" if job_data.get("remote") else "No" if job_data.get("remote") is not None else "",
+            "jobType": job_data.get("jobType", "")
+        }
+
+    def build_applicant_fields(self, personal_info: Dict) -> Dict:
+        """Prompt variables describing the applicant; computed once per bulk request"""
+        return {
+            "name": personal_info.get("name", ""),
+            "email": personal_info.get("email", ""),
+            "applicant_skills": personal_info.get("skills", ""),
+            "portfolio": personal_info.get("portfolio", ""),
+            "phone": personal_info.get("phone", ""),
+            "linkedin": personal_info.get("linkedin", ""),
+            "github": personal_info.get("github", ""),
+            "personal_experience": personal_info.get("experience", ""),
+            "personal_location": personal_info.get("location", "")
+        }
 
     def _enhance_email_result(self, email_result: Dict, job_data: Dict, personal_info: Dict) -> Dict:
         """Enhance and validate email result"""
@@ -131,6 +290,7 @@ class EmailService:
         
         # Generate fallback subject if missing
         if not subject:
+            metrics.fallback("email_subject")
             role = job_data.get("role", "Position")
             company = job_data.get("company", "Your Company")
             name = personal_info.get("name", "Candidate")
@@ -138,6 +298,7 @@ class EmailService:
         
         # Generate fallback content if missing
         if not content:
+            metrics.fallback("email_content")
             content = self._generate_fallback_email(job_data, personal_info)
         
         # Calculate a simple confidence score based on content quality
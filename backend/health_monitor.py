@@ -0,0 +1,66 @@
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+Probe = Callable[[], Awaitable[str]]
+
+
+class HealthMonitor:
+    def __init__(self, probes: Dict[str, Probe], interval: Optional[float] = None, timeout: Optional[float] = None):
+        """
+        Runs the service probes in a background task every `interval` seconds and keeps
+        the latest results in memory, so health endpoints answer without doing any I/O.
+        Each probe returns a status string ("online", "offline", ...); a probe that raises
+        or exceeds `timeout` counts as "offline".
+        """
+        self.probes = probes
+        self.interval = interval or float(os.getenv("HEALTH_CHECK_INTERVAL", "30"))
+        self.timeout = timeout or float(os.getenv("HEALTH_PROBE_TIMEOUT", "10"))
+        self.statuses: Dict[str, str] = {name: "unknown" for name in probes}
+        self.checked_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def check_now(self) -> Dict[str, str]:
+        """Runs every probe once, concurrently, and records the results."""
+        names = list(self.probes)
+        results = await asyncio.gather(*(self._probe(name) for name in names))
+        self.statuses = dict(zip(names, results))
+        self.checked_at = time.time()
+        return dict(self.statuses)
+
+    def snapshot(self) -> Dict:
+        age = time.time() - self.checked_at if self.checked_at is not None else None
+        return {
+            "statuses": dict(self.statuses),
+            "checked_at": self.checked_at,
+            "age_seconds": round(age, 1) if age is not None else None,
+            # Results older than a few intervals mean the monitor itself has stopped
+            "stale": age is None or age > 3 * self.interval,
+        }
+
+    async def _probe(self, name: str) -> str:
+        try:
+            return await asyncio.wait_for(self.probes[name](), timeout=self.timeout)
+        except Exception as e:
+            print(f"Health probe '{name}' failed: {str(e) or type(e).__name__}")
+            return "offline"
+
+    async def _run(self) -> None:
+        while True:
+            await self.check_now()
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,266 @@
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from dotenv import load_dotenv
+
+# This module is imported by the worker processes, so it only imports what converting HTML needs
+
+load_dotenv()
+
+PARSER_SELECTOLAX = "selectolax"
+PARSER_LXML = "lxml"
+PARSER_HTML_PARSER = "html.parser"
+
+# Largest page converted on a thread rather than a worker, per parser: about 1 ms of parsing,
+# the cost of the round trip to a worker. html.parser takes that long for even small pages.
+DEFAULT_INLINE_BYTES = {PARSER_SELECTOLAX: 65536, PARSER_LXML: 32768, PARSER_HTML_PARSER: 0}
+
+# Elements whose content is never visible text
+NON_TEXT_TAGS = ("script", "style", "noscript", "template")
+
+
+def _available_parsers() -> List[str]:
+    """Installed parsers, fastest first; BeautifulSoup's html.parser is always there."""
+    parsers = []
+    try:
+        import selectolax.lexbor  # noqa: F401
+        parsers.append(PARSER_SELECTOLAX)
+    except ImportError:
+        pass
+    try:
+        # lxml needs cssselect for the adapters' CSS selectors
+        import lxml.html  # noqa: F401
+        import cssselect  # noqa: F401
+        parsers.append(PARSER_LXML)
+    except ImportError:
+        pass
+    parsers.append(PARSER_HTML_PARSER)
+    return parsers
+
+
+AVAILABLE_PARSERS = _available_parsers()
+
+
+def default_parser() -> str:
+    """HTML_PARSER if set and installed, else the fastest installed parser."""
+    configured = os.getenv("HTML_PARSER", "auto")
+    if configured != "auto" and configured not in AVAILABLE_PARSERS:
+        print(f"HTML_PARSER={configured} is not installed, using {AVAILABLE_PARSERS[0]}")
+    return configured if configured in AVAILABLE_PARSERS else AVAILABLE_PARSERS[0]
+
+
+def html_to_text(
+    html: Union[str, bytes],
+    remove_selectors: Optional[Sequence[str]] = None,
+    body_selectors: Optional[Sequence[str]] = None,
+    parser: Optional[str] = None
+) -> str:
+    """
+    Converts page HTML (text, or UTF-8 bytes) into newline-separated visible text, dropping
+    `remove_selectors`. When `body_selectors` match anything, only the text inside those
+    elements is kept. Every parser gives the same lines for well-formed pages; they can
+    differ slightly on broken markup, which each repairs in its own way.
+    """
+    parser = parser or AVAILABLE_PARSERS[0]
+    if parser == PARSER_SELECTOLAX:
+        chunks = _selectolax_chunks(html, remove_selectors or (), body_selectors or ())
+    elif parser == PARSER_LXML:
+        chunks = _lxml_chunks(html, remove_selectors or (), body_selectors or ())
+    else:
+        chunks = _soup_chunks(html, remove_selectors or (), body_selectors or ())
+    lines = (line.strip() for chunk in chunks for line in chunk.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def select_fields(html: Union[str, bytes], field_selectors: Dict[str, str], parser: Optional[str] = None) -> Dict:
+    """
+    Field -> whitespace-collapsed text of the first element matching its CSS selector,
+    for the fields whose selector matched non-empty text.
+    """
+    if not field_selectors or not html:
+        return {}
+    parser = parser or AVAILABLE_PARSERS[0]
+    if parser == PARSER_SELECTOLAX:
+        from selectolax.lexbor import LexborHTMLParser
+
+        tree = LexborHTMLParser(html)
+        nodes = {field: tree.css_first(selector) for field, selector in field_selectors.items()}
+        texts = {field: node.text(separator=" ") for field, node in nodes.items() if node is not None}
+    elif parser == PARSER_LXML:
+        from lxml import html as lxml_html
+
+        data = html.encode("utf-8") if isinstance(html, str) else html
+        root = lxml_html.document_fromstring(data, parser=lxml_html.HTMLParser(encoding="utf-8"))
+        matches = {field: root.cssselect(selector) for field, selector in field_selectors.items()}
+        texts = {field: " ".join(found[0].itertext()) for field, found in matches.items() if found}
+    else:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html.decode("utf-8", "replace") if isinstance(html, bytes) else html, "html.parser")
+        elements = {field: soup.select_one(selector) for field, selector in field_selectors.items()}
+        texts = {field: element.get_text(separator=" ") for field, element in elements.items() if element is not None}
+    fields = {field: " ".join(text.split()) for field, text in texts.items()}
+    return {field: text for field, text in fields.items() if text}
+
+
+def page_fields(html: Union[str, bytes], field_selectors: Dict[str, str], parser: Optional[str] = None) -> Dict:
+    """
+    Everything read from the full page besides its text, in one pass: the site adapter's
+    `fields`, the embedded JobPosting (`json_ld`) and the OpenGraph tags (`open_graph`).
+    """
+    import structured_data
+
+    text = html.decode("utf-8", "replace") if isinstance(html, bytes) else html
+    return {
+        "fields": select_fields(html, field_selectors, parser),
+        "json_ld": structured_data.extract_json_ld_job_data(text),
+        "open_graph": structured_data.extract_open_graph_job_data(text),
+    }
+
+
+def embeds_job_posting(html: Union[str, bytes]) -> bool:
+    """`structured_data.has_job_posting` for page bytes."""
+    import structured_data
+
+    return structured_data.has_job_posting(html.decode("utf-8", "replace") if isinstance(html, bytes) else html)
+
+
+def _soup_chunks(html, remove_selectors, body_selectors) -> List[str]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html.decode("utf-8", "replace") if isinstance(html, bytes) else html, "html.parser")
+    for tag in soup(list(NON_TEXT_TAGS)):
+        tag.decompose()
+    for selector in remove_selectors:
+        for element in soup.select(selector):
+            element.decompose()
+    roots = [element for selector in body_selectors for element in soup.select(selector)]
+    return [root.get_text(separator="\n") for root in roots] if roots else [soup.get_text(separator="\n")]
+
+
+def _selectolax_chunks(html, remove_selectors, body_selectors) -> List[str]:
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    if tree.root is None:
+        return []
+    tree.strip_tags(list(NON_TEXT_TAGS))
+    for selector in remove_selectors:
+        for node in tree.css(selector):
+            node.decompose()
+    roots = [node for selector in body_selectors for node in tree.css(selector)]
+    return [node.text(separator="\n") for node in roots or [tree.root]]
+
+
+def _lxml_chunks(html, remove_selectors, body_selectors) -> List[str]:
+    from lxml import etree
+    from lxml import html as lxml_html
+
+    data = html.encode("utf-8") if isinstance(html, str) else html
+    if not data.strip():
+        return []
+    root = lxml_html.document_fromstring(data, parser=lxml_html.HTMLParser(encoding="utf-8"))
+    # Comments are dropped too: html.parser and selectolax never return their text
+    etree.strip_elements(root, *NON_TEXT_TAGS, etree.Comment, with_tail=False)
+    for selector in remove_selectors:
+        for element in root.cssselect(selector):
+            element.drop_tree()
+    roots = [element for selector in body_selectors for element in root.cssselect(selector)]
+    return ["\n".join(element.itertext()) for element in roots or [root]]
+
+
+class HtmlCleaner:
+    def __init__(self, workers: Optional[int] = None, inline_bytes: Optional[int] = None, parser: Optional[str] = None):
+        """
+        Converts page HTML to text in a pool of `workers` processes, so parsing and
+        stripping multi-megabyte DOMs does not hold the GIL the event loop needs. Pages
+        travel to the workers as UTF-8 bytes and only the compact text comes back.
+
+        Pages up to `inline_bytes` (by default, depending on the parser) are converted on a
+        thread instead, since the round trip to a worker costs more than parsing them. With
+        `workers=0` every page is. A worker that dies (e.g. out of memory) gets the pool
+        replaced, and that page is converted on a thread.
+        """
+        self.workers = int(os.getenv("HTML_CLEANER_WORKERS", str(min(4, os.cpu_count() or 1)))) if workers is None else workers
+        self.parser = parser or default_parser()
+        if inline_bytes is None:
+            inline_bytes = int(os.getenv("HTML_CLEANER_INLINE_BYTES", str(DEFAULT_INLINE_BYTES[self.parser])))
+        self.inline_bytes = inline_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._counts = {"offloaded": 0, "inline": 0, "pool_restarts": 0}
+        self._bytes_in = 0
+        self._chars_out = 0
+
+    async def to_text(
+        self,
+        html: Union[str, bytes],
+        remove_selectors: Optional[Sequence[str]] = None,
+        body_selectors: Optional[Sequence[str]] = None
+    ) -> str:
+        text = await self._run(html_to_text, html, tuple(remove_selectors or ()), tuple(body_selectors or ()), self.parser)
+        self._chars_out += len(text)
+        return text
+
+    async def parse_page(self, html: Union[str, bytes], field_selectors: Optional[Dict[str, str]] = None) -> Dict:
+        """`page_fields` of the page, computed like `to_text` in a worker."""
+        if not html:
+            return {"fields": {}, "json_ld": {}, "open_graph": {}}
+        return await self._run(page_fields, html, dict(field_selectors or {}), self.parser)
+
+    async def has_job_posting(self, html: Union[str, bytes]) -> bool:
+        """Whether the page embeds a JobPosting, checked like `to_text` in a worker."""
+        return bool(html) and await self._run(embeds_job_posting, html)
+
+    async def _run(self, fn: Callable[..., Any], html: Union[str, bytes], *args) -> Any:
+        """Calls `fn(page bytes, *args)` on a worker, or on a thread for small pages."""
+        data = html.encode("utf-8") if isinstance(html, str) else html
+        args = (data,) + args
+        self._bytes_in += len(data)
+        if not self.workers or len(data) <= self.inline_bytes:
+            self._counts["inline"] += 1
+            return await asyncio.to_thread(fn, *args)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._get_pool(), fn, *args)
+        except BrokenProcessPool:
+            print("HTML cleaner worker died, restarting the pool")
+            self._pool = None
+            self._counts["pool_restarts"] += 1
+            self._counts["inline"] += 1
+            return await asyncio.to_thread(fn, *args)
+        self._counts["offloaded"] += 1
+        return result
+
+    async def start(self) -> None:
+        """Starts every worker ahead of traffic, so no request waits for a process to spawn."""
+        if not self.workers:
+            return
+        pool = self._get_pool()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(pool, html_to_text, b"", (), (), self.parser) for _ in range(self.workers)))
+
+    def stats(self) -> Dict:
+        return {
+            "parser": self.parser,
+            "workers": self.workers,
+            "inline_bytes": self.inline_bytes,
+            **self._counts,
+            "bytes_in": self._bytes_in,
+            "chars_out": self._chars_out,
+        }
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Forking a process that runs an event loop, browsers and exporter threads is unsafe
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=context)
+        return self._pool
@@ -0,0 +1,162 @@
+import os
+import copy
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+class IdempotencyKeyReused(Exception):
+    """The same Idempotency-Key was sent with a different request body."""
+
+
+class ClientDisconnected(Exception):
+    """Every client waiting on the work has gone away, so it was cancelled."""
+
+
+class _Entry:
+    def __init__(self, task: asyncio.Task, fingerprint: str):
+        self.task = task
+        self.fingerprint = fingerprint
+        self.waiters = 0
+        self.expires_at: Optional[float] = None
+        # Pending cancellation while no client is waiting, undone if a retry attaches
+        self.cancel_handle: Optional[asyncio.TimerHandle] = None
+
+
+class IdempotencyRegistry:
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        max_keys: Optional[int] = None,
+        disconnect_poll_interval: float = 0.5,
+        cancel_grace_seconds: Optional[float] = None,
+    ):
+        """
+        Maps client-supplied Idempotency-Keys to the work they started. A repeated request
+        with the same key attaches to the in-progress work, or gets the completed result
+        back for `ttl_seconds`, instead of starting the work again. Failed work is
+        forgotten so the next retry runs it afresh.
+
+        When every client waiting on a key has disconnected, the work keeps running for
+        `cancel_grace_seconds` (longer than the frontend's retry backoff) so a retry can
+        attach to it, and is cancelled only if none does. Work started without a key can
+        never be attached to, so it is cancelled straight away.
+        """
+        self.ttl_seconds = ttl_seconds or float(os.getenv("IDEMPOTENCY_TTL", "600"))
+        self.max_keys = max_keys or int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+        self.disconnect_poll_interval = disconnect_poll_interval
+        self.cancel_grace_seconds = (
+            float(os.getenv("IDEMPOTENCY_CANCEL_GRACE_SECONDS", "10")) if cancel_grace_seconds is None else cancel_grace_seconds
+        )
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.executions = 0
+        self.attached = 0
+        self.replayed = 0
+        self.cancelled = 0
+
+    async def run(
+        self,
+        key: Optional[str],
+        fingerprint: str,
+        fn: Callable[[], Awaitable[Any]],
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Runs `fn` once per key and returns (result, replayed), where `replayed` is True if
+        the result was already complete when this request arrived. Without a key the work
+        simply runs, still cancelled if the client disconnects.
+        """
+        entry = self._lookup(key) if key else None
+        if entry is not None and entry.fingerprint != fingerprint:
+            raise IdempotencyKeyReused(f"{IDEMPOTENCY_HEADER} '{key}' was already used with a different request")
+
+        replayed = False
+        if entry is None:
+            entry = _Entry(asyncio.ensure_future(fn()), fingerprint)
+            entry.task.add_done_callback(lambda task, key=key, entry=entry: self._finished(key, entry, task))
+            if key:
+                self._entries[key] = entry
+                self._evict()
+            self.executions += 1
+        elif entry.task.done():
+            replayed = True
+            self.replayed += 1
+        else:
+            self.attached += 1
+
+        entry.waiters += 1
+        if entry.cancel_handle is not None:
+            entry.cancel_handle.cancel()
+            entry.cancel_handle = None
+        try:
+            result = await self._wait(entry.task, is_disconnected)
+        finally:
+            entry.waiters -= 1
+            if entry.waiters == 0 and not entry.task.done():
+                if key and self.cancel_grace_seconds > 0:
+                    entry.cancel_handle = asyncio.get_running_loop().call_later(
+                        self.cancel_grace_seconds, self._cancel_abandoned, entry
+                    )
+                else:
+                    self._cancel_abandoned(entry)
+        return copy.deepcopy(result), replayed
+
+    def stats(self) -> Dict:
+        return {
+            "keys": len(self._entries),
+            "executions": self.executions,
+            "attached_retries": self.attached,
+            "replayed_results": self.replayed,
+            "cancelled_after_disconnect": self.cancelled,
+        }
+
+    async def _wait(self, task: asyncio.Task, is_disconnected: Optional[Callable[[], Awaitable[bool]]]) -> Any:
+        if task.done():
+            return task.result()
+        if is_disconnected is None:
+            return await asyncio.shield(task)
+        while True:
+            # asyncio.wait never cancels the task, so other waiters are unaffected
+            done, _ = await asyncio.wait({task}, timeout=self.disconnect_poll_interval)
+            if done:
+                return task.result()
+            if await is_disconnected():
+                raise ClientDisconnected("Client disconnected before the result was ready")
+
+    def _cancel_abandoned(self, entry: _Entry) -> None:
+        entry.cancel_handle = None
+        if entry.waiters == 0 and not entry.task.done():
+            entry.task.cancel()
+            self.cancelled += 1
+
+    def _lookup(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at is not None and entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry
+
+    def _finished(self, key: Optional[str], entry: _Entry, task: asyncio.Task) -> None:
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter has already gone away
+            task.exception()
+        if task.cancelled() or task.exception() is not None:
+            if key and self._entries.get(key) is entry:
+                del self._entries[key]
+            return
+        entry.expires_at = time.monotonic() + self.ttl_seconds
+
+    def _evict(self) -> None:
+        # Drop the oldest completed keys first; in-progress work is never forgotten
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_keys:
+                break
+            if self._entries[key].task.done():
+                del self._entries[key]
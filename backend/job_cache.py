@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+# Query parameters that only identify the click source, on any site. Generic names such as
+# ref, source, from or src are left alone: on some sites they select the posting or its variant.
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "_ga", "_gl", "igshid", "li_fat_id"}
+TRACKING_PREFIXES = ("utm_", "trk")
+# Parameters that are known to be tracking on one job board only; keyed by host, subdomains included
+SITE_TRACKING_PARAMS = {
+    "linkedin.com": {"refid", "trackingid", "lipi", "midtoken", "midsig", "eid", "otptoken", "ebp", "originalsubdomain"},
+    "indeed.com": {"from", "tk", "alid", "vjk_src"},
+    "greenhouse.io": {"gh_src"},
+    "lever.co": {"lever-source", "lever-origin", "lever-source[]"},
+}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalizes a job URL so that links differing only in tracking noise share a cache entry:
+    lowercases scheme and host, drops default ports, fragments, known tracking parameters
+    (generic ones plus the site's own) and trailing slashes, and sorts the rest of the query.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and DEFAULT_PORTS.get(scheme) != parts.port:
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    tracking = TRACKING_PARAMS | _site_tracking_params(parts.hostname or "")
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=False)
+        if not key.lower().startswith(TRACKING_PREFIXES) and key.lower() not in tracking
+    ]
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
+
+
+def _site_tracking_params(host: str) -> Set[str]:
+    host = host.lower()
+    params = set()
+    for site, site_params in SITE_TRACKING_PARAMS.items():
+        if host == site or host.endswith("." + site):
+            params |= site_params
+    return params
+
+
+def cache_key(url: str) -> str:
+    """Content-addressed key for a job URL: the SHA-256 of its canonical form."""
+    return hashlib.sha256(canonicalize_url(url).encode("utf-8")).hexdigest()
+
+
+class _SQLiteTier:
+    """Persistent second tier so cached extractions survive restarts."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_cache ("
+            " key TEXT PRIMARY KEY, url TEXT, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS job_cache_last_access ON job_cache(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM job_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM job_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE job_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return {"value": json.loads(row[0]), "expires_at": row[1]}
+
+    def set(self, key: str, url: str, value: Dict, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_cache (key, url, value, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, url, json.dumps(value), expires_at, time.time()),
+            )
+            # Evict expired rows, then the least recently used ones beyond the size cap
+            self._conn.execute("DELETE FROM job_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.execute(
+                "DELETE FROM job_cache WHERE key IN ("
+                " SELECT key FROM job_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobDataCache:
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        db_path: Optional[str] = None,
+    ):
+        """
+        Two-tier cache for extracted job data: an in-memory LRU with TTL in front of an
+        optional SQLite file (enabled by JOB_CACHE_DB) that survives restarts.
+        """
+        self.ttl_seconds = ttl_seconds or float(os.getenv("JOB_CACHE_TTL", str(6 * 60 * 60)))
+        self.max_entries = max_entries or int(os.getenv("JOB_CACHE_MAX_ENTRIES", "1000"))
+        db_path = db_path if db_path is not None else os.getenv("JOB_CACHE_DB", "")
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._disk = _SQLiteTier(db_path, int(os.getenv("JOB_CACHE_DISK_MAX_ENTRIES", "10000"))) if db_path else None
+        self._hits = {"memory": 0, "disk": 0}
+        self._misses = 0
+
+    async def get(self, url: str) -> Optional[Dict]:
+        """Returns a copy of the cached job data for `url`, or None."""
+        key = cache_key(url)
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.time():
+                self._memory.move_to_end(key)
+                self._hits["memory"] += 1
+                metrics.CACHE_LOOKUPS.labels("job_data", "memory_hit").inc()
+                return json.loads(value)
+            del self._memory[key]
+
+        if self._disk is not None:
+            stored = await asyncio.to_thread(self._disk.get, key)
+            if stored is not None:
+                self._remember(key, stored["value"], stored["expires_at"])
+                self._hits["disk"] += 1
+                metrics.CACHE_LOOKUPS.labels("job_data", "disk_hit").inc()
+                return stored["value"]
+
+        self._misses += 1
+        metrics.CACHE_LOOKUPS.labels("job_data", "miss").inc()
+        return None
+
+    async def set(self, url: str, value: Dict) -> None:
+        key = cache_key(url)
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, value, expires_at)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.set, key, canonicalize_url(url), value, expires_at)
+
+    def stats(self) -> Dict:
+        lookups = self._misses + sum(self._hits.values())
+        return {
+            "entries": len(self._memory),
+            "hits": dict(self._hits),
+            "misses": self._misses,
+            "hit_rate": round(sum(self._hits.values()) / lookups, 3) if lookups else None,
+            "persistent": self._disk is not None,
+        }
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+
+    def _remember(self, key: str, value: Dict, expires_at: float) -> None:
+        # Stored serialized so callers can never mutate a cached entry in place
+        self._memory[key] = (expires_at, json.dumps(value))
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
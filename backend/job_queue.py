@@ -0,0 +1,386 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import httpx
+from dotenv import load_dotenv
+
+import tracing
+
+load_dotenv()
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+FINISHED_STATUSES = (STATUS_SUCCEEDED, STATUS_FAILED)
+
+Handler = Callable[[Dict], Awaitable[Any]]
+
+
+def _new_record(job_type: str, payload: Dict, callback_url: Optional[str]) -> Dict:
+    now = time.time()
+    return {
+        "id": uuid.uuid4().hex,
+        "type": job_type,
+        "status": STATUS_QUEUED,
+        "payload": payload,
+        "result": None,
+        "error": None,
+        "callback_url": callback_url,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+class InMemoryQueueBackend:
+    def __init__(self, max_records: Optional[int] = None):
+        """Default backend: an asyncio queue plus a bounded record store. Lost on restart."""
+        self.max_records = max_records or int(os.getenv("JOB_QUEUE_MAX_RECORDS", "10000"))
+        self._queue: Optional[asyncio.Queue] = None
+        self._records: "OrderedDict[str, Dict]" = OrderedDict()
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    async def recover(self) -> List[str]:
+        return []
+
+    async def put(self, record: Dict) -> None:
+        await self.save(record)
+        self.queue.put_nowait(record["id"])
+
+    async def claim(self) -> Dict:
+        while True:
+            job_id = await self.queue.get()
+            record = self._records.get(job_id)
+            if record is not None and record["status"] == STATUS_QUEUED:
+                record.update(status=STATUS_RUNNING, updated_at=time.time())
+                return dict(record)
+
+    async def save(self, record: Dict) -> None:
+        self._records[record["id"]] = dict(record)
+        self._records.move_to_end(record["id"])
+        # Forget the oldest finished jobs once the store is full
+        while len(self._records) > self.max_records:
+            oldest_id, oldest = next(iter(self._records.items()))
+            if oldest["status"] in (STATUS_QUEUED, STATUS_RUNNING):
+                break
+            del self._records[oldest_id]
+
+    async def load(self, job_id: str) -> Optional[Dict]:
+        record = self._records.get(job_id)
+        return dict(record) if record is not None else None
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteQueueBackend:
+    def __init__(self, path: str, retention_seconds: Optional[float] = None, lease_seconds: Optional[float] = None):
+        """
+        Persistent backend: queued and interrupted jobs survive a restart. Finished jobs are
+        deleted `retention_seconds` after they finish, checked at most once a minute.
+
+        Several processes may share the database. A claimed job is leased to the claiming
+        process for `lease_seconds`, renewed while it runs; only a job whose lease has
+        lapsed (its process died) is taken over by another process or re-queued.
+        """
+        if retention_seconds is None:
+            retention_seconds = float(os.getenv("JOB_QUEUE_RETENTION_SECONDS", "604800"))
+        self.retention_seconds = retention_seconds
+        self.lease_seconds = lease_seconds or float(os.getenv("JOB_QUEUE_LEASE_SECONDS", "60"))
+        self.owner = uuid.uuid4().hex
+        self._pruned_at = 0.0
+        # Queued count as of the last database access, so `depth` never touches the file
+        self._queued = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, type TEXT NOT NULL, status TEXT NOT NULL, payload TEXT NOT NULL,"
+            " result TEXT, error TEXT, callback_url TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        # Databases created before leases existed gain the columns in place
+        for column, kind in (("owner", "TEXT"), ("lease_expires", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs(status, created_at)")
+        self._conn.commit()
+        self._count_queued()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    @property
+    def wakeup(self) -> asyncio.Event:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        return self._wakeup
+
+    async def recover(self) -> List[str]:
+        """
+        Re-queues jobs whose process stopped while running them. Jobs still leased to a
+        live process are left alone; leases that lapse later are taken over by `claim`.
+        """
+        def requeue():
+            with self._lock:
+                now = time.time()
+                rows = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? AND COALESCE(lease_expires, 0) < ?", (STATUS_RUNNING, now)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE jobs SET status = ?, owner = NULL, lease_expires = NULL, updated_at = ?"
+                    " WHERE id = ? AND status = ? AND COALESCE(lease_expires, 0) < ?",
+                    [(STATUS_QUEUED, now, row[0], STATUS_RUNNING, now) for row in rows],
+                )
+                self._conn.commit()
+                self._count_queued()
+                return [row[0] for row in rows]
+
+        recovered = await asyncio.to_thread(requeue)
+        self.wakeup.set()
+        return recovered
+
+    async def put(self, record: Dict) -> None:
+        await self.save(record)
+        self.wakeup.set()
+
+    async def claim(self) -> Dict:
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._renew_leases())
+        while True:
+            record = await asyncio.to_thread(self._claim_next)
+            if record is not None:
+                return record
+            self.wakeup.clear()
+            try:
+                # Poll occasionally too, in case another process enqueued work
+                await asyncio.wait_for(self.wakeup.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+
+    async def save(self, record: Dict) -> None:
+        await asyncio.to_thread(self._save, record)
+
+    async def load(self, job_id: str) -> Optional[Dict]:
+        return await asyncio.to_thread(self._load, job_id)
+
+    def depth(self) -> int:
+        """
+        Queued jobs as last counted on a worker thread: refreshed on every enqueue and claim,
+        and by idle workers polling, so probes never block the event loop on the database.
+        """
+        return self._queued
+
+    async def close(self) -> None:
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            await asyncio.gather(self._heartbeat, return_exceptions=True)
+            self._heartbeat = None
+        with self._lock:
+            # Hand back the jobs this process was stopped in the middle of, for the next one to run
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_expires = NULL WHERE owner = ? AND status = ?",
+                (STATUS_QUEUED, self.owner, STATUS_RUNNING),
+            )
+            self._conn.commit()
+            self._conn.close()
+
+    async def _renew_leases(self) -> None:
+        """Extends the leases on this process's running jobs, well before they lapse."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self._renew)
+            except sqlite3.Error as e:
+                print(f"Failed to renew background job leases: {e}")
+
+    def _renew(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE owner = ? AND status = ?",
+                (time.time() + self.lease_seconds, self.owner, STATUS_RUNNING),
+            )
+            self._conn.commit()
+
+    def _claim_next(self) -> Optional[Dict]:
+        # Queued jobs, or running ones whose process stopped renewing the lease
+        claimable = "(status = ? OR (status = ? AND COALESCE(lease_expires, 0) < ?))"
+        with self._lock:
+            while True:
+                now = time.time()
+                row = self._conn.execute(
+                    f"SELECT id FROM jobs WHERE {claimable} ORDER BY created_at LIMIT 1",
+                    (STATUS_QUEUED, STATUS_RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    self._count_queued()
+                    return None
+                cursor = self._conn.execute(
+                    f"UPDATE jobs SET status = ?, owner = ?, lease_expires = ?, updated_at = ? WHERE id = ? AND {claimable}",
+                    (STATUS_RUNNING, self.owner, now + self.lease_seconds, now, row[0], STATUS_QUEUED, STATUS_RUNNING, now),
+                )
+                self._conn.commit()
+                # Another process sharing the database may have claimed it in between
+                if cursor.rowcount == 1:
+                    break
+            self._count_queued()
+        return self._load(row[0])
+
+    def _count_queued(self) -> None:
+        """Refreshes the cached queue depth; call with the lock held, off the event loop."""
+        self._queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (STATUS_QUEUED,)).fetchone()[0]
+
+    def _prune(self) -> int:
+        """Deletes jobs that finished more than `retention_seconds` ago; call with the lock held."""
+        self._pruned_at = time.time()
+        cursor = self._conn.execute(
+            f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED_STATUSES))}) AND updated_at < ?",
+            (*FINISHED_STATUSES, self._pruned_at - self.retention_seconds),
+        )
+        return cursor.rowcount
+
+    def _save(self, record: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, type, status, payload, result, error, callback_url, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record["id"], record["type"], record["status"], json.dumps(record["payload"]),
+                    json.dumps(record["result"]) if record["result"] is not None else None,
+                    record["error"], record["callback_url"], record["created_at"], record["updated_at"],
+                ),
+            )
+            if record["status"] in FINISHED_STATUSES and time.time() - self._pruned_at >= 60:
+                self._prune()
+            self._conn.commit()
+            if record["status"] == STATUS_QUEUED:
+                self._count_queued()
+
+    def _load(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, type, status, payload, result, error, callback_url, created_at, updated_at"
+                " FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0], "type": row[1], "status": row[2], "payload": json.loads(row[3]),
+            "result": json.loads(row[4]) if row[4] is not None else None, "error": row[5],
+            "callback_url": row[6], "created_at": row[7], "updated_at": row[8],
+        }
+
+
+def create_backend():
+    """Picks the queue backend from JOB_QUEUE_BACKEND (memory by default, or sqlite)."""
+    if os.getenv("JOB_QUEUE_BACKEND", "memory").lower() == "sqlite":
+        return SQLiteQueueBackend(os.getenv("JOB_QUEUE_DB", "jobs.db"))
+    return InMemoryQueueBackend()
+
+
+class JobQueue:
+    def __init__(self, handlers: Dict[str, Handler], backend=None, workers: Optional[int] = None):
+        """
+        Runs long extraction / generation work in the background. `submit` returns at once;
+        a pool of worker tasks executes jobs with the handler registered for their type
+        and, when the job has a callback URL, POSTs the finished record to it.
+        """
+        self.handlers = handlers
+        self.backend = backend or create_backend()
+        self.workers = workers or int(os.getenv("JOB_QUEUE_WORKERS", "4"))
+        self._tasks: List[asyncio.Task] = []
+        self._running = 0
+        self._callback_client: Optional[httpx.AsyncClient] = None
+        # The event loop only keeps weak references to tasks, so callbacks in flight are held here
+        self._callback_tasks: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        recovered = await self.backend.recover()
+        if recovered:
+            print(f"Re-queued {len(recovered)} interrupted background jobs")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks + list(self._callback_tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._callback_tasks, return_exceptions=True)
+        self._tasks = []
+        if self._callback_client is not None:
+            await self._callback_client.aclose()
+        await self.backend.close()
+
+    async def submit(self, job_type: str, payload: Dict, callback_url: Optional[str] = None) -> Dict:
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        record = _new_record(job_type, payload, callback_url)
+        await self.backend.put(record)
+        return record
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        return await self.backend.load(job_id)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "queued": self.backend.depth(),
+            "callbacks_pending": len(self._callback_tasks),
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            record = await self.backend.claim()
+            self._running += 1
+            # The job id stands in for the request id, so a job's spans can be found by its id
+            request_id = tracing.current_request_id.set(record["id"])
+            try:
+                with tracing.span("job_queue.run", {"job.type": record["type"]}):
+                    record["result"] = await self.handlers[record["type"]](record["payload"])
+                record["status"] = STATUS_SUCCEEDED
+            except asyncio.CancelledError:
+                # Shutting down: leave the job "running" so a persistent backend re-queues it
+                raise
+            except Exception as e:
+                record["status"] = STATUS_FAILED
+                record["error"] = str(e)
+            finally:
+                self._running -= 1
+                tracing.current_request_id.reset(request_id)
+            record["updated_at"] = time.time()
+            await self.backend.save(record)
+            if record["callback_url"]:
+                # Delivered in the background so a slow receiver never holds up a worker
+                task = asyncio.create_task(self._send_callback(record))
+                self._callback_tasks.add(task)
+                task.add_done_callback(self._callback_tasks.discard)
+
+    async def _send_callback(self, record: Dict, attempts: int = 3) -> None:
+        if self._callback_client is None:
+            self._callback_client = httpx.AsyncClient(timeout=10)
+        body = {key: value for key, value in record.items() if key not in ("payload", "callback_url")}
+        for attempt in range(attempts):
+            try:
+                response = await self._callback_client.post(record["callback_url"], json=body)
+                if response.status_code < 500:
+                    return
+            except httpx.HTTPError as e:
+                print(f"Callback for job {record['id']} failed: {str(e)}")
+            await asyncio.sleep(2 ** attempt)
+        print(f"Giving up on callback for job {record['id']} after {attempts} attempts")
@@ -1,39 +1,64 @@
 import os
-import asyncio
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
 
-# Updated imports: Using SeleniumURLLoader instead of PlaywrightURLLoader
-from langchain_community.document_loaders import SeleniumURLLoader
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 
+import llm_client
+import metrics
+import tracing
+from browser_pool import BrowserPool, BrowserPoolExhausted
+from content_reducer import ContentReducer
+from job_cache import JobDataCache
+from json_repair import TolerantJsonParser
+from llm_router import StructuredOutput
+from models import JobData, strict_json_schema
+from page_fetcher import PageFetcher
+from prompts import SplitPrompt
+from site_adapters import SiteAdapterRegistry, build_default_registry
+import structured_data
+
 load_dotenv()
 
+# The answer shape for structured-output extraction, derived from the API's JobData model. The
+# prompt lists the fields with their descriptions, so the schema sent along leaves them out.
+JOB_DATA_SCHEMA = strict_json_schema(JobData)
+JOB_DATA_RESPONSE_SCHEMA = strict_json_schema(JobData, descriptions=False)
+JOB_DATA_FIELDS = tuple(JOB_DATA_SCHEMA["properties"])
+
+
+@lru_cache(maxsize=64)
+def response_schema(fields: Tuple[str, ...]) -> Dict:
+    """JOB_DATA_RESPONSE_SCHEMA narrowed to `fields`, for asking only for what structured data lacks."""
+    return dict(
+        JOB_DATA_RESPONSE_SCHEMA,
+        properties={field: JOB_DATA_RESPONSE_SCHEMA["properties"][field] for field in fields},
+        required=list(fields),
+    )
+
+
 class JobScraper:
-    def __init__(self):
+    def __init__(
+        self,
+        browser_pool: Optional[BrowserPool] = None,
+        cache: Optional[JobDataCache] = None,
+        site_adapters: Optional[SiteAdapterRegistry] = None
+    ):
         """
-        Initializes the JobScraper with a Groq LLM and an enhanced prompt template.
+        Initializes the JobScraper with a Groq LLM, an enhanced prompt template
+        and a tiered page fetcher backed by a pool of warm headless browsers.
         """
-        # Set a standard user agent to avoid being blocked
-        os.environ["USER_AGENT"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        
-        # Initialize Groq LLM for fast and accurate extraction
-        self.llm = ChatGroq(
-            temperature=0,
-            groq_api_key=os.getenv("GROQ_API_KEY"),
-            model_name="llama-3.1-8b-instant"  # Updated to a currently supported model
-        )
+        # Initialize Groq LLM for fast and accurate extraction on the shared async connection pool
+        self.llm = llm_client.create_chat_model(temperature=0)
         
         # ENHANCEMENT: Switched to a "few-shot" prompt with examples
         # This helps the AI better understand the desired output format for varied inputs.
-        self.extract_prompt = PromptTemplate.from_template(
+        # The instructions and examples come first and never change, so providers can reuse
+        # their cached prefix; only the scraped page, placed last, differs between calls.
+        self.extract_prompt = SplitPrompt(
+            "extract_job",
             """
-            ### SCRAPED DATA FROM WEBSITE:
-            {page_data}
-            
-            The scraped text is from a job posting. Your job is to extract the information and return it in JSON format.
+            The user message contains text scraped from a job posting. Your job is to extract the information and return it in JSON format.
             
             ### EXAMPLE 1:
             **Input:** "Senior Frontend Engineer at Google in Mountain View. Skills: React, TypeScript. 5 years experience required."
@@ -43,7 +68,7 @@ class JobScraper:
             **Input:** "Acme Corp is hiring a Junior Dev. Must know JavaScript. This is a remote role."
             **Output:** {"role": "Junior Dev", "company": "Acme Corp", "location": "Remote", "skills": ["JavaScript"], "experience": ""}
 
-            Based on the SCRAPED DATA FROM WEBSITE provided above, extract the job posting information into the following keys:
+            Based on the SCRAPED DATA FROM WEBSITE in the user message, extract the job posting information into the following keys:
             - 'role': The job title/position
             - 'company': The company name
             - 'description': A brief description of the role (2-3 sentences)
@@ -53,75 +78,191 @@ class JobScraper:
             
             Important: Only return valid JSON without any preamble or additional text.
             If any field is not found, use an empty string or empty array as appropriate.
+            Only include the keys listed under KEYS NEEDED in the user message.
+            """,
+            [
+                ("fields", """
+            ### KEYS NEEDED:
+            {fields}
+            """),
+                ("page", """
+            ### SCRAPED DATA FROM WEBSITE:
+            {page_data}
             
             ### VALID JSON (NO PREAMBLE):
-            """
+            """)
+            ],
+            memoize=["fields"]
         )
         
-        # Initialize JSON parser for the LLM output
-        self.json_parser = JsonOutputParser()
+        # "structured" asks backends that support it for output matching JobData's schema (JSON
+        # schema, tool call or JSON mode), so the examples above can be left out of the prompt.
+        # Backends without support still get the few-shot prompt; "prompt" always uses it.
+        self.extraction_mode = os.getenv("EXTRACTION_MODE", "structured")
+        field_list = "\n".join(
+            f"- '{name}': {spec['description']}" for name, spec in JOB_DATA_SCHEMA["properties"].items()
+        )
+        self.structured_prompt = SplitPrompt(
+            "extract_job_structured",
+            "The user message contains text scraped from a job posting. Extract the posting as a JSON object "
+            f"using the keys listed at the start of the user message, which are among these:\n{field_list}\n"
+            "Use null or an empty array for anything the text does not say.",
+            [("fields", "Keys: {fields}"), ("page", "{page_data}")],
+            memoize=["fields"]
+        )
+        # How the LLM was asked for each extraction: json_schema, tools, json_object or prompt
+        self.llm_mode_counts: Dict[str, int] = {}
+        
+        # Long-lived browsers shared by every extraction (pre-warmed on API startup)
+        self.browser_pool = browser_pool or BrowserPool()
+        self.remove_selectors = ["header", "footer", "nav", "script", "style"]
+        self.page_fetcher = PageFetcher(self.browser_pool, self.remove_selectors)
+        
+        # Per-site fetch strategy, selectors and field mapping, dispatched by hostname
+        self.site_adapters = site_adapters or build_default_registry()
+        
+        # How each extraction was answered: straight from structured data, or with the LLM's help
+        self.extraction_counts = {"structured": 0, "structured+llm": 0, "llm": 0}
+        
+        # Trims page chrome and unrelated listings so the prompt stays within a token budget
+        self.content_reducer = ContentReducer()
+        
+        # Repeat extractions of the same posting are served from cache without a render or LLM call
+        self.cache = cache or JobDataCache()
+        
+        # Tolerant JSON parser for the LLM output: repairs malformed answers instead of failing
+        self.json_parser = TolerantJsonParser("extract_job")
         
         # Create the extraction chain by piping the components together
         self.extraction_chain = self.extract_prompt | self.llm
 
-    def test_connection(self) -> str:
+    async def test_connection(self) -> str:
         """
-        Tests the connection to the Groq LLM service.
+        Tests the connection to the LLM service.
         """
         try:
-            test_response = self.llm.invoke("Hello")
-            return "online" if test_response else "offline"
+            return await llm_client.probe()
         except Exception as e:
             print(f"Scraper test failed: {e}")
             return "offline"
 
     async def extract_job_data(self, url: str) -> Optional[Dict]:
         """
-        Extracts job data from a given URL using a headless browser for dynamic content.
+        Extracts job data from a given URL. Static HTML is tried first and a headless
+        browser is only used when the page needs JavaScript to show the posting.
+        The returned dict carries a `_meta` entry describing how it was served.
         """
-        try:
-            # ENHANCEMENT: Using SeleniumURLLoader to render JavaScript-heavy pages
-            # It also removes common irrelevant sections like headers, footers, and navs.
-            loader = SeleniumURLLoader(
-                urls=[url], 
-                remove_selectors=["header", "footer", "nav", "script", "style"]
-            )
+        site = self.site_adapters.resolve(url).name
+        with tracing.span("job_scraper.extract_job_data", {"url.host": tracing.host(url), "site": site}) as span:
+            cached = await self.cache.get(url)
+            if cached is not None:
+                span.set_attribute("cache", "hit")
+                cached["_meta"] = dict(cached.get("_meta", {}), cache="hit")
+                return cached
             
-            # Run the synchronous loader in a separate thread to avoid blocking asyncio
-            page_data = await asyncio.to_thread(loader.load)
+            # Stage timings and counters below are labelled with the job board being scraped
+            with metrics.site(site):
+                job_data = await self._extract_uncached(url)
+            await self.cache.set(url, job_data)
+            job_data["_meta"]["cache"] = "miss"
+            span.set_attribute("cache", "miss")
+            span.set_attribute("fetch_tier", job_data["_meta"]["fetch_tier"])
+            span.set_attribute("extraction", job_data["_meta"]["extraction"])
+            return job_data
+
+    async def _extract_uncached(self, url: str) -> Dict:
+        """
+        Fetches the page and fills JobData from its embedded JobPosting JSON-LD. The LLM
+        extraction chain only runs when that structured data leaves required fields empty,
+        and its answers are only used for those gaps.
+        """
+        try:
+            # Irrelevant sections like headers, footers, and navs are stripped by the fetcher
+            adapter = self.site_adapters.resolve(url)
+            with metrics.stage("page_fetch"):
+                page = await self.page_fetcher.fetch(url, adapter)
+            meta = {"fetch_tier": page.tier, "site": adapter.name}
             
-            if not page_data:
-                raise Exception("Unable to load webpage content with Selenium")
+            # Precedence: site selectors < board API fields < JobPosting JSON-LD. Reading them
+            # parses the whole rendered page, so that happens in an HTML cleaner worker.
+            parsed = await self.page_fetcher.html_cleaner.parse_page(page.html, adapter.field_selectors)
+            structured = parsed["fields"]
+            structured.update({key: value for key, value in page.structured.items() if value not in (None, "", [])})
+            structured.update(parsed["json_ld"])
+            if structured_data.is_complete(structured):
+                meta["extraction"] = "structured"
+                self.extraction_counts["structured"] += 1
+                with metrics.stage("clean_job_data"):
+                    cleaned_data = self._clean_job_data(structured)
+                cleaned_data["_meta"] = meta
+                return cleaned_data
             
-            # The page content is the first (and only) document's content
-            page_content = page_data[0].page_content
+            page_content = page.text
+            # Structured data left required fields empty, so the LLM has to read the page
+            metrics.fallback("llm_extraction")
             
             # Basic validation to ensure we have enough content to process
             if not page_content or len(page_content.strip()) < 100:
                 raise Exception("Insufficient content found on the webpage after cleaning.")
             
-            # Invoke the LLM extraction chain
-            response = await asyncio.to_thread(
-                self.extraction_chain.invoke,
-                {"page_data": page_content}
-            )
+            # Keep only the job-relevant parts of the page within the token budget
+            with metrics.stage("content_reduction"), tracing.span("content.reduce") as span:
+                reduction = self.content_reducer.reduce(page_content)
+                span.set_attribute("content.tokens_before", reduction.tokens_before)
+                span.set_attribute("content.tokens_after", reduction.tokens_after)
+            print(f"Content reduction for {url}: {reduction.tokens_before} -> {reduction.tokens_after} tokens "
+                  f"(saved {reduction.tokens_saved})")
+            meta["prompt_tokens_saved"] = reduction.tokens_saved
+            
+            # Only the fields structured data left empty are asked for
+            fields = structured_data.missing_fields(structured, JOB_DATA_FIELDS)
+            job_data, meta["llm_mode"] = await self._llm_extract(reduction.text, fields)
             
-            # Parse the JSON response from the LLM
-            job_data = self.json_parser.parse(response.content)
+            # Structured data is authoritative; OpenGraph only fills what the LLM left empty
+            merged = dict(parsed["open_graph"])
+            merged.update({key: value for key, value in job_data.items() if value not in (None, "", [])})
+            merged.update(structured)
+            meta["extraction"] = "structured+llm" if structured else "llm"
+            self.extraction_counts[meta["extraction"]] += 1
             
             # Clean and validate the extracted data
-            cleaned_data = self._clean_job_data(job_data)
+            with metrics.stage("clean_job_data"):
+                cleaned_data = self._clean_job_data(merged)
+            cleaned_data["_meta"] = meta
             
             return cleaned_data
             
+        except BrowserPoolExhausted:
+            # Let the API turn back-pressure into a 503 instead of a generic failure
+            raise
         except Exception as e:
             print(f"Error in extract_job_data for URL {url}: {str(e)}")
             # Re-raise the exception to be handled by the API endpoint
             raise Exception(f"Failed to extract job data: {str(e)}")
 
+    async def _llm_extract(self, page_data: str, fields: Sequence[str] = JOB_DATA_FIELDS) -> Tuple[Dict, str]:
+        """
+        Asks the LLM to extract `fields` of the posting from the reduced page text (natively
+        async, bounded by LLM_MAX_CONCURRENCY). Returns (job data, how the LLM was asked).
+        """
+        fields = tuple(fields)
+        values = {"page_data": page_data, "fields": ", ".join(fields)}
+        if self.extraction_mode == "structured":
+            structured = StructuredOutput(
+                "job_data", response_schema(fields), fallback=lambda: self.extract_prompt.chat_messages(values)
+            )
+            content, mode = await llm_client.acomplete_structured(self.structured_prompt.chat_messages(values), structured)
+        else:
+            response = await llm_client.ainvoke(self.extraction_chain, values)
+            content, mode = response.content, "prompt"
+        self.llm_mode_counts[mode] = self.llm_mode_counts.get(mode, 0) + 1
+        
+        # Parse the JSON response from the LLM, repairing it (or re-asking for just the broken JSON) if needed
+        return await self.json_parser.parse(content), mode
+
     def _clean_job_data(self, raw_data: Dict) -> Dict:
         """
-        Cleans and validates the JSON data returned by the LLM.
+        Cleans and validates the job data returned by the LLM or structured-data extractor.
         """
         cleaned = {
             "role": str(raw_data.get("role", "")).strip(),
@@ -129,9 +270,21 @@ class JobScraper:
             "description": str(raw_data.get("description", "")).strip(),
             "skills": [],
             "experience": str(raw_data.get("experience", "")).strip(),
-            "location": str(raw_data.get("location", "")).strip()
+            "location": str(raw_data.get("location", "")).strip(),
+            "salary": str(raw_data.get("salary") or "").strip() or None,
+            "remote": None,
+            "jobType": str(raw_data.get("jobType") or "").strip().lower() or None
         }
         
+        # Remote may arrive as a bool or as text such as "yes" / "Remote"
+        remote_raw = raw_data.get("remote")
+        if isinstance(remote_raw, bool):
+            cleaned["remote"] = remote_raw
+        elif isinstance(remote_raw, str) and remote_raw.strip():
+            cleaned["remote"] = remote_raw.strip().lower() in ("true", "yes", "remote")
+        elif cleaned["location"].lower() == "remote":
+            cleaned["remote"] = True
+        
         # Handle skills which might be a list or a string
         skills_raw = raw_data.get("skills", [])
         if isinstance(skills_raw, list):
@@ -0,0 +1,439 @@
+import os
+import re
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+import llm_client
+import metrics
+import tracing
+from prompts import SplitPrompt
+
+load_dotenv()
+
+_NUMBER = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?$")
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+_VALID_ESCAPES = set('"\\/bfnrtu')
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JsonRepairError(ValueError):
+    def __init__(self, message: str, fragment: str):
+        """Raised when text cannot be repaired into JSON; `fragment` is the JSON-looking part of it."""
+        super().__init__(message)
+        self.fragment = fragment
+
+
+class IncrementalJsonParser:
+    def __init__(self):
+        """
+        Single-pass, chunk-at-a-time JSON scanner that rewrites what it reads into valid JSON,
+        repairing the ways LLMs usually break it: a preamble or code fence before the value and
+        text after it, trailing or missing commas, single quotes, Python literals, unquoted keys
+        and words, comments, raw newlines and bad escapes inside strings, and output truncated
+        mid-value. Feed it chunks as they stream in; `value()` returns the parsed result so far.
+        """
+        self.repairs: List[str] = []
+        self.raw: List[str] = []
+        self._out: List[str] = []
+        # One entry per open container: [opener, what comes next ("key", "colon", "value" or "comma")]
+        self._stack: List[list] = []
+        self._started = self._done = False
+        self._quote: Optional[str] = None
+        self._escape = False
+        # Whitespace seen after a quote that may close the current string or be part of it
+        self._pending_quote: Optional[List[str]] = None
+        self._bare: List[str] = []
+        self._comment: Optional[str] = None
+        self._comma_at: Optional[int] = None
+        self._string_at: Optional[int] = None
+
+    def feed(self, chunk: str) -> None:
+        for char in chunk:
+            if self._started and not self._done:
+                self.raw.append(char)
+            self._read(char)
+
+    def value(self) -> Any:
+        """
+        Parses everything fed so far, closing whatever is still open. Raises JsonRepairError
+        if no JSON value was found or the text is beyond repair. Does not consume the input,
+        so it can be called again after feeding more.
+        """
+        fragment = "".join(self.raw)
+        if not self._started:
+            raise JsonRepairError("No JSON object or array found", fragment)
+        out = list(self._out)
+        repairs = list(self.repairs)
+        if not self._done:
+            repairs.append("truncated")
+            stack = [list(level) for level in self._stack]
+            if self._quote is not None:
+                if self._escape:
+                    out.pop()
+                out.append('"')
+                self._after_value_in(stack, key=stack[-1][1] == "key")
+            elif self._bare:
+                self._flush_bare_into("".join(self._bare), out, stack, repairs)
+            for opener, expect in reversed(stack):
+                while out and out[-1].isspace():
+                    out.pop()
+                if expect == "colon":
+                    out.append(": null")
+                elif expect == "value" and opener == "{":
+                    out.append("null")
+                elif expect in ("key", "value") and out and out[-1] == ",":
+                    out.pop()
+                out.append(_CLOSERS[opener])
+        try:
+            parsed = json.loads("".join(out))
+        except ValueError as e:
+            raise JsonRepairError(f"Unrepairable JSON: {e}", fragment) from e
+        self.repairs = sorted(set(repairs))
+        return parsed
+
+    def _read(self, char: str) -> None:
+        if self._done:
+            if not char.isspace() and "trailing_text" not in self.repairs:
+                self.repairs.append("trailing_text")
+            return
+        if not self._started:
+            if char in "{[":
+                self._started = True
+                self.raw.append(char)
+                self._open(char)
+            elif not char.isspace() and "preamble" not in self.repairs:
+                self.repairs.append("preamble")
+            return
+        if self._pending_quote is not None and self._resolve_quote(char):
+            return
+        if self._quote is not None:
+            self._read_string(char)
+        elif self._comment is not None:
+            self._read_comment(char)
+        else:
+            self._read_structure(char)
+
+    def _read_string(self, char: str) -> None:
+        out = self._out
+        if self._escape:
+            self._escape = False
+            if char == "'" or char not in _VALID_ESCAPES:
+                out.pop()
+                out.append("'" if char == "'" else "\\\\" + char)
+                self._note("invalid_escape")
+            else:
+                out.append(char)
+        elif char == "\\":
+            out.append(char)
+            self._escape = True
+        elif char == self._quote:
+            # Whether this quote ends the string depends on what follows it
+            self._pending_quote = []
+        elif char == '"':
+            out.append('\\"')
+        elif char < " ":
+            out.append({"\n": "\\n", "\r": "\\r", "\t": "\\t"}.get(char, f"\\u{ord(char):04x}"))
+            self._note("control_character")
+        else:
+            out.append(char)
+
+    def _resolve_quote(self, char: str) -> bool:
+        """
+        Decides whether the pending quote closed its string, from the next non-space
+        character: only what may follow a key or value does. An unescaped quote inside
+        a value ("He said "hi"") stays in the string. Returns True if `char` was consumed.
+        """
+        buffered = self._pending_quote
+        if char.isspace():
+            buffered.append(char)
+            return True
+        self._pending_quote = None
+        level = self._stack[-1]
+        # In an array a colon means the string was really the next key (see _close_array_before_key)
+        followers = ":" if level[1] == "key" else ",}]/:" if level[0] == "[" else ",}]/"
+        # Another string after whitespace is a missing comma or colon, not an inner quote
+        if char in followers or (char in "\"'" and buffered):
+            self._out.append('"')
+            self._quote = None
+            self._after_value_in(self._stack, key=level[1] == "key")
+            for space in buffered:
+                self._read_structure(space)
+            return False
+        self._out.append('\\"' if self._quote == '"' else "'")
+        self._note("unescaped_quote")
+        for space in buffered:
+            self._read_string(space)
+        return False
+
+    def _read_comment(self, char: str) -> None:
+        if self._comment == "slash":
+            self._comment = {"/": "line", "*": "block"}.get(char)
+            if self._comment is None:
+                # A lone slash is part of a bare word
+                self._bare.append("/")
+                self._read_structure(char)
+            else:
+                self._note("comments")
+        elif self._comment == "line" and char == "\n":
+            self._comment = None
+        elif self._comment == "block":
+            self._comment = "block_star" if char == "*" else "block"
+        elif self._comment == "block_star":
+            self._comment = None if char == "/" else "block_star" if char == "*" else "block"
+
+    def _read_structure(self, char: str) -> None:
+        if char.isalnum() or char in "-+._":
+            self._bare.append(char)
+            return
+        if self._bare:
+            word, self._bare = "".join(self._bare), []
+            self._flush_bare_into(word, self._out, self._stack, self.repairs)
+        level = self._stack[-1]
+        if char.isspace():
+            self._out.append(char)
+        elif char in "\"'":
+            self._before_value(level, key_allowed=True)
+            if char == "'":
+                self._note("single_quotes")
+            self._string_at = len(self._out)
+            self._out.append('"')
+            self._quote = char
+        elif char in "{[":
+            self._before_value(level, key_allowed=False)
+            self._open(char)
+        elif char in "}]":
+            self._close(char)
+        elif char == ",":
+            if level[1] == "comma":
+                level[1] = "key" if level[0] == "{" else "value"
+                self._comma_at = len(self._out)
+                self._out.append(",")
+            else:
+                self._note("extra_comma")
+        elif char == ":":
+            if level[1] == "colon":
+                level[1] = "value"
+                self._out.append(":")
+            elif level[0] == "[" and level[1] == "comma" and len(self._stack) > 1 and self._stack[-2][0] == "{":
+                self._close_array_before_key()
+        elif char == "/":
+            self._comment = "slash"
+        # Anything else outside a string (stray backticks, semicolons) is dropped
+
+    def _flush_bare_into(self, word: str, out: List[str], stack: List[list], repairs: List[str]) -> None:
+        level = stack[-1]
+        key = level[1] == "key"
+        if level[1] == "comma":
+            self._insert_comma(out, level, repairs)
+            key = level[0] == "{"
+        elif level[1] == "colon":
+            out.append(":")
+            level[1] = "value"
+            repairs.append("missing_colon")
+        if not key and word in _LITERALS:
+            if _LITERALS[word] != word:
+                repairs.append("python_literals")
+            out.append(_LITERALS[word])
+        elif not key and _NUMBER.match(word):
+            out.append(word)
+        else:
+            repairs.append("unquoted_key" if key else "unquoted_string")
+            out.append(json.dumps(word))
+        self._after_value_in(stack, key=key)
+
+    def _before_value(self, level: list, key_allowed: bool) -> None:
+        if level[1] == "comma":
+            self._insert_comma(self._out, level, self.repairs)
+        elif level[1] == "colon":
+            self._out.append(":")
+            level[1] = "value"
+            self._note("missing_colon")
+        if level[1] == "key" and not key_allowed:
+            # A value where a key belongs; give it a placeholder key rather than lose it
+            self._out.append(f'"_{len(self._out)}":')
+            level[1] = "value"
+            self._note("missing_key")
+
+    def _insert_comma(self, out: List[str], level: list, repairs: List[str]) -> None:
+        out.append(",")
+        level[1] = "key" if level[0] == "{" else "value"
+        repairs.append("missing_comma")
+
+    def _after_value_in(self, stack: List[list], key: bool) -> None:
+        stack[-1][1] = "colon" if key else "comma"
+
+    def _open(self, opener: str) -> None:
+        if self._stack:
+            # The new container is the parent's value, even if it never gets closed
+            self._after_value_in(self._stack, key=False)
+        self._out.append(opener)
+        self._stack.append([opener, "key" if opener == "{" else "value"])
+
+    def _close(self, closer: str) -> None:
+        openers = [level[0] for level in self._stack]
+        wanted = "{" if closer == "}" else "["
+        if wanted not in openers:
+            self._note("unbalanced")
+            return
+        while True:
+            opener, expect = self._stack.pop()
+            if expect == "colon":
+                self._out.append(": null")
+                self._note("missing_value")
+            elif expect == "value" and opener == "{":
+                self._out.append("null")
+                self._note("missing_value")
+            elif expect in ("key", "value") and self._comma_at is not None and self._trailing_comma():
+                del self._out[self._comma_at]
+                self._note("trailing_comma")
+            self._out.append(_CLOSERS[opener])
+            self._comma_at = None
+            if opener == wanted:
+                break
+            self._note("unbalanced")
+            self._after_value_in(self._stack, key=False)
+        if self._stack:
+            self._after_value_in(self._stack, key=False)
+        else:
+            self._done = True
+
+    def _close_array_before_key(self) -> None:
+        """`{"a": [1, 2, "b": 3}`: the array was never closed, and its last string is the next key."""
+        if self._string_at is None or self._string_at < (self._comma_at or 0):
+            return
+        key = self._out[self._string_at:]
+        del self._out[self._string_at:]
+        while self._out and self._out[-1].isspace():
+            self._out.pop()
+        if self._out and self._out[-1] == ",":
+            self._out.pop()
+        self._stack.pop()
+        self._out.extend(["]", ","] + key + [":"])
+        self._stack[-1][1] = "value"
+        self._comma_at = None
+        self._note("unbalanced")
+
+    def _trailing_comma(self) -> bool:
+        return self._comma_at < len(self._out) and all(part.isspace() for part in self._out[self._comma_at + 1:])
+
+    def _note(self, repair: str) -> None:
+        self.repairs.append(repair)
+
+
+def parse(text: str) -> Tuple[Any, List[str]]:
+    """
+    Parses `text` as JSON, repairing it if needed. Returns (value, repairs applied); the
+    list is empty when the text was valid JSON to begin with.
+    """
+    stripped = text.strip()
+    if stripped[:1] in ("{", "[", '"'):
+        try:
+            value = json.loads(stripped)
+            if not isinstance(value, str):
+                return value, []
+            # The whole answer was JSON-encoded a second time
+            value, repairs = parse(value)
+            return value, sorted(set(repairs + ["double_encoded"]))
+        except ValueError:
+            pass
+    parser = IncrementalJsonParser()
+    parser.feed(text)
+    return parser.value(), parser.repairs
+
+
+class TolerantJsonParser:
+    def __init__(self, stage: str, max_reasks: Optional[int] = None, max_fragment_chars: Optional[int] = None):
+        """
+        Parses an LLM's JSON answer into a dict without failing on the usual malformations.
+        Valid JSON is taken as is, broken JSON is repaired locally and, only when that fails,
+        the broken fragment alone (never the original prompt) is sent back to the LLM to be
+        fixed, up to JSON_REPAIR_MAX_REASKS times. Outcomes are counted per `stage`.
+        """
+        self.stage = stage
+        self.max_reasks = max_reasks if max_reasks is not None else int(os.getenv("JSON_REPAIR_MAX_REASKS", "1"))
+        self.max_fragment_chars = max_fragment_chars or int(os.getenv("JSON_REPAIR_MAX_FRAGMENT_CHARS", "4000"))
+        self._repair_chain = None
+        self._outcomes = {"clean": 0, "repaired": 0, "reasked": 0, "failed": 0}
+        self._repairs: Dict[str, int] = {}
+
+    async def parse(self, text: str, parser: Optional[IncrementalJsonParser] = None) -> Dict:
+        """
+        Returns the JSON object in `text`. Pass the IncrementalJsonParser that `text` was
+        streamed into to reuse its work. Raises JsonRepairError if nothing worked.
+        """
+        return (await self.parse_with_outcome(text, parser))[0]
+
+    async def parse_with_outcome(self, text: str, parser: Optional[IncrementalJsonParser] = None) -> Tuple[Dict, str]:
+        """`parse`, also saying how the object was obtained: clean, repaired or reasked."""
+        with metrics.stage("json_parse"), tracing.span("llm.parse_json", {"response.length": len(text)}) as span:
+            try:
+                if parser is not None:
+                    value, repairs = parser.value(), parser.repairs
+                else:
+                    value, repairs = parse(text)
+                result = self._as_object(value, text)
+                outcome = "repaired" if repairs else "clean"
+                self._record(outcome, repairs)
+                span.set_attribute("json.outcome", outcome)
+                return result, outcome
+            except JsonRepairError as e:
+                error = e
+
+            for _ in range(self.max_reasks):
+                try:
+                    fixed = await self._reask(error.fragment or text.strip())
+                    value, repairs = parse(fixed)
+                    result = self._as_object(value, fixed)
+                    self._record("reasked", repairs)
+                    span.set_attribute("json.outcome", "reasked")
+                    return result, "reasked"
+                except JsonRepairError as e:
+                    error = e
+            self._record("failed", [])
+            metrics.parse_failure(self.stage)
+            span.set_attribute("json.outcome", "failed")
+            raise error
+
+    def stats(self) -> Dict:
+        parsed = sum(self._outcomes.values())
+        return {
+            "outcomes": dict(self._outcomes),
+            "repairs": dict(self._repairs),
+            "repair_rate": round((self._outcomes["repaired"] + self._outcomes["reasked"]) / parsed, 3) if parsed else None,
+            "failure_rate": round(self._outcomes["failed"] / parsed, 3) if parsed else None,
+        }
+
+    def _as_object(self, value: Any, text: str) -> Dict:
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            # Some models wrap the single requested object in an array
+            return value[0]
+        if not isinstance(value, dict):
+            raise JsonRepairError("Expected a JSON object", text.strip()[: self.max_fragment_chars])
+        return value
+
+    async def _reask(self, fragment: str) -> str:
+        if self._repair_chain is None:
+            self._repair_chain = REPAIR_PROMPT | llm_client.create_chat_model(temperature=0)
+        fragment = fragment[: self.max_fragment_chars]
+        response = await llm_client.ainvoke(self._repair_chain, {"fragment": fragment})
+        return response.content
+
+    def _record(self, outcome: str, repairs: List[str]) -> None:
+        self._outcomes[outcome] += 1
+        metrics.JSON_PARSES.labels(self.stage, outcome).inc()
+        for repair in repairs:
+            self._repairs[repair] = self._repairs.get(repair, 0) + 1
+
+
+REPAIR_PROMPT = SplitPrompt(
+    "repair_json",
+    """
+    The user message contains malformed or truncated JSON produced by another model.
+    Return the same data as one valid JSON object: fix the syntax, close anything left
+    open, and do not add, remove or reword any values.
+    Only return valid JSON without any preamble.
+    """,
+    [("fragment", "{fragment}")]
+)
@@ -0,0 +1,148 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+import metrics
+import tracing
+from llm_router import LLMRouter, StructuredOutput, backends_from_env
+
+load_dotenv()
+
+_async_http_client: Optional[httpx.AsyncClient] = None
+_router: Optional[LLMRouter] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_in_flight = 0
+_waiting = 0
+
+
+def shared_async_http_client() -> httpx.AsyncClient:
+    """
+    One keep-alive connection pool for every LLM call in the process, so concurrent
+    requests reuse TLS connections instead of each opening their own.
+    """
+    global _async_http_client
+    if _async_http_client is None or _async_http_client.is_closed:
+        max_connections = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+        _async_http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(float(os.getenv("LLM_REQUEST_TIMEOUT", "60")), connect=10.0),
+        )
+    return _async_http_client
+
+
+def get_router() -> LLMRouter:
+    """The process-wide LLM router, built from the LLM_BACKENDS configuration on first use."""
+    global _router
+    if _router is None:
+        _router = LLMRouter(backends_from_env(), shared_async_http_client)
+    return _router
+
+
+def create_chat_model(temperature: float):
+    """Builds a chat model backed by the shared router and its async connection pool."""
+    # Imported here so that importing llm_client (as main does) does not load LangChain
+    from chat_model import RoutedChatModel
+    return RoutedChatModel(router=get_router(), temperature=temperature)
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # Created on first use so it binds to the server's event loop
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "64")))
+    return _semaphore
+
+
+@asynccontextmanager
+async def _concurrency_slot():
+    global _in_flight, _waiting
+    _waiting += 1
+    try:
+        await _get_semaphore().acquire()
+    finally:
+        _waiting -= 1
+    _in_flight += 1
+    try:
+        yield
+    finally:
+        _in_flight -= 1
+        _get_semaphore().release()
+
+
+async def ainvoke(runnable, inputs: Any):
+    """
+    Runs `runnable.ainvoke` natively on the event loop, bounded by LLM_MAX_CONCURRENCY
+    rather than by the size of the default thread pool.
+    """
+    async with _concurrency_slot():
+        with metrics.stage("llm_call"), tracing.span("llm.invoke", {"llm.queue_depth": _waiting}):
+            return await runnable.ainvoke(inputs)
+
+
+async def astream(runnable, inputs: Any) -> AsyncIterator[Any]:
+    """
+    Streams chunks from `runnable.astream`, holding a concurrency slot for the whole stream.
+    """
+    async with _concurrency_slot():
+        with metrics.stage("llm_call"):
+            async for chunk in runnable.astream(inputs):
+                yield chunk
+
+
+async def acomplete_structured(messages: List[Dict], structured: StructuredOutput, temperature: float = 0.0) -> Tuple[str, str]:
+    """
+    Sends chat `messages` through the router asking for output shaped by `structured`,
+    bounded like `ainvoke`. Returns (content, how the answering backend was asked: one
+    of "json_schema", "tools", "json_object" or "prompt").
+    """
+    async with _concurrency_slot():
+        with metrics.stage("llm_call"), tracing.span("llm.invoke", {"llm.queue_depth": _waiting}):
+            content, backend = await get_router().complete(messages, temperature, structured)
+    return content, structured.modes[backend]
+
+
+async def probe() -> str:
+    """"online" if at least one LLM backend is reachable, else "offline"."""
+    reachable = await get_router().probe()
+    return "online" if any(reachable.values()) else "offline"
+
+
+def rate_limit_retry_after(error: BaseException) -> Optional[float]:
+    """
+    If `error` (or anything it was raised from) is an HTTP 429 from the provider, returns
+    the suggested wait in seconds (0 when the provider gave none); otherwise None.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if getattr(error, "status_code", None) == 429:
+            if getattr(error, "retry_after", None) is not None:
+                return float(error.retry_after)
+            response = getattr(error, "response", None)
+            headers = getattr(response, "headers", None) or {}
+            try:
+                return float(headers.get("retry-after", 0))
+            except (TypeError, ValueError):
+                return 0.0
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def stats() -> Dict:
+    return {
+        "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "64")),
+        "in_flight": _in_flight,
+        "waiting": _waiting,
+        "router": get_router().stats(),
+    }
+
+
+async def close() -> None:
+    global _async_http_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
@@ -0,0 +1,738 @@
+import os
+import json
+import time
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+import metrics
+import tracing
+from content_reducer import estimate_tokens
+from rate_limiter import RateLimiter
+
+load_dotenv()
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+# Ways a backend can be asked for schema-shaped output, strictest first; "none" means prompt only
+STRUCTURED_OUTPUT_MODES = ("json_schema", "tools", "json_object", "none")
+# Provider error codes for a model that broke the requested format on this call only
+FORMAT_FAILURE_CODES = ("json_validate_failed", "tool_use_failed")
+
+
+class LLMBackendError(Exception):
+    def __init__(self, backend: str, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        """
+        A failed call to one backend. `status_code` and `retry_after` follow the provider
+        SDK errors, so `llm_client.rate_limit_retry_after` recognises rate limits.
+        """
+        super().__init__(f"{backend}: {message}")
+        self.backend = backend
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class StructuredOutput:
+    def __init__(self, name: str, schema: Dict, fallback: Optional[Callable[[], List[Dict]]] = None):
+        """
+        Asks for an answer matching the JSON `schema` in the strictest way the chosen
+        backend supports: a strict JSON schema response format, a forced tool call, or
+        JSON mode (where the prompt has to name the fields). A backend that supports none
+        of them, or rejects the request, is sent the messages built by `fallback` instead,
+        a prompt that describes the format itself. `modes` records, per backend called,
+        how it was asked ("prompt" for the fallback).
+        """
+        self.name = name
+        self.schema = schema
+        self.fallback = fallback
+        self.modes: Dict[str, str] = {}
+
+    def request_fields(self, mode: str) -> Dict:
+        if mode == "json_schema":
+            return {"response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": self.name, "schema": self.schema, "strict": True},
+            }}
+        if mode == "tools":
+            return {
+                "tools": [{"type": "function", "function": {"name": self.name, "parameters": self.schema}}],
+                "tool_choice": {"type": "function", "function": {"name": self.name}},
+            }
+        if mode == "json_object":
+            return {"response_format": {"type": "json_object"}}
+        return {}
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Stops routing to a backend after `failure_threshold` consecutive failures. After
+        `reset_timeout` seconds a single probe request is let through; its outcome either
+        closes the breaker again or re-opens it.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_until = 0.0
+        self.rate_limited = False
+        self._probing = False
+
+    def available(self) -> bool:
+        if self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_OPEN:
+            return time.monotonic() >= self.opened_until
+        return not self._probing
+
+    def admit(self) -> bool:
+        """
+        Whether a request may go ahead. Called before the request queues for the rate
+        limiter, so the half-open transition admits exactly one probe however many callers
+        saw the breaker available.
+        """
+        if self.state == BREAKER_OPEN and time.monotonic() >= self.opened_until:
+            self.state = BREAKER_HALF_OPEN
+        if self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def on_success(self) -> None:
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.rate_limited = False
+        self._probing = False
+
+    def on_cancelled(self) -> None:
+        # The request was abandoned, so it says nothing about the backend's health
+        self._probing = False
+
+    def on_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probing = False
+        if self.state == BREAKER_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.trip(self.reset_timeout)
+
+    def trip(self, seconds: float, rate_limited: bool = False) -> None:
+        self.state = BREAKER_OPEN
+        self.opened_until = time.monotonic() + seconds
+        self.rate_limited = rate_limited
+        self._probing = False
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_until - time.monotonic()) if self.state == BREAKER_OPEN else 0.0
+
+
+class LLMBackend:
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        model: str,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 32,
+        window_size: int = 100,
+        window_seconds: float = 120.0,
+        breaker: Optional[CircuitBreaker] = None,
+        limiter: Optional[RateLimiter] = None,
+        structured_output: str = "none",
+    ):
+        """
+        One OpenAI-compatible chat completions endpoint (Groq, a local server, ...). Keeps a
+        rolling window (the last `window_size` calls within `window_seconds`) of latencies
+        and outcomes that the router ranks backends by. Old samples age out, so a backend
+        that was slow or failing a while ago is tried again. Every call is admitted by the
+        backend's rate limiter, which paces requests and tokens per minute and adapts the
+        concurrency limit (at most `max_concurrency`).
+
+        `structured_output` is how the backend can be asked for schema-shaped answers (one
+        of STRUCTURED_OUTPUT_MODES). A backend that rejects the request is switched to
+        "none" for the rest of the process.
+        """
+        if structured_output not in STRUCTURED_OUTPUT_MODES:
+            raise ValueError(f"{name}: structured_output must be one of {', '.join(STRUCTURED_OUTPUT_MODES)}")
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self.limiter = limiter or RateLimiter(max_concurrency, name=name)
+        # Completion tokens are unknown up front, so each call reserves a typical amount
+        self.completion_tokens = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "500"))
+        self.window_seconds = window_seconds
+        # (timestamp, latency) for successes and (timestamp, ok) for every call
+        self.latencies: deque = deque(maxlen=window_size)
+        self.outcomes: deque = deque(maxlen=window_size)
+        self.in_flight = 0
+        self.requests = 0
+        self.structured_output = structured_output
+        self.structured_fallbacks = 0
+
+    def headers(self) -> Dict[str, str]:
+        # The request id and trace context let provider-side logs be matched to our traces
+        headers = tracing.outgoing_headers()
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def payload(self, messages: List[Dict], temperature: float, stream: bool = False, extra: Optional[Dict] = None) -> Dict:
+        body = {"model": self.model, "messages": messages, "temperature": temperature}
+        if extra:
+            body.update(extra)
+        if stream:
+            body["stream"] = True
+        return body
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        latencies = [latency for _, latency in self._recent(self.latencies)]
+        if not latencies:
+            return None
+        latencies.sort()
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+    def error_rate(self) -> float:
+        outcomes = [ok for _, ok in self._recent(self.outcomes)]
+        return (outcomes.count(False) / len(outcomes)) if outcomes else 0.0
+
+    def saturated(self) -> bool:
+        return self.limiter.saturated()
+
+    def estimate_tokens(self, messages: List[Dict]) -> int:
+        prompt = sum(estimate_tokens(str(message.get("content", ""))) + 4 for message in messages)
+        return prompt + self.completion_tokens
+
+    async def complete(
+        self,
+        client: httpx.AsyncClient,
+        messages: List[Dict],
+        temperature: float,
+        structured: Optional[StructuredOutput] = None
+    ) -> str:
+        with tracing.span("llm.backend.complete", {"llm.backend": self.name, "llm.model": self.model}) as span:
+            self._admit()
+            mode = self.structured_output if structured is not None else "none"
+            try:
+                content, prompt_tokens, completion_tokens = await self._complete(
+                    client, *self._structured_request(messages, structured, mode), temperature
+                )
+            except LLMBackendError as e:
+                if mode == "none" or not self._rejects_request(e):
+                    raise
+                # Unsupported response format or tool: stop asking for it. A model that broke
+                # the format on this call only keeps its mode for the next one.
+                if not any(code in str(e) for code in FORMAT_FAILURE_CODES):
+                    print(f"LLM backend {self.name} rejected {mode} output, using prompt mode from now on: {e}")
+                    self.structured_output = "none"
+                self.structured_fallbacks += 1
+                mode = "none"
+                content, prompt_tokens, completion_tokens = await self._complete(
+                    client, *self._structured_request(messages, structured, mode), temperature
+                )
+            if structured is not None:
+                structured.modes[self.name] = "prompt" if mode == "none" else mode
+                span.set_attribute("llm.structured_output", structured.modes[self.name])
+            span.set_attribute("llm.prompt_tokens", prompt_tokens)
+            span.set_attribute("llm.completion_tokens", completion_tokens)
+            return content
+
+    def _structured_request(
+        self, messages: List[Dict], structured: Optional[StructuredOutput], mode: str
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """(messages, extra request fields) for asking in `mode`."""
+        if structured is None:
+            return messages, None
+        if mode == "none":
+            return (structured.fallback() if structured.fallback else messages), None
+        return messages, structured.request_fields(mode)
+
+    async def _complete(
+        self, client: httpx.AsyncClient, messages: List[Dict], extra: Optional[Dict], temperature: float
+    ) -> Tuple[str, int, int]:
+        estimated = self.estimate_tokens(messages)
+        if extra:
+            # Providers count the schema or tool definition as prompt tokens
+            estimated += estimate_tokens(json.dumps(extra))
+        # Time spent here is the provider's rate limit (or our concurrency limit) queueing us
+        with tracing.span("llm.rate_limiter.wait", {"llm.estimated_tokens": estimated}):
+            await self._queue(estimated)
+        self._begin()
+        started = time.monotonic()
+        response, used_tokens, error = None, None, None
+        try:
+            response = await client.post(
+                f"{self.base_url}/chat/completions",
+                json=self.payload(messages, temperature, extra=extra),
+                headers=self.headers(),
+            )
+            self._raise_for_status(response)
+            body = response.json()
+            usage = body.get("usage") or {}
+            used_tokens = usage.get("total_tokens")
+            message = body["choices"][0]["message"]
+            content = message.get("content") or ""
+            if message.get("tool_calls"):
+                # A forced tool call carries the answer as the call's JSON arguments
+                content = message["tool_calls"][0]["function"].get("arguments") or content
+            prompt_tokens = usage.get("prompt_tokens", estimated - self.completion_tokens)
+            completion_tokens = usage.get("completion_tokens", estimate_tokens(content))
+            # OpenAI-compatible servers with prompt caching report how much of the prefix they reused
+            cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+            metrics.record_llm_tokens(prompt_tokens, completion_tokens, cached_tokens)
+        except asyncio.CancelledError:
+            # Lost a hedge race or the caller went away; not the backend's fault
+            self.breaker.on_cancelled()
+            raise
+        except Exception as e:
+            error = e
+            # A backend refusing the requested output format is retried in prompt mode by
+            # `complete`; that says nothing about its health, and the probe slot carries over
+            if not (extra and self._rejects_request(e)):
+                self._record_failure(e)
+            raise self._as_backend_error(e) from e
+        finally:
+            self._release(estimated, started, response, used_tokens, error)
+        self._record_success(time.monotonic() - started)
+        return content, prompt_tokens, completion_tokens
+
+    async def stream(self, client: httpx.AsyncClient, messages: List[Dict], temperature: float) -> AsyncIterator[str]:
+        self._admit()
+        estimated = self.estimate_tokens(messages)
+        waited = await self._queue(estimated)
+        span = tracing.start_span("llm.backend.stream", {
+            "llm.backend": self.name,
+            "llm.model": self.model,
+            "llm.queue_wait_ms": round(waited * 1000),
+        })
+        self._begin()
+        started = time.monotonic()
+        response, error = None, None
+        completion = []
+        try:
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                json=self.payload(messages, temperature, stream=True),
+                headers=self.headers(),
+            ) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                self._raise_for_status(response)
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        completion.append(delta)
+                        yield delta
+        except (asyncio.CancelledError, GeneratorExit):
+            self.breaker.on_cancelled()
+            raise
+        except Exception as e:
+            error = e
+            self._record_failure(e)
+            span.record_exception(e)
+            raise self._as_backend_error(e) from e
+        finally:
+            self._release(estimated, started, response, None, error)
+            span.set_attribute("llm.completion_chars", sum(len(delta) for delta in completion))
+            span.end()
+        # Streamed responses carry no usage block, so both counts are estimates
+        metrics.record_llm_tokens(estimated - self.completion_tokens, estimate_tokens("".join(completion)))
+        self._record_success(time.monotonic() - started)
+
+    async def probe(self, client: httpx.AsyncClient) -> bool:
+        """Checks reachability and credentials via the model listing, which spends no tokens."""
+        response = await client.get(f"{self.base_url}/models", headers=self.headers(), timeout=5.0)
+        return response.status_code == 200
+
+    def complete_sync(self, messages: List[Dict], temperature: float, timeout: float = 30.0) -> str:
+        """Blocking variant for synchronous callers such as health checks; not routed or recorded."""
+        response = httpx.post(
+            f"{self.base_url}/chat/completions",
+            json=self.payload(messages, temperature),
+            headers=self.headers(),
+            timeout=timeout,
+        )
+        self._raise_for_status(response)
+        return response.json()["choices"][0]["message"].get("content") or ""
+
+    def stats(self) -> Dict:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "name": self.name,
+            "model": self.model,
+            "base_url": self.base_url,
+            "breaker": self.breaker.state,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "requests": self.requests,
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+            "error_rate": round(self.error_rate(), 3),
+            "structured_output": self.structured_output,
+            "structured_fallbacks": self.structured_fallbacks,
+            "rate_limiter": self.limiter.stats(),
+        }
+
+    def _admit(self) -> None:
+        """Raises when the breaker turns the request away, e.g. while a half-open probe is in flight."""
+        if not self.breaker.admit():
+            retry_in = self.breaker.retry_in()
+            raise LLMBackendError(
+                self.name,
+                f"Circuit breaker is {self.breaker.state}, retry in {retry_in:.1f}s",
+                429 if self.breaker.rate_limited else 503,
+                retry_in,
+            )
+
+    async def _queue(self, estimated: int) -> float:
+        try:
+            return await self.limiter.acquire(estimated)
+        except BaseException:
+            # Never sent, so it says nothing about the backend; let another probe through
+            self.breaker.on_cancelled()
+            raise
+
+    @staticmethod
+    def _rejects_request(error: Exception) -> bool:
+        """Whether `error` is the backend turning the request itself down (a 400)."""
+        return isinstance(error, LLMBackendError) and error.status_code == 400
+
+    def _begin(self) -> None:
+        self.in_flight += 1
+        self.requests += 1
+
+    def _release(
+        self,
+        estimated: int,
+        started: float,
+        response: Optional[httpx.Response],
+        used_tokens: Optional[int],
+        error: Optional[Exception],
+    ) -> None:
+        self.in_flight -= 1
+        self.limiter.release(
+            estimated,
+            headers=response.headers if response is not None else None,
+            status_code=response.status_code if response is not None else None,
+            latency=time.monotonic() - started,
+            used_tokens=used_tokens,
+            retry_after=getattr(error, "retry_after", None),
+        )
+
+    def _recent(self, samples: deque) -> List[Tuple[float, float]]:
+        cutoff = time.monotonic() - self.window_seconds
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return list(samples)
+
+    def _record_success(self, elapsed: float) -> None:
+        now = time.monotonic()
+        self.latencies.append((now, elapsed))
+        self.outcomes.append((now, True))
+        self.breaker.on_success()
+
+    def _record_failure(self, error: Exception) -> None:
+        self.outcomes.append((time.monotonic(), False))
+        if isinstance(error, LLMBackendError) and error.status_code == 429:
+            # Rate limited: stay away for as long as the provider asks, then probe again
+            self.breaker.trip(error.retry_after or self.breaker.reset_timeout, rate_limited=True)
+        else:
+            self.breaker.on_failure()
+
+    def _raise_for_status(self, response: httpx.Response) -> None:
+        if response.status_code < 400:
+            return
+        retry_after = None
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.headers.get("retry-after", 0)) or None
+            except ValueError:
+                retry_after = None
+        raise LLMBackendError(
+            self.name, f"HTTP {response.status_code}: {response.text[:200]}", response.status_code, retry_after
+        )
+
+    def _as_backend_error(self, error: Exception) -> LLMBackendError:
+        if isinstance(error, LLMBackendError):
+            return error
+        return LLMBackendError(self.name, f"{type(error).__name__}: {str(error)}")
+
+
+class LLMRouter:
+    def __init__(
+        self,
+        backends: List[LLMBackend],
+        client_factory: Callable[[], httpx.AsyncClient],
+        hedge_delay: Optional[float] = None,
+        prior_latency: float = 1.0,
+        max_rate_limit_wait: Optional[float] = None,
+    ):
+        """
+        Sends each chat completion to the backend with the best recent latency and error
+        rate. If the chosen backend has not answered after `hedge_delay` seconds the same
+        request is also sent to the runner-up and whichever answers first wins; a backend
+        that fails outright is failed over immediately. Backends whose circuit breaker is
+        open are skipped, and backends at their concurrency limit are tried last.
+
+        When every backend is rate limited the call waits for the provider's retry-after
+        and tries again, for up to `max_rate_limit_wait` seconds, rather than failing.
+        """
+        if not backends:
+            raise ValueError("At least one LLM backend must be configured")
+        self.backends = backends
+        self.client_factory = client_factory
+        self.hedge_delay = float(os.getenv("LLM_HEDGE_DELAY", "2.0")) if hedge_delay is None else hedge_delay
+        # Latency assumed for backends without samples yet, so they still get traffic
+        self.prior_latency = prior_latency
+        self.max_rate_limit_wait = (
+            float(os.getenv("LLM_RATE_LIMIT_MAX_WAIT", "60")) if max_rate_limit_wait is None else max_rate_limit_wait
+        )
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        self.rate_limit_waits = 0
+
+    def ranked(self) -> List[LLMBackend]:
+        """Available backends, best first: unsaturated, then by error-weighted p95 latency."""
+        available = [backend for backend in self.backends if backend.breaker.available()]
+
+        def score(item: Tuple[int, LLMBackend]):
+            order, backend = item
+            p95 = backend.percentile(0.95)
+            p50 = backend.percentile(0.5)
+            latency = (p50 + p95) / 2 if p95 is not None else self.prior_latency
+            return (backend.saturated(), latency * (1 + 4 * backend.error_rate()), order)
+
+        return [backend for _, backend in sorted(enumerate(available), key=score)]
+
+    async def complete(
+        self, messages: List[Dict], temperature: float, structured: Optional[StructuredOutput] = None
+    ) -> Tuple[str, str]:
+        """
+        Returns (content, name of the backend that answered). With `structured`, each
+        backend is asked for schema-shaped output in the way it supports.
+        """
+        deadline = time.monotonic() + self.max_rate_limit_wait
+        while True:
+            try:
+                return await self._complete_once(messages, temperature, structured)
+            except LLMBackendError as e:
+                await self._wait_out_rate_limit(e, deadline)
+
+    async def _complete_once(
+        self, messages: List[Dict], temperature: float, structured: Optional[StructuredOutput] = None
+    ) -> Tuple[str, str]:
+        candidates = self.ranked()
+        if not candidates:
+            raise self._unavailable_error()
+
+        client = self.client_factory()
+        pending: Dict[asyncio.Task, LLMBackend] = {}
+        errors: List[Exception] = []
+        next_index = 0
+        hedged = False
+
+        def launch() -> None:
+            nonlocal next_index
+            backend = candidates[next_index]
+            next_index += 1
+            pending[asyncio.ensure_future(backend.complete(client, messages, temperature, structured))] = backend
+
+        launch()
+        try:
+            while pending:
+                can_hedge = not hedged and self.hedge_delay > 0 and next_index < len(candidates)
+                done, _ = await asyncio.wait(
+                    pending, timeout=self.hedge_delay if can_hedge else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    self.hedged += 1
+                    launch()
+                    continue
+                for task in done:
+                    backend = pending.pop(task)
+                    if task.exception() is None:
+                        if hedged and backend is not candidates[0]:
+                            self.hedge_wins += 1
+                        return task.result(), backend.name
+                    errors.append(task.exception())
+                if not pending and next_index < len(candidates):
+                    self.failovers += 1
+                    launch()
+            raise errors[-1]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, messages: List[Dict], temperature: float) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Yields (delta, backend name). Streams are not hedged; a backend that fails before
+        producing its first token is failed over, one that fails mid-stream is not.
+        """
+        deadline = time.monotonic() + self.max_rate_limit_wait
+        while True:
+            started = False
+            try:
+                async for delta, backend in self._stream_once(messages, temperature):
+                    started = True
+                    yield delta, backend
+                return
+            except LLMBackendError as e:
+                if started:
+                    raise
+                await self._wait_out_rate_limit(e, deadline)
+
+    async def _stream_once(self, messages: List[Dict], temperature: float) -> AsyncIterator[Tuple[str, str]]:
+        candidates = self.ranked()
+        if not candidates:
+            raise self._unavailable_error()
+
+        client = self.client_factory()
+        last_error: Optional[Exception] = None
+        for index, backend in enumerate(candidates):
+            if index:
+                self.failovers += 1
+            started = False
+            try:
+                async for delta in backend.stream(client, messages, temperature):
+                    started = True
+                    yield delta, backend.name
+                return
+            except LLMBackendError as e:
+                if started:
+                    raise
+                last_error = e
+        raise last_error
+
+    async def probe(self) -> Dict[str, bool]:
+        """Probes every backend concurrently; returns backend name -> reachable."""
+        client = self.client_factory()
+
+        async def reachable(backend: LLMBackend) -> bool:
+            try:
+                return await backend.probe(client)
+            except httpx.HTTPError:
+                return False
+
+        results = await asyncio.gather(*(reachable(backend) for backend in self.backends))
+        return {backend.name: ok for backend, ok in zip(self.backends, results)}
+
+    def complete_sync(self, messages: List[Dict], temperature: float) -> str:
+        last_error: Optional[Exception] = None
+        for backend in self.ranked() or self.backends:
+            try:
+                return backend.complete_sync(messages, temperature)
+            except (LLMBackendError, httpx.HTTPError) as e:
+                last_error = e
+        raise last_error
+
+    def stats(self) -> Dict:
+        return {
+            "hedge_delay": self.hedge_delay,
+            "hedged_requests": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "rate_limit_waits": self.rate_limit_waits,
+            "backends": [backend.stats() for backend in self.backends],
+        }
+
+    async def _wait_out_rate_limit(self, error: LLMBackendError, deadline: float) -> None:
+        """Re-raises anything but a rate limit, or a rate limit that would outlast the deadline."""
+        if error.status_code != 429:
+            raise error
+        delay = max(error.retry_after or 1.0, 0.05)
+        if time.monotonic() + delay > deadline:
+            raise error
+        self.rate_limit_waits += 1
+        await asyncio.sleep(delay)
+
+    def _unavailable_error(self) -> LLMBackendError:
+        # When every breaker is open because of rate limits, report it as a 429 so callers back off and retry
+        rate_limited = all(backend.breaker.rate_limited for backend in self.backends)
+        retry_in = min(backend.breaker.retry_in() for backend in self.backends)
+        return LLMBackendError(
+            "router",
+            f"All LLM backends are unavailable, retry in {retry_in:.1f}s",
+            429 if rate_limited else 503,
+            retry_in,
+        )
+
+
+def backends_from_env() -> List[LLMBackend]:
+    """
+    Reads the backend list from LLM_BACKENDS, a JSON list of objects with name, base_url,
+    model and optionally api_key_env, max_concurrency, requests_per_minute,
+    tokens_per_minute, daily_limits and structured_output. Without it, Groq is configured from
+    GROQ_API_KEY / GROQ_MODEL / GROQ_API_BASE (with LLM_RPM_LIMIT / LLM_TPM_LIMIT and
+    GROQ_STRUCTURED_OUTPUT), plus a local OpenAI-compatible server when
+    LLM_LOCAL_BASE_URL is set (with LLM_LOCAL_STRUCTURED_OUTPUT).
+    """
+    failure_threshold = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+    window_seconds = float(os.getenv("LLM_ROUTING_WINDOW", "120"))
+    reset_timeout = float(os.getenv("LLM_BREAKER_RESET", "30"))
+    default_concurrency = int(os.getenv("LLM_BACKEND_MAX_CONCURRENCY", "32"))
+
+    configured = os.getenv("LLM_BACKENDS")
+    if configured:
+        specs = json.loads(configured)
+    else:
+        groq_base = os.getenv("GROQ_API_BASE")
+        specs = [{
+            "name": "groq",
+            "base_url": groq_base.rstrip("/") + "/openai/v1" if groq_base else GROQ_BASE_URL,
+            "model": os.getenv("GROQ_MODEL", DEFAULT_MODEL),
+            "api_key_env": "GROQ_API_KEY",
+            "requests_per_minute": os.getenv("LLM_RPM_LIMIT"),
+            "tokens_per_minute": os.getenv("LLM_TPM_LIMIT"),
+            # Groq's plain x-ratelimit-*-requests headers count requests per day, not per minute
+            "daily_limits": ["requests"],
+            # JSON mode works on every Groq model; strict json_schema only on some
+            "structured_output": os.getenv("GROQ_STRUCTURED_OUTPUT", "json_object"),
+        }]
+        if os.getenv("LLM_LOCAL_BASE_URL"):
+            specs.append({
+                "name": "local",
+                "base_url": os.getenv("LLM_LOCAL_BASE_URL"),
+                "model": os.getenv("LLM_LOCAL_MODEL", DEFAULT_MODEL),
+                "api_key_env": "LLM_LOCAL_API_KEY",
+                "structured_output": os.getenv("LLM_LOCAL_STRUCTURED_OUTPUT", "none"),
+            })
+
+    return [
+        LLMBackend(
+            name=spec["name"],
+            base_url=spec["base_url"],
+            model=spec.get("model", DEFAULT_MODEL),
+            api_key=os.getenv(spec["api_key_env"]) if spec.get("api_key_env") else spec.get("api_key"),
+            max_concurrency=int(spec.get("max_concurrency", default_concurrency)),
+            window_seconds=window_seconds,
+            breaker=CircuitBreaker(failure_threshold, reset_timeout),
+            limiter=RateLimiter(
+                int(spec.get("max_concurrency", default_concurrency)),
+                float(spec["requests_per_minute"]) if spec.get("requests_per_minute") else None,
+                float(spec["tokens_per_minute"]) if spec.get("tokens_per_minute") else None,
+                daily_limits=spec.get("daily_limits") or (),
+                name=spec["name"],
+            ),
+            structured_output=spec.get("structured_output") or "none",
+        )
+        for spec in specs
+    ]
@@ -1,25 +1,58 @@
 import os
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, HttpUrl, field_validator
-from typing import List, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, HttpUrl, field_validator, model_validator
+from typing import Any, List, Literal, Optional
 import re
+import json
 import asyncio
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
-# Import our existing modules
-from email_service import EmailService
-from job_scraper_selenium import JobScraper
+# Import our existing modules (the services themselves are built lazily, see services.py)
+from browser_pool import BrowserPoolExhausted
+from email_cache import SHARED_TENANT
+from job_cache import cache_key
+from singleflight import SingleFlight, payload_key
+from batch_runner import HostConcurrencyLimiter, RateLimitAwareScheduler, run_bounded
+from job_queue import JobQueue
+from models import JobData
+from site_adapters import build_default_registry
+from health_monitor import HealthMonitor
+from idempotency import IdempotencyRegistry, IdempotencyKeyReused, ClientDisconnected
+import llm_client
+import metrics
+import services
+import tracing
+from services import get_email_service, get_job_scraper
 
 # Load environment variables
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing slow happens before the socket is bound: services are pre-warmed in the background
+    tracing.configure()
+    await job_queue.start()
+    await health_monitor.start()
+    prewarm = services.start_prewarm()
+    yield
+    if prewarm is not None and not prewarm.done():
+        prewarm.cancel()
+        await asyncio.gather(prewarm, return_exceptions=True)
+    await health_monitor.stop()
+    await job_queue.stop()
+    await services.close()
+    await llm_client.close()
+    tracing.shutdown()
+
 app = FastAPI(
     title="Cold Mail Generator API",
     description="AI-powered cold email generator that extracts job data and creates personalized emails",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -29,16 +62,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Fetch-Tier", "X-Cache", "Idempotent-Replayed", tracing.REQUEST_ID_HEADER],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(tracing.TracingMiddleware)
+
+# The adapters the scraper resolves sites with, listed without constructing the scraper
+site_adapters = build_default_registry()
+
+# Concurrent identical requests share one extraction / generation instead of each starting their own
+extract_flight = SingleFlight()
+generate_flight = SingleFlight()
+# Client retries carrying the same Idempotency-Key attach to the original request's work
+extract_idempotency = IdempotencyRegistry()
+generate_idempotency = IdempotencyRegistry()
 
-# Initialize services
-email_service = EmailService()
-job_scraper = JobScraper()
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "500"))
+# Generated emails are cached per tenant, named by this header; requests without it share one partition,
+# which only serves exact repeats
+TENANT_HEADER = "X-Tenant-ID"
+DEFAULT_TENANT = SHARED_TENANT
+# X-Cache values for how a draft was served: HIT like /api/extract-job, not the cache's own "exact"
+EMAIL_CACHE_HEADERS = {"exact": "HIT", "similar": "SIMILAR", "miss": "MISS", "bypass": "BYPASS"}
 
 # Pydantic models for request/response validation
 class JobUrlRequest(BaseModel):
     url: HttpUrl
 
+class BatchJobUrlRequest(BaseModel):
+    urls: List[HttpUrl]
+
+    @field_validator('urls')
+    @classmethod
+    def validate_urls(cls, v):
+        if not v:
+            raise ValueError('At least one URL is required')
+        if len(v) > MAX_BATCH_SIZE:
+            raise ValueError(f'A batch can contain at most {MAX_BATCH_SIZE} URLs')
+        return v
+
 class PersonalInfo(BaseModel):
     name: str
     email: str
@@ -65,20 +127,24 @@ class PersonalInfo(BaseModel):
             raise ValueError('Skills description must be at least 10 characters long')
         return v.strip()
 
-class JobData(BaseModel):
-    role: str
-    company: str
-    description: str
-    skills: List[str]
-    experience: Optional[str] = None
-    location: Optional[str] = None
-    salary: Optional[str] = None
-    remote: Optional[bool] = None
-    jobType: Optional[str] = None
-
 class EmailGenerationRequest(BaseModel):
     jobData: JobData
     personalInfo: PersonalInfo
+    forceRegenerate: bool = False
+
+class BulkEmailGenerationRequest(BaseModel):
+    personalInfo: PersonalInfo
+    jobs: List[JobData]
+    forceRegenerate: bool = False
+
+    @field_validator('jobs')
+    @classmethod
+    def validate_jobs(cls, v):
+        if not v:
+            raise ValueError('At least one job is required')
+        if len(v) > MAX_BATCH_SIZE:
+            raise ValueError(f'A batch can contain at most {MAX_BATCH_SIZE} jobs')
+        return v
 
 class EmailResponse(BaseModel):
     subject: str
@@ -87,6 +153,33 @@ class EmailResponse(BaseModel):
     suggestions: Optional[List[str]] = None
     personalization_level: Optional[str] = None
 
+class BackgroundJobRequest(BaseModel):
+    type: Literal["extract", "generate", "extract_and_generate"]
+    url: Optional[HttpUrl] = None
+    jobData: Optional[JobData] = None
+    personalInfo: Optional[PersonalInfo] = None
+    forceRegenerate: bool = False
+    callbackUrl: Optional[HttpUrl] = None
+
+    @model_validator(mode='after')
+    def validate_payload(self):
+        if self.type in ("extract", "extract_and_generate") and self.url is None:
+            raise ValueError(f"'url' is required for {self.type} jobs")
+        if self.type == "generate" and self.jobData is None:
+            raise ValueError("'jobData' is required for generate jobs")
+        if self.type in ("generate", "extract_and_generate") and self.personalInfo is None:
+            raise ValueError(f"'personalInfo' is required for {self.type} jobs")
+        return self
+
+class BackgroundJobResponse(BaseModel):
+    id: str
+    type: str
+    status: str
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    createdAt: float
+    updatedAt: float
+
 class HealthResponse(BaseModel):
     status: str
     message: str
@@ -97,78 +190,409 @@ class HealthResponse(BaseModel):
 async def root():
     return {"message": "Cold Mail Generator API is running"}
 
+# Health probes run in the background; the endpoints below only read their cached results
+# (both services depend on the LLM alone, so one probe covers them without constructing either)
+health_monitor = HealthMonitor({"llm": llm_client.probe})
+READY_MAX_QUEUE_DEPTH = int(os.getenv("READY_MAX_QUEUE_DEPTH", "100"))
+
 @app.get("/health", response_model=HealthResponse, tags=["Health"])
 async def health_check():
-    """Health check endpoint to verify all services are working"""
-    try:
-        # Test email service
-        email_service_status = email_service.test_connection()
-        
-        # Test job scraper
-        scraper_status = job_scraper.test_connection()
-        
-        return HealthResponse(
-            status="healthy",
-            message="All services are operational",
-            services={
-                "email_service": email_service_status,
-                "job_scraper": scraper_status,
-                "api": "online"
-            }
+    """Health check endpoint reporting the status of all services (from the last background probe)"""
+    snapshot = health_monitor.snapshot()
+    llm_status = snapshot["statuses"]["llm"]
+    statuses = {"api": "online", "email_service": llm_status, "job_scraper": llm_status}
+    if all(status == "online" for status in statuses.values()):
+        status, message = "healthy", "All services are operational"
+    else:
+        status, message = "degraded", "Some services are unavailable"
+    if snapshot["stale"]:
+        message += " (status has not been refreshed recently)"
+    return HealthResponse(status=status, message=message, services=statuses)
+
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    """Liveness probe: the process is up and its event loop is responsive"""
+    return {"status": "alive"}
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness():
+    """Readiness probe: whether this instance can take more traffic right now
+
+    Answers 503 until the services have been pre-warmed, while the browser pool or the
+    background job queue is saturated, or while health probes have stopped running. LLM
+    availability is reported but does not affect readiness: a provider outage would
+    otherwise take every instance out of rotation at once.
+    """
+    snapshot = health_monitor.snapshot()
+    queue = job_queue.stats()
+    backends = llm_client.get_router().stats()["backends"]
+    checks = {
+        "services": {
+            # A failed pre-warm does not hold readiness back: services then start on first request
+            "ok": services.prewarm_state != services.PREWARM_PENDING,
+            **services.status()
+        },
+        "health_monitor": {"ok": not snapshot["stale"], "age_seconds": snapshot["age_seconds"]},
+        "job_queue": {"ok": queue["queued"] < READY_MAX_QUEUE_DEPTH, "queued": queue["queued"], "max_depth": READY_MAX_QUEUE_DEPTH},
+        "llm": {
+            "ok": True,
+            "status": snapshot["statuses"]["llm"],
+            "queue_depth": sum(backend["rate_limiter"]["queue_depth"] for backend in backends)
+        }
+    }
+    job_scraper = services.peek("job_scraper")
+    if job_scraper is not None:
+        pool = job_scraper.browser_pool.stats()
+        # Degraded (fewer browsers than configured while replacements relaunch) is reported, but
+        # only a pool with no browsers at all stops taking traffic
+        checks["browser_pool"] = {
+            "ok": pool["waiting"] < job_scraper.browser_pool.max_waiters and (pool["alive"] > 0 or not pool["degraded"]),
+            "in_use": pool["in_use"],
+            "waiting": pool["waiting"],
+            "max_waiters": job_scraper.browser_pool.max_waiters,
+            "alive": pool["alive"],
+            "size": pool["size"],
+            "degraded": pool["degraded"]
+        }
+    ready = all(check["ok"] for check in checks.values())
+    return JSONResponse(status_code=200 if ready else 503, content={"ready": ready, "checks": checks})
+
+@app.get("/metrics", tags=["Health"])
+async def prometheus_metrics():
+    """Prometheus metrics: per-stage latency by job site, cache and fallback counters, token usage"""
+    job_scraper = services.peek("job_scraper")
+    if job_scraper is not None:
+        metrics.observe_browser_pool(job_scraper.browser_pool.stats())
+    content, content_type = metrics.render()
+    return Response(content=content, media_type=content_type)
+
+def raise_if_rate_limited(error: Exception):
+    """Reports an LLM rate limit that outlasted the router's own waiting as a retryable 429"""
+    retry_after = llm_client.rate_limit_retry_after(error)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="The AI service is busy, please retry shortly",
+            headers={"Retry-After": str(max(1, round(retry_after)))}
         )
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Service health check failed: {str(e)}")
 
 @app.post("/api/extract-job", response_model=JobData, tags=["Job Processing"])
-async def extract_job_data(request: JobUrlRequest):
-    """Extract job information from a job posting URL"""
+async def extract_job_data(
+    request: JobUrlRequest,
+    response: Response,
+    http_request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    job_scraper=Depends(get_job_scraper)
+):
+    """Extract job information from a job posting URL
+
+    Send an `Idempotency-Key` header to make retries safe: a repeat with the same key
+    attaches to the original extraction instead of starting another one.
+    """
     try:
         # Extract job data using our scraper
-        job_data = await job_scraper.extract_job_data(str(request.url))
+        url = str(request.url)
+        job_data, replayed = await extract_idempotency.run(
+            idempotency_key,
+            cache_key(url),
+            lambda: extract_flight.do(cache_key(url), lambda: job_scraper.extract_job_data(url)),
+            http_request.is_disconnected
+        )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
         
         if not job_data:
             raise HTTPException(status_code=400, detail="Unable to extract job data from the provided URL")
         
+        # Report which fetch tier served the page (static HTML or browser render)
+        meta = job_data.pop("_meta", {})
+        if meta.get("fetch_tier"):
+            response.headers["X-Fetch-Tier"] = meta["fetch_tier"]
+        response.headers["X-Cache"] = "HIT" if meta.get("cache") == "hit" else "MISS"
+        
         return JobData(**job_data)
     
+    except BrowserPoolExhausted as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ClientDisconnected:
+        # Nobody is listening any more; the status code is only for the access log
+        return Response(status_code=499)
     except Exception as e:
         print(f"Error extracting job data: {str(e)}")
+        raise_if_rate_limited(e)
         raise HTTPException(status_code=500, detail=f"Failed to extract job data: {str(e)}")
 
+@app.post("/api/extract-jobs", tags=["Job Processing"])
+async def extract_jobs_batch(request: BatchJobUrlRequest, job_scraper=Depends(get_job_scraper)):
+    """Extract job information from many URLs, streamed back as NDJSON.
+
+    Each line is `{"index", "url", "ok", "data" | "error", ...}` and lines arrive in
+    completion order. Work is capped globally and per host; one failing URL never
+    fails the batch.
+    """
+    urls = [str(url) for url in request.urls]
+    limiter = HostConcurrencyLimiter()
+
+    async def extract(url: str):
+        return await extract_flight.do(cache_key(url), lambda: job_scraper.extract_job_data(url))
+
+    async def ndjson_lines():
+        async for index, url, job_data, error in run_bounded(urls, extract, limiter.slot):
+            if error is None and not job_data:
+                error = Exception("Unable to extract job data from the provided URL")
+            if error is not None:
+                line = {"index": index, "url": url, "ok": False, "error": str(error)}
+            else:
+                meta = job_data.pop("_meta", {})
+                line = {
+                    "index": index,
+                    "url": url,
+                    "ok": True,
+                    "data": JobData(**job_data).model_dump(),
+                    "fetchTier": meta.get("fetch_tier"),
+                    "cache": meta.get("cache", "miss")
+                }
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
 @app.post("/api/generate-email", response_model=EmailResponse, tags=["Email Generation"])
-async def generate_cold_email(request: EmailGenerationRequest):
-    """Generate a personalized cold email based on job data and personal information"""
+async def generate_cold_email(
+    request: EmailGenerationRequest,
+    response: Response,
+    http_request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    tenant: str = Header(DEFAULT_TENANT, alias=TENANT_HEADER),
+    email_service=Depends(get_email_service)
+):
+    """Generate a personalized cold email based on job data and personal information
+
+    Send an `Idempotency-Key` header to make retries safe: a repeat with the same key
+    attaches to the original generation instead of calling the LLM again.
+
+    Drafts are cached per `X-Tenant-ID`; `X-Cache` reports HIT (same prompt), SIMILAR (a
+    draft for the same job re-addressed to this applicant), MISS or, with
+    `forceRegenerate`, BYPASS.
+    """
     try:
         # Generate email using our email service
-        email_result = await email_service.generate_email(
-            job_data=request.jobData.model_dump(),
-            personal_info=request.personalInfo.model_dump()
+        job_data = request.jobData.model_dump()
+        personal_info = request.personalInfo.model_dump()
+        request_key = payload_key(job_data, personal_info, tenant, request.forceRegenerate)
+        email_result, replayed = await generate_idempotency.run(
+            idempotency_key,
+            request_key,
+            lambda: generate_flight.do(
+                request_key,
+                lambda: email_service.generate_email(
+                    job_data=job_data, personal_info=personal_info, tenant=tenant, force=request.forceRegenerate
+                )
+            ),
+            http_request.is_disconnected
         )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
         
         if not email_result:
             raise HTTPException(status_code=500, detail="Failed to generate email")
         
+        meta = email_result.pop("_meta", {})
+        response.headers["X-Cache"] = EMAIL_CACHE_HEADERS.get(meta.get("cache", "miss"), "MISS")
+        
         return EmailResponse(**email_result)
     
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ClientDisconnected:
+        return Response(status_code=499)
     except Exception as e:
         print(f"Error generating email: {str(e)}")
+        raise_if_rate_limited(e)
         raise HTTPException(status_code=500, detail=f"Failed to generate email: {str(e)}")
 
+@app.post("/api/generate-emails", tags=["Email Generation"])
+async def generate_cold_emails_bulk(
+    request: BulkEmailGenerationRequest,
+    tenant: str = Header(DEFAULT_TENANT, alias=TENANT_HEADER),
+    email_service=Depends(get_email_service)
+):
+    """Generate emails for one applicant across many jobs, streamed back as NDJSON.
+
+    Each line is `{"index", "ok", "role", "company", "data" | "error"}` in completion
+    order. Generations run concurrently and back off together when the LLM provider
+    rate-limits, instead of failing.
+    """
+    personal_info = request.personalInfo.model_dump()
+    # The applicant half of the prompt is identical for every job, so build it once
+    applicant_fields = email_service.build_applicant_fields(personal_info)
+    scheduler = RateLimitAwareScheduler()
+
+    async def generate(job: JobData):
+        job_data = job.model_dump()
+        return await scheduler.run(lambda: generate_flight.do(
+            payload_key(job_data, personal_info, tenant, request.forceRegenerate),
+            lambda: email_service.generate_email(job_data, personal_info, applicant_fields, tenant, request.forceRegenerate)
+        ))
+
+    async def ndjson_lines():
+        async for index, job, email_result, error in run_bounded(request.jobs, generate):
+            line = {"index": index, "role": job.role, "company": job.company}
+            if error is None and not email_result:
+                error = Exception("Failed to generate email")
+            if error is not None:
+                line.update(ok=False, error=str(error))
+            else:
+                line.update(ok=True, data=EmailResponse(**email_result).model_dump())
+            yield json.dumps(line) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+@app.post("/api/generate-email/stream", tags=["Email Generation"])
+async def stream_cold_email(
+    request: EmailGenerationRequest,
+    tenant: str = Header(DEFAULT_TENANT, alias=TENANT_HEADER),
+    email_service=Depends(get_email_service)
+):
+    """Stream a personalized cold email as Server-Sent Events.
+
+    Emits `token` events as the model writes, a `subject` event as soon as the subject
+    line is complete, and a closing `complete` event with the full EmailResponse
+    (or an `error` event if generation fails).
+    """
+    async def event_stream():
+        async for event in email_service.stream_email(
+            job_data=request.jobData.model_dump(),
+            personal_info=request.personalInfo.model_dump(),
+            tenant=tenant,
+            force=request.forceRegenerate
+        ):
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Background jobs: long extractions / generations that outlive the client's request timeout
+async def run_extract_job(payload: dict) -> dict:
+    url = payload["url"]
+    job_scraper = await get_job_scraper()
+    job_data = await extract_flight.do(cache_key(url), lambda: job_scraper.extract_job_data(url))
+    if not job_data:
+        raise Exception("Unable to extract job data from the provided URL")
+    job_data.pop("_meta", None)
+    return JobData(**job_data).model_dump()
+
+async def run_generate_job(payload: dict) -> dict:
+    job_data, personal_info = payload["jobData"], payload["personalInfo"]
+    tenant, force = payload.get("tenant", DEFAULT_TENANT), payload.get("forceRegenerate", False)
+    email_service = await get_email_service()
+    email_result = await generate_flight.do(
+        payload_key(job_data, personal_info, tenant, force),
+        lambda: email_service.generate_email(job_data=job_data, personal_info=personal_info, tenant=tenant, force=force)
+    )
+    if not email_result:
+        raise Exception("Failed to generate email")
+    return EmailResponse(**email_result).model_dump()
+
+async def run_extract_and_generate_job(payload: dict) -> dict:
+    job_data = await run_extract_job(payload)
+    email = await run_generate_job(dict(payload, jobData=job_data))
+    return {"jobData": job_data, "email": email}
+
+job_queue = JobQueue({
+    "extract": run_extract_job,
+    "generate": run_generate_job,
+    "extract_and_generate": run_extract_and_generate_job
+})
+
+def _background_job_response(record: dict) -> BackgroundJobResponse:
+    return BackgroundJobResponse(
+        id=record["id"],
+        type=record["type"],
+        status=record["status"],
+        result=record["result"],
+        error=record["error"],
+        createdAt=record["created_at"],
+        updatedAt=record["updated_at"]
+    )
+
+@app.post("/api/jobs", response_model=BackgroundJobResponse, status_code=202, tags=["Background Jobs"])
+async def submit_background_job(
+    request: BackgroundJobRequest,
+    response: Response,
+    tenant: str = Header(DEFAULT_TENANT, alias=TENANT_HEADER)
+):
+    """Queue an extraction and/or email generation and return its job id immediately.
+
+    Poll `GET /api/jobs/{id}` for the result, or pass `callbackUrl` to have the finished
+    job POSTed to you.
+    """
+    payload = request.model_dump(mode="json", exclude={"type", "callbackUrl"}, exclude_none=True)
+    payload["tenant"] = tenant
+    callback_url = str(request.callbackUrl) if request.callbackUrl else None
+    record = await job_queue.submit(request.type, payload, callback_url)
+    response.headers["Location"] = f"/api/jobs/{record['id']}"
+    return _background_job_response(record)
+
+@app.get("/api/jobs/{job_id}", response_model=BackgroundJobResponse, tags=["Background Jobs"])
+async def get_background_job(job_id: str):
+    """Get the status and, once finished, the result of a background job"""
+    record = await job_queue.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _background_job_response(record)
+
 @app.get("/api/supported-sites", tags=["Information"])
 async def get_supported_sites():
-    """Get list of supported job sites"""
+    """Get list of supported job sites and how each one is scraped
+
+    Read from the adapter registry directly, so listing the sites never builds the scraper.
+    """
+    adapters = site_adapters.adapters() + [site_adapters.default]
+    return {
+        "supported_sites": [adapter.name for adapter in adapters],
+        "adapters": [adapter.describe() for adapter in adapters]
+    }
+
+@app.get("/api/stats", tags=["Information"])
+async def get_stats():
+    """Get runtime statistics for the extraction pipeline
+    
+    Scraper and email cache sections are null until their service has been constructed.
+    """
+    job_scraper = services.peek("job_scraper")
+    email_service = services.peek("email_service")
     return {
-        "supported_sites": [
-            "LinkedIn",
-            "Indeed", 
-            "Glassdoor",
-            "AngelList",
-            "GitHub",
-            "Company Career Pages",
-            "Stack Overflow Jobs",
-            "Remote.co",
-            "We Work Remotely"
-        ]
+        "services": services.status(),
+        "extraction": job_scraper.extraction_counts if job_scraper else None,
+        "llm_extraction_modes": job_scraper.llm_mode_counts if job_scraper else None,
+        "job_cache": job_scraper.cache.stats() if job_scraper else None,
+        "page_fetcher": job_scraper.page_fetcher.stats() if job_scraper else None,
+        "email_cache": email_service.cache.stats() if email_service else None,
+        "json_parsing": {
+            "extract_job": job_scraper.json_parser.stats() if job_scraper else None,
+            "generate_email": email_service.json_parser.stats() if email_service else None
+        },
+        "prompts": {
+            "extract_job": job_scraper.extract_prompt.stats() if job_scraper else None,
+            "extract_job_structured": job_scraper.structured_prompt.stats() if job_scraper else None,
+            "generate_email": email_service.email_prompt.stats() if email_service else None
+        },
+        "browser_pool": job_scraper.browser_pool.stats() if job_scraper else None,
+        "llm": llm_client.stats(),
+        "job_queue": job_queue.stats(),
+        "coalescing": {
+            "extract_job": extract_flight.stats(),
+            "generate_email": generate_flight.stats()
+        },
+        "idempotency": {
+            "extract_job": extract_idempotency.stats(),
+            "generate_email": generate_idempotency.stats()
+        }
     }
 
 # Error handlers
@@ -180,7 +604,8 @@ async def http_exception_handler(request, exc):
             "error": True,
             "message": exc.detail,
             "status_code": exc.status_code
-        }
+        },
+        headers=exc.headers
     )
 
 @app.exception_handler(Exception)
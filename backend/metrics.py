@@ -0,0 +1,159 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.routing import Match
+
+# Who the current work is for. Set per request / per extraction and read when recording, so
+# deeply nested code (the LLM router, the page fetcher) needs no extra parameters.
+current_site: ContextVar[str] = ContextVar("metrics_site", default="none")
+current_endpoint: ContextVar[str] = ContextVar("metrics_endpoint", default="background")
+
+STAGE_SECONDS = Histogram(
+    "coldmail_stage_duration_seconds",
+    "Time spent in each stage of the extraction and email pipelines",
+    ["stage", "site"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+CACHE_LOOKUPS = Counter(
+    "coldmail_cache_lookups_total",
+    "Cache lookups by cache and result (memory_hit, disk_hit or miss)",
+    ["cache", "result"],
+)
+FALLBACKS = Counter(
+    "coldmail_fallbacks_total",
+    "Times a cheaper path did not suffice and a fallback was used",
+    ["kind", "site"],
+)
+PARSE_FAILURES = Counter(
+    "coldmail_parse_failures_total",
+    "LLM responses that could not be parsed as JSON",
+    ["stage", "site"],
+)
+JSON_PARSES = Counter(
+    "coldmail_json_parses_total",
+    "LLM JSON answers by stage and outcome (clean, repaired locally, reasked or failed)",
+    ["stage", "outcome"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "coldmail_http_requests_in_flight",
+    "HTTP requests currently being handled, including streaming responses",
+    ["endpoint"],
+)
+BROWSER_POOL_DRIVERS = Gauge(
+    "coldmail_browser_pool_drivers",
+    "Browser pool drivers by state, and callers waiting for one",
+    ["state"],
+)
+BROWSER_POOL_UTILIZATION = Gauge(
+    "coldmail_browser_pool_utilization",
+    "Fraction of the browser pool's drivers currently rendering a page",
+)
+LLM_TOKENS = Counter(
+    "coldmail_llm_tokens_total",
+    "LLM tokens by the endpoint that spent them and kind (prompt, cached_prompt or completion)",
+    ["endpoint", "kind"],
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "coldmail_llm_queue_depth",
+    "Calls waiting in a backend's rate limiter for a concurrency slot or rate budget",
+    ["backend"],
+)
+LLM_QUEUE_WAIT_SECONDS = Histogram(
+    "coldmail_llm_queue_wait_seconds",
+    "Time calls spent queued in a backend's rate limiter before being sent",
+    ["backend"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+PROMPT_TOKENS = Counter(
+    "coldmail_prompt_tokens_total",
+    "Estimated tokens sent per prompt and section (the static instructions or a variable section)",
+    ["prompt", "section"],
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Times the enclosed block into the stage histogram, labelled with the current site."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(name, current_site.get()).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def site(name: str) -> Iterator[None]:
+    """Labels everything recorded inside the block with `name` as the site."""
+    token = current_site.set(name)
+    try:
+        yield
+    finally:
+        current_site.reset(token)
+
+
+def fallback(kind: str) -> None:
+    FALLBACKS.labels(kind, current_site.get()).inc()
+
+
+def parse_failure(stage_name: str) -> None:
+    PARSE_FAILURES.labels(stage_name, current_site.get()).inc()
+
+
+def record_llm_tokens(
+    prompt_tokens: Optional[int], completion_tokens: Optional[int], cached_prompt_tokens: Optional[int] = None
+) -> None:
+    """Counts tokens; `cached_prompt_tokens` is the part of the prompt the provider served from its prefix cache."""
+    endpoint = current_endpoint.get()
+    if prompt_tokens:
+        LLM_TOKENS.labels(endpoint, "prompt").inc(prompt_tokens)
+    if cached_prompt_tokens:
+        LLM_TOKENS.labels(endpoint, "cached_prompt").inc(cached_prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(endpoint, "completion").inc(completion_tokens)
+
+
+def observe_browser_pool(stats: Dict) -> None:
+    for state in ("alive", "idle", "in_use", "waiting"):
+        BROWSER_POOL_DRIVERS.labels(state).set(stats[state])
+    BROWSER_POOL_UTILIZATION.set(stats["in_use"] / stats["size"] if stats["size"] else 0)
+
+
+def route_template(scope) -> str:
+    """The path template of the route an ASGI request will be dispatched to, or "other"."""
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "other"
+
+
+def render() -> Tuple[bytes, str]:
+    """The current metrics in the Prometheus text format, with its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        """
+        ASGI middleware tracking in-flight requests per route. Unlike an `@app.middleware`
+        function it wraps streaming responses until their last byte. Requests are labelled
+        by route template (`/api/jobs/{job_id}`), never by raw path, to bound label values.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        endpoint = route_template(scope)
+        gauge = REQUESTS_IN_FLIGHT.labels(endpoint)
+        token = current_endpoint.set(endpoint)
+        gauge.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gauge.dec()
+            current_endpoint.reset(token)
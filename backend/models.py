@@ -0,0 +1,38 @@
+from typing import Dict, List, Optional, Type
+
+from pydantic import BaseModel, Field
+
+
+class JobData(BaseModel):
+    role: str = Field(description="The job title/position")
+    company: str = Field(description="The company name")
+    description: str = Field(description="A brief description of the role (2-3 sentences)")
+    skills: List[str] = Field(description="Required skills and technologies")
+    experience: Optional[str] = Field(None, description="Required experience level (e.g. '5+ years', 'Entry Level')")
+    location: Optional[str] = Field(None, description="Job location (e.g. 'San Francisco, CA', 'Remote')")
+    salary: Optional[str] = Field(None, description="Salary or pay range as written in the posting")
+    remote: Optional[bool] = Field(None, description="Whether the role can be done remotely")
+    jobType: Optional[str] = Field(None, description="Employment type (e.g. 'full-time', 'contract')")
+
+
+def strict_json_schema(model: Type[BaseModel], descriptions: bool = True) -> Dict:
+    """
+    The model's JSON schema in the strict form structured-output APIs accept: every
+    property required (optional ones become nullable), no additional properties, and
+    no titles or defaults. Without `descriptions` the field descriptions are dropped
+    too, for prompts that already explain the fields. Only flat models are supported.
+    """
+    dropped = ("title", "default") if descriptions else ("title", "default", "description")
+    schema = model.model_json_schema()
+    properties = {}
+    for name, spec in schema["properties"].items():
+        spec = {key: value for key, value in spec.items() if key not in dropped}
+        if "anyOf" in spec:
+            spec["anyOf"] = [{key: value for key, value in option.items() if key != "title"} for option in spec["anyOf"]]
+        properties[name] = spec
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
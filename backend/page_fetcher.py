@@ -0,0 +1,175 @@
+import os
+import re
+from typing import Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+import metrics
+import tracing
+from browser_pool import BrowserPool, DEFAULT_USER_AGENT
+from html_cleaner import HtmlCleaner
+from site_adapters import GENERIC_ADAPTER, STRATEGY_API, STRATEGY_BROWSER, SiteAdapter
+
+load_dotenv()
+
+# Words that show up in nearly every real job posting but rarely on login walls or JS shells
+JOB_MARKERS = re.compile(
+    r"\b(responsibilit\w*|requirements?|qualifications?|experience|skills|apply|salary|benefits|"
+    r"about (?:the|this) (?:role|job|position)|job (?:description|summary|type)|full[- ]time|part[- ]time|remote)\b",
+    re.IGNORECASE,
+)
+JS_REQUIRED_MARKERS = re.compile(r"(enable javascript|javascript is (?:disabled|required)|please turn on javascript)", re.IGNORECASE)
+
+TIER_API = "api"
+TIER_STATIC = "static"
+TIER_BROWSER = "browser"
+
+
+class FetchResult:
+    """
+    The outcome of fetching one page: raw HTML, visible text, the tier that served it and,
+    for API-backed sites, job fields read directly from the API response.
+    """
+
+    def __init__(self, url: str, html: str, text: str, tier: str, structured: Optional[Dict] = None):
+        self.url = url
+        self.html = html
+        self.text = text
+        self.tier = tier
+        self.structured = structured or {}
+
+
+class PageFetcher:
+    def __init__(
+        self,
+        browser_pool: BrowserPool,
+        remove_selectors: Optional[List[str]] = None,
+        min_content_length: int = 100,
+        min_job_markers: int = 2,
+        html_cleaner: Optional[HtmlCleaner] = None,
+    ):
+        """
+        Tiered page fetcher: a plain HTTP GET first, and a full browser render only when
+        the static HTML does not already contain a usable job posting. Pages are turned
+        into text by `html_cleaner`, off the event loop.
+        """
+        self.browser_pool = browser_pool
+        self.html_cleaner = html_cleaner or HtmlCleaner()
+        self.remove_selectors = remove_selectors or ["header", "footer", "nav", "script", "style"]
+        self.min_content_length = min_content_length
+        self.min_job_markers = min_job_markers
+        self.static_enabled = os.getenv("STATIC_FETCH_ENABLED", "true").lower() != "false"
+        self.static_timeout = float(os.getenv("STATIC_FETCH_TIMEOUT", "10"))
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._served = {TIER_API: 0, TIER_STATIC: 0, TIER_BROWSER: 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Created lazily so the connection pool binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=self.static_timeout,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                headers={
+                    "User-Agent": os.getenv("USER_AGENT", DEFAULT_USER_AGENT),
+                    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+                    "Accept-Language": "en-US,en;q=0.9",
+                },
+            )
+        return self._client
+
+    async def fetch(self, url: str, adapter: SiteAdapter = GENERIC_ADAPTER) -> FetchResult:
+        """
+        Returns the page through the cheapest tier that yields sufficient content, following
+        the site adapter's fetch strategy: its public API, static HTML, then a browser render.
+        """
+        with tracing.span("page_fetcher.fetch", {"url.host": tracing.host(url)}) as span:
+            result = await self._fetch_tiered(url, adapter)
+            span.set_attribute("fetch_tier", result.tier)
+            return result
+
+    async def _fetch_tiered(self, url: str, adapter: SiteAdapter) -> FetchResult:
+        if adapter.fetch_strategy == STRATEGY_API and adapter.api_fetcher is not None:
+            result = await self._fetch_api(url, adapter)
+            if result is not None:
+                self._served[TIER_API] += 1
+                return result
+            metrics.fallback("api_to_page")
+
+        if self.static_enabled and adapter.fetch_strategy != STRATEGY_BROWSER:
+            result = await self._fetch_static(url, adapter)
+            if result is not None:
+                self._served[TIER_STATIC] += 1
+                return result
+            metrics.fallback("static_to_browser")
+
+        # Nothing is stripped in the browser so embedded JSON-LD survives; html_to_text cleans up
+        with metrics.stage("browser_render"):
+            html = await self.browser_pool.render(url, wait_selector=adapter.wait_selector)
+        text = await self._to_text(html or "", adapter)
+        self._served[TIER_BROWSER] += 1
+        return FetchResult(url, html or "", text, TIER_BROWSER)
+
+    def is_sufficient(self, text: str) -> bool:
+        """Checks whether extracted text looks like a complete job posting."""
+        if not text or len(text.strip()) < self.min_content_length:
+            return False
+        if JS_REQUIRED_MARKERS.search(text[:2000]) and len(text) < 2000:
+            return False
+        markers = {match.lower() for match in JOB_MARKERS.findall(text)}
+        return len(markers) >= self.min_job_markers
+
+    def stats(self) -> Dict:
+        total = sum(self._served.values())
+        return {
+            "served_by_tier": dict(self._served),
+            "browser_avoidance_rate": round((total - self._served[TIER_BROWSER]) / total, 3) if total else None,
+            "html_cleaner": self.html_cleaner.stats(),
+        }
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self.html_cleaner.close()
+
+    async def _to_text(self, html: str, adapter: SiteAdapter) -> str:
+        with metrics.stage("content_cleaning"), tracing.span("content.clean", {"content.length_before": len(html)}) as span:
+            text = await self.html_cleaner.to_text(html, self.remove_selectors, adapter.body_selectors)
+            span.set_attribute("content.length_after", len(text))
+            return text
+
+    async def _fetch_api(self, url: str, adapter: SiteAdapter) -> Optional[FetchResult]:
+        try:
+            with tracing.span("page_fetcher.api", {"site": adapter.name}):
+                data = await adapter.api_fetcher(self.client, url)
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"{adapter.name} API fetch failed for {url}, falling back to the page: {str(e)}")
+            return None
+        if not data or not data.get("text"):
+            return None
+        return FetchResult(url, "", data["text"], TIER_API, data.get("structured"))
+
+    async def _fetch_static(self, url: str, adapter: SiteAdapter) -> Optional[FetchResult]:
+        try:
+            with tracing.span("page_fetcher.static") as span:
+                response = await self.client.get(url)
+                span.set_attribute("http.status_code", response.status_code)
+                span.set_attribute("content.length", len(response.content))
+        except httpx.HTTPError as e:
+            print(f"Static fetch failed for {url}, falling back to browser: {str(e)}")
+            return None
+
+        content_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or "html" not in content_type:
+            return None
+
+        text = await self._to_text(response.text, adapter)
+        # Embedded JobPosting data is enough on its own, even when the visible text is thin
+        if not self.is_sufficient(text) and not await self.html_cleaner.has_job_posting(response.text):
+            return None
+        return FetchResult(str(response.url), response.text, text, TIER_STATIC)
+
@@ -0,0 +1,107 @@
+import textwrap
+from collections import OrderedDict
+from string import Formatter
+from typing import Dict, List, Sequence, Tuple
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+
+import metrics
+from content_reducer import estimate_tokens
+
+
+class SplitPrompt:
+    def __init__(
+        self,
+        name: str,
+        instructions: str,
+        sections: List[Tuple[str, str]],
+        memoize: Sequence[str] = (),
+        section_cache_size: int = 256
+    ):
+        """
+        A prompt laid out for provider-side prefix caching: `instructions` (the task, rules
+        and few-shot examples) never change and are sent first as the system message, and
+        the per-request `sections` follow as the user message, most reusable first.
+
+        Providers and local servers that cache prompt prefixes (OpenAI-compatible APIs,
+        vLLM, llama.cpp) can then skip re-processing the instructions. `instructions` is
+        plain text and is not formatted, so JSON examples need no brace escaping; each
+        section is a `str.format` template. Sections named in `memoize` keep their recent
+        renderings, so one whose values repeat (the applicant across a bulk request) is
+        rendered once.
+        """
+        self.name = name
+        self.instructions = _dedent(instructions)
+        self.sections = [(section, _dedent(template)) for section, template in sections]
+        self.input_variables = sorted({
+            field for _, template in self.sections for _, field, _, _ in Formatter().parse(template) if field
+        })
+        self.instruction_tokens = estimate_tokens(self.instructions)
+        self._section_fields = {
+            section: [field for _, field, _, _ in Formatter().parse(template) if field] for section, template in self.sections
+        }
+        self._memoize = set(memoize)
+        self._rendered: "OrderedDict[tuple, Tuple[str, int]]" = OrderedDict()
+        self._section_cache_size = section_cache_size
+        self._renders = 0
+        self._section_hits = 0
+
+    def render(self, values: Dict) -> Tuple[str, str]:
+        """(instructions, variable part), with its tokens counted per section."""
+        self._renders += 1
+        metrics.PROMPT_TOKENS.labels(self.name, "instructions").inc(self.instruction_tokens)
+        parts = []
+        for section, template in self.sections:
+            text, tokens = self._render_section(section, template, values)
+            metrics.PROMPT_TOKENS.labels(self.name, section).inc(tokens)
+            parts.append(text)
+        return self.instructions, "\n\n".join(parts)
+
+    def format(self, **values) -> str:
+        """The whole prompt as one string, for hashing; not counted as sent."""
+        parts = [self._render_section(section, template, values)[0] for section, template in self.sections]
+        return "\n\n".join([self.instructions] + parts)
+
+    def messages(self, values: Dict) -> List:
+        instructions, variable = self.render(values)
+        return [SystemMessage(content=instructions), HumanMessage(content=variable)]
+
+    def chat_messages(self, values: Dict) -> List[Dict]:
+        """The same messages as OpenAI-style dicts, for calling the LLM router directly."""
+        instructions, variable = self.render(values)
+        return [{"role": "system", "content": instructions}, {"role": "user", "content": variable}]
+
+    def __or__(self, other):
+        """`prompt | llm` builds a chain, as with a LangChain prompt template."""
+        return RunnableLambda(self.messages) | other
+
+    def stats(self) -> Dict:
+        return {
+            "instruction_tokens": self.instruction_tokens,
+            "renders": self._renders,
+            "section_cache_hits": self._section_hits,
+        }
+
+    def _render_section(self, section: str, template: str, values: Dict) -> Tuple[str, int]:
+        fields = self._section_fields[section]
+        if section not in self._memoize:
+            text = template.format_map({field: values.get(field, "") for field in fields})
+            return text, estimate_tokens(text)
+        key = (section,) + tuple(str(values.get(field, "")) for field in fields)
+        rendered = self._rendered.get(key)
+        if rendered is not None:
+            self._rendered.move_to_end(key)
+            self._section_hits += 1
+            return rendered
+        text = template.format_map(dict(zip(fields, key[1:])))
+        rendered = (text, estimate_tokens(text))
+        self._rendered[key] = rendered
+        while len(self._rendered) > self._section_cache_size:
+            self._rendered.popitem(last=False)
+        return rendered
+
+
+def _dedent(text: str) -> str:
+    """Strips the indentation the templates carry from being written inside classes."""
+    return textwrap.dedent(text).strip()
@@ -0,0 +1,238 @@
+import os
+import re
+import time
+import asyncio
+from collections import deque
+from typing import Dict, Mapping, Optional, Sequence
+
+from dotenv import load_dotenv
+
+import metrics
+
+load_dotenv()
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+# Suffixes naming a limit's window, as in x-ratelimit-limit-requests-day or -tokens-minute
+WINDOW_SUFFIXES = ("minute", "day")
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parses rate-limit reset headers such as "7.66s", "2m59.56s" or "120ms" into seconds."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: Optional[float] = None):
+        """
+        Refills continuously at `per_minute` per minute up to `per_minute`. A bucket with
+        no known limit never makes callers wait; the limit can be learned later from the
+        provider's response headers.
+        """
+        self.capacity: Optional[float] = None
+        self.level = 0.0
+        self._updated = time.monotonic()
+        if per_minute:
+            self.set_limit(per_minute)
+
+    def set_limit(self, per_minute: float) -> None:
+        if self.capacity is None:
+            self.level = per_minute
+        self.capacity = per_minute
+        self.level = min(self.level, per_minute)
+
+    def observe_remaining(self, remaining: float) -> None:
+        # The provider's count is authoritative, but only ever lowers ours; refill does the rest
+        self._refill()
+        self.level = min(self.level, remaining)
+
+    def time_until(self, amount: float) -> float:
+        if self.capacity is None:
+            return 0.0
+        self._refill()
+        # Requests larger than the whole bucket only wait for a full bucket
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed / (self.capacity / 60.0))
+
+    def take(self, amount: float) -> None:
+        if self.capacity is not None:
+            self._refill()
+            self.level -= amount
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + (now - self._updated) * self.capacity / 60.0)
+        self._updated = now
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        initial_concurrency: Optional[int] = None,
+        daily_limits: Sequence[str] = (),
+        name: str = "default",
+    ):
+        """
+        Admission control in front of one LLM backend. Callers queue (first come, first
+        served) until the requests-per-minute and tokens-per-minute buckets can cover them
+        and the adaptive concurrency limit has room, instead of being sent only to come back
+        with a 429.
+
+        The concurrency limit follows AIMD: it grows by one slot per limit's worth of fast
+        successes and halves on a 429 or when latency climbs well above its baseline,
+        never going above `max_concurrency`.
+
+        Limits are learned from x-ratelimit-* headers, whose window is read from the name:
+        a -day or -minute suffix says so, and the plain -requests / -tokens headers are per
+        minute except for the kinds in `daily_limits` (Groq's plain request limit is per
+        day). A daily quota is never paced by; once spent, calls wait for its reset. Queue
+        depth and waits are exported to Prometheus labelled with the backend `name`.
+        """
+        self.max_concurrency = max_concurrency
+        self.limit = float(min(max_concurrency, initial_concurrency or int(os.getenv("LLM_AIMD_INITIAL_CONCURRENCY", "16"))))
+        self.daily_limits = set(daily_limits)
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.in_flight = 0
+        self.waiting = 0
+        self.blocked_until = 0.0
+        self.baseline_latency: Optional[float] = None
+        self.throttled = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._waits: deque = deque(maxlen=500)
+        self._lock: Optional[asyncio.Lock] = None
+        self._released: Optional[asyncio.Event] = None
+
+    async def acquire(self, estimated_tokens: int) -> float:
+        """Waits for capacity, then reserves it; returns the seconds spent queued."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._released = asyncio.Event()
+        started = time.monotonic()
+        self.waiting += 1
+        metrics.LLM_QUEUE_DEPTH.labels(self.name).inc()
+        try:
+            # The lock queues callers in arrival order; only the head waits on the buckets
+            async with self._lock:
+                while True:
+                    if self.in_flight >= int(self.limit):
+                        self._released.clear()
+                        await self._released.wait()
+                        continue
+                    delay = max(
+                        self.blocked_until - time.monotonic(),
+                        self.requests.time_until(1),
+                        self.tokens.time_until(estimated_tokens),
+                    )
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                self.requests.take(1)
+                self.tokens.take(estimated_tokens)
+                self.in_flight += 1
+        finally:
+            self.waiting -= 1
+            metrics.LLM_QUEUE_DEPTH.labels(self.name).dec()
+        waited = time.monotonic() - started
+        self._waits.append(waited)
+        metrics.LLM_QUEUE_WAIT_SECONDS.labels(self.name).observe(waited)
+        return waited
+
+    def release(
+        self,
+        estimated_tokens: int,
+        headers: Optional[Mapping[str, str]] = None,
+        status_code: Optional[int] = None,
+        latency: Optional[float] = None,
+        used_tokens: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """Returns the slot and feeds what the response revealed back into the limits."""
+        self.in_flight -= 1
+        if used_tokens is not None:
+            # Settle the estimate against what the provider actually counted
+            self.tokens.take(used_tokens - estimated_tokens)
+        if headers:
+            self._observe_headers(headers)
+
+        if status_code == 429:
+            self.throttled += 1
+            self.blocked_until = max(self.blocked_until, time.monotonic() + (retry_after or 1.0))
+            self._decrease()
+        elif latency is not None and status_code is not None and status_code < 400:
+            if self.baseline_latency is None:
+                self.baseline_latency = latency
+            if latency > 3 * self.baseline_latency:
+                self._decrease()
+            else:
+                self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            # Slow-moving baseline so a sustained shift is eventually accepted as normal
+            self.baseline_latency = 0.95 * self.baseline_latency + 0.05 * latency
+
+        if self._released is not None:
+            self._released.set()
+
+    def saturated(self) -> bool:
+        return self.waiting > 0 or self.in_flight >= int(self.limit)
+
+    def stats(self) -> Dict:
+        waits = sorted(self._waits)
+        return {
+            "concurrency_limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "wait_ms_p50": round(waits[len(waits) // 2] * 1000) if waits else None,
+            "wait_ms_max": round(waits[-1] * 1000) if waits else None,
+            "requests_per_minute": self.requests.capacity,
+            "tokens_per_minute": self.tokens.capacity,
+            "throttled_429": self.throttled,
+            "concurrency_decreases": self.decreases,
+        }
+
+    def _decrease(self) -> None:
+        # One halving per latency-length window: responses already in flight report the same congestion
+        now = time.monotonic()
+        if now - self._last_decrease < (self.baseline_latency or 1.0):
+            return
+        self._last_decrease = now
+        self.limit = max(1.0, self.limit / 2)
+        self.decreases += 1
+
+    def _observe_headers(self, headers: Mapping[str, str]) -> None:
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            plain_window = "day" if kind in self.daily_limits else "minute"
+            for suffix, window in [("", plain_window)] + [(f"-{name}", name) for name in WINDOW_SUFFIXES]:
+                limit = _number(headers.get(f"x-ratelimit-limit-{kind}{suffix}"))
+                remaining = _number(headers.get(f"x-ratelimit-remaining-{kind}{suffix}"))
+                reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}{suffix}"))
+                if window == "day":
+                    # Not a rate to pace by, but once it is spent nothing gets through until it resets
+                    if remaining is not None and remaining <= 0:
+                        self.blocked_until = max(self.blocked_until, time.monotonic() + (reset or 60.0))
+                    continue
+                if limit:
+                    bucket.set_limit(limit)
+                if remaining is not None:
+                    bucket.observe_remaining(remaining)
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
@@ -0,0 +1,121 @@
+import os
+import asyncio
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PREWARM_PENDING = "pending"
+PREWARM_DONE = "done"
+PREWARM_FAILED = "failed"
+PREWARM_DISABLED = "disabled"
+
+_instances: Dict[str, Any] = {}
+_building: Dict[str, asyncio.Task] = {}
+prewarm_state = PREWARM_DISABLED
+
+
+def _build_email_service():
+    # Imported on first use: LangChain and the prompt templates dominate startup time
+    from email_service import EmailService
+    return EmailService()
+
+
+def _build_job_scraper():
+    from job_scraper_selenium import JobScraper
+    return JobScraper()
+
+
+FACTORIES: Dict[str, Callable[[], Any]] = {
+    "email_service": _build_email_service,
+    "job_scraper": _build_job_scraper,
+}
+
+
+async def _get(name: str) -> Any:
+    """
+    Returns the named service, constructing it on first use. Construction runs in a worker
+    thread so the imports it triggers never block the event loop, and concurrent first
+    callers share a single construction.
+    """
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+    task = _building.get(name)
+    if task is None:
+        task = asyncio.ensure_future(asyncio.to_thread(FACTORIES[name]))
+        _building[name] = task
+        task.add_done_callback(lambda done, name=name: _built(name, done))
+    return await asyncio.shield(task)
+
+
+def _built(name: str, task: asyncio.Task) -> None:
+    _building.pop(name, None)
+    # A failed construction is simply retried by the next caller
+    if not task.cancelled() and task.exception() is None:
+        _instances[name] = task.result()
+
+
+async def get_email_service():
+    """FastAPI dependency providing the shared EmailService."""
+    return await _get("email_service")
+
+
+async def get_job_scraper():
+    """FastAPI dependency providing the shared JobScraper."""
+    return await _get("job_scraper")
+
+
+def peek(name: str) -> Optional[Any]:
+    """The named service if it has been constructed, without constructing it."""
+    return _instances.get(name)
+
+
+def start_prewarm() -> Optional[asyncio.Task]:
+    """
+    Schedules construction of every service and the browser pool warm-up in the
+    background (unless PREWARM_ON_STARTUP=false). Startup does not wait for it, so the
+    worker binds its socket and answers liveness probes while warming up.
+    """
+    global prewarm_state
+    if os.getenv("PREWARM_ON_STARTUP", "true").lower() == "false":
+        prewarm_state = PREWARM_DISABLED
+        return None
+    prewarm_state = PREWARM_PENDING
+    return asyncio.create_task(_prewarm())
+
+
+async def _prewarm() -> None:
+    global prewarm_state
+    try:
+        await asyncio.gather(get_email_service(), get_job_scraper())
+    except Exception as e:
+        prewarm_state = PREWARM_FAILED
+        print(f"Pre-warm failed, services will start on first request: {str(e)}")
+        return
+    try:
+        # Start the headless browsers before traffic arrives so no request pays the cold start
+        await peek("job_scraper").browser_pool.start()
+    except Exception as e:
+        print(f"Browser pool warm-up failed, will retry on first request: {str(e)}")
+    try:
+        await peek("job_scraper").page_fetcher.html_cleaner.start()
+    except Exception as e:
+        print(f"HTML cleaner warm-up failed, workers will start on first use: {str(e)}")
+    prewarm_state = PREWARM_DONE
+
+
+def status() -> Dict:
+    return {
+        "prewarm": prewarm_state,
+        "constructed": sorted(_instances),
+    }
+
+
+async def close() -> None:
+    job_scraper = peek("job_scraper")
+    if job_scraper is not None:
+        await job_scraper.page_fetcher.close()
+        await job_scraper.browser_pool.close()
+        job_scraper.cache.close()
@@ -0,0 +1,215 @@
+import html as html_lib
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from bs4 import BeautifulSoup
+
+from structured_data import skills_from_text, summarize_description
+
+STRATEGY_AUTO = "auto"        # static HTML first, browser only if the text is insufficient
+STRATEGY_STATIC = "static"    # same as auto, but the site is known to serve full HTML
+STRATEGY_BROWSER = "browser"  # skip the static attempt, the site needs JavaScript or blocks plain clients
+STRATEGY_API = "api"          # read the posting from the board's public JSON API
+
+ApiFetcher = Callable[[httpx.AsyncClient, str], Awaitable[Optional[Dict]]]
+
+
+class SiteAdapter:
+    def __init__(
+        self,
+        name: str,
+        hosts: List[str],
+        fetch_strategy: str = STRATEGY_AUTO,
+        body_selectors: Optional[List[str]] = None,
+        wait_selector: Optional[str] = None,
+        field_selectors: Optional[Dict[str, str]] = None,
+        api_fetcher: Optional[ApiFetcher] = None,
+    ):
+        """
+        Describes how to scrape one job site:
+        - fetch_strategy: one of auto / static / browser / api
+        - body_selectors: CSS selectors holding the posting; only their text is extracted
+        - wait_selector: CSS selector the browser waits for instead of a fixed page load
+        - field_selectors: JobData field -> CSS selector, read directly from the page
+        - api_fetcher: coroutine returning {"structured": {...}, "text": "..."} for api sites
+        """
+        self.name = name
+        self.hosts = [host.lower() for host in hosts]
+        self.fetch_strategy = fetch_strategy
+        self.body_selectors = body_selectors or []
+        self.wait_selector = wait_selector
+        self.field_selectors = field_selectors or {}
+        self.api_fetcher = api_fetcher
+
+    def matches(self, host: str) -> bool:
+        return any(host == known or host.endswith("." + known) for known in self.hosts)
+
+    def describe(self) -> Dict:
+        return {"name": self.name, "hosts": self.hosts, "fetch_strategy": self.fetch_strategy}
+
+
+class SiteAdapterRegistry:
+    def __init__(self, default: SiteAdapter):
+        """Dispatches URLs to site adapters by hostname, falling back to `default`."""
+        self.default = default
+        self._adapters: List[SiteAdapter] = []
+
+    def register(self, adapter: SiteAdapter) -> SiteAdapter:
+        self._adapters.append(adapter)
+        return adapter
+
+    def resolve(self, url: str) -> SiteAdapter:
+        host = (urlsplit(url).hostname or "").lower()
+        for adapter in self._adapters:
+            if adapter.matches(host):
+                return adapter
+        return self.default
+
+    def adapters(self) -> List[SiteAdapter]:
+        return list(self._adapters)
+
+
+def _html_to_plain(fragment: str) -> str:
+    text = BeautifulSoup(html_lib.unescape(fragment or ""), "html.parser").get_text(separator="\n")
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+def _with_text_fields(structured: Dict, text: str) -> Dict:
+    """Derives the description summary and skills from the posting text the API returned."""
+    structured.setdefault("description", summarize_description(" ".join(text.split())))
+    structured.setdefault("skills", skills_from_text(text))
+    return structured
+
+
+def _path_parts(url: str) -> List[str]:
+    return [part for part in urlsplit(url).path.split("/") if part]
+
+
+async def fetch_greenhouse(client: httpx.AsyncClient, url: str) -> Optional[Dict]:
+    """boards.greenhouse.io/{board}/jobs/{id} -> Greenhouse Job Board API."""
+    parts = _path_parts(url)
+    if "jobs" not in parts or parts.index("jobs") == 0 or parts.index("jobs") + 1 >= len(parts):
+        return None
+    board, job_id = parts[parts.index("jobs") - 1], parts[parts.index("jobs") + 1]
+    response = await client.get(f"https://boards-api.greenhouse.io/v1/boards/{board}/jobs/{job_id}")
+    if response.status_code != 200:
+        return None
+    job = response.json()
+    text = _html_to_plain(job.get("content", ""))
+    return {
+        "structured": _with_text_fields({
+            "role": job.get("title", ""),
+            "company": job.get("company_name") or board.replace("-", " ").title(),
+            "location": (job.get("location") or {}).get("name", ""),
+        }, text),
+        "text": text,
+    }
+
+
+async def fetch_lever(client: httpx.AsyncClient, url: str) -> Optional[Dict]:
+    """jobs.lever.co/{company}/{id} -> Lever Postings API."""
+    parts = _path_parts(url)
+    if len(parts) < 2:
+        return None
+    company, posting_id = parts[0], parts[1]
+    response = await client.get(f"https://api.lever.co/v0/postings/{company}/{posting_id}")
+    if response.status_code != 200:
+        return None
+    posting = response.json()
+    categories = posting.get("categories") or {}
+    sections = [posting.get("descriptionPlain", "")]
+    for section in posting.get("lists") or []:
+        sections.append(section.get("text", ""))
+        sections.append(_html_to_plain(section.get("content", "")))
+    sections.append(posting.get("additionalPlain", ""))
+    workplace = (posting.get("workplaceType") or "").lower()
+    text = "\n".join(section for section in sections if section)
+    return {
+        "structured": _with_text_fields({
+            "role": posting.get("text", ""),
+            "company": company.replace("-", " ").title(),
+            "location": categories.get("location", ""),
+            "jobType": (categories.get("commitment") or "").lower() or None,
+            "remote": True if workplace == "remote" else False if workplace in ("onsite", "on-site") else None,
+        }, text),
+        "text": text,
+    }
+
+
+async def fetch_ashby(client: httpx.AsyncClient, url: str) -> Optional[Dict]:
+    """jobs.ashbyhq.com/{org}/{id} -> Ashby public job board API."""
+    parts = _path_parts(url)
+    if len(parts) < 2:
+        return None
+    organization, job_id = parts[0], parts[1]
+    response = await client.get(
+        f"https://api.ashbyhq.com/posting-api/job-board/{organization}",
+        params={"includeCompensation": "true"},
+    )
+    if response.status_code != 200:
+        return None
+    job = next((job for job in response.json().get("jobs", []) if job.get("id") == job_id), None)
+    if job is None:
+        return None
+    compensation = job.get("compensation") or {}
+    text = job.get("descriptionPlain") or _html_to_plain(job.get("descriptionHtml", ""))
+    return {
+        "structured": _with_text_fields({
+            "role": job.get("title", ""),
+            "company": organization.replace("-", " ").title(),
+            "location": job.get("location", ""),
+            "remote": job.get("isRemote"),
+            "jobType": (job.get("employmentType") or "").replace("FullTime", "full-time").replace("PartTime", "part-time").lower() or None,
+            "salary": compensation.get("compensationTierSummary") or None,
+        }, text),
+        "text": text,
+    }
+
+
+GENERIC_ADAPTER = SiteAdapter("Company Career Pages", [], STRATEGY_AUTO)
+
+
+def build_default_registry() -> SiteAdapterRegistry:
+    registry = SiteAdapterRegistry(GENERIC_ADAPTER)
+    registry.register(SiteAdapter(
+        "LinkedIn", ["linkedin.com"], STRATEGY_STATIC,
+        body_selectors=[".top-card-layout__entity-info", ".description__job-criteria-list", ".show-more-less-html__markup"],
+        wait_selector=".show-more-less-html__markup",
+        field_selectors={"role": ".top-card-layout__title", "company": ".topcard__org-name-link", "location": ".topcard__flavor--bullet"},
+    ))
+    registry.register(SiteAdapter(
+        "Indeed", ["indeed.com"], STRATEGY_BROWSER,
+        body_selectors=[".jobsearch-JobInfoHeader-title-container", "[data-testid='inlineHeader-companyName']", "#jobDescriptionText"],
+        wait_selector="#jobDescriptionText",
+        field_selectors={"role": "h1.jobsearch-JobInfoHeader-title", "company": "[data-testid='inlineHeader-companyName']"},
+    ))
+    registry.register(SiteAdapter(
+        "Glassdoor", ["glassdoor.com"], STRATEGY_BROWSER,
+        body_selectors=["[data-test='job-title']", "[data-test='employer-name']", "[class*='JobDetails_jobDescription']"],
+        wait_selector="[class*='JobDetails_jobDescription']",
+        field_selectors={"role": "[data-test='job-title']", "company": "[data-test='employer-name']"},
+    ))
+    registry.register(SiteAdapter("Greenhouse", ["greenhouse.io"], STRATEGY_API, api_fetcher=fetch_greenhouse))
+    registry.register(SiteAdapter("Lever", ["jobs.lever.co"], STRATEGY_API, api_fetcher=fetch_lever))
+    registry.register(SiteAdapter("Ashby", ["jobs.ashbyhq.com"], STRATEGY_API, api_fetcher=fetch_ashby))
+    registry.register(SiteAdapter(
+        "Wellfound (AngelList)", ["wellfound.com", "angel.co"], STRATEGY_BROWSER,
+        wait_selector="h1",
+    ))
+    registry.register(SiteAdapter(
+        "GitHub", ["github.careers", "github.com"], STRATEGY_STATIC,
+        body_selectors=["main"],
+    ))
+    registry.register(SiteAdapter(
+        "Stack Overflow Jobs", ["stackoverflow.com", "stackoverflow.jobs"], STRATEGY_STATIC,
+    ))
+    registry.register(SiteAdapter(
+        "Remote.co", ["remote.co"], STRATEGY_STATIC,
+        body_selectors=[".job_description", "h1"],
+    ))
+    registry.register(SiteAdapter(
+        "We Work Remotely", ["weworkremotely.com"], STRATEGY_STATIC,
+        body_selectors=[".listing-header-container", "#job-listing-show-container"],
+    ))
+    return registry
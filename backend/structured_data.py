@@ -0,0 +1,264 @@
+import re
+import json
+import html as html_lib
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from bs4 import BeautifulSoup
+
+LD_JSON_SCRIPT = re.compile(
+    r"<script[^>]*type\s*=\s*[\"']application/ld\+json[\"'][^>]*>(.*?)</script>",
+    re.IGNORECASE | re.DOTALL,
+)
+META_TAG = re.compile(r"<meta\s+[^>]*>", re.IGNORECASE)
+META_ATTR = re.compile(r"(property|name|content)\s*=\s*(\"[^\"]*\"|'[^']*')", re.IGNORECASE)
+TITLE_SUFFIX = re.compile(r"\s*[|\-–—]\s*(linkedin|indeed(?:\.com)?|glassdoor|greenhouse|lever|workable|ashby)\s*$", re.IGNORECASE)
+
+EMPLOYMENT_TYPES = {
+    "FULL_TIME": "full-time",
+    "FULLTIME": "full-time",
+    "PART_TIME": "part-time",
+    "PARTTIME": "part-time",
+    "CONTRACTOR": "contract",
+    "CONTRACT": "contract",
+    "TEMPORARY": "contract",
+    "FREELANCE": "freelance",
+}
+SALARY_UNITS = {"HOUR": "hour", "DAY": "day", "WEEK": "week", "MONTH": "month", "YEAR": "year"}
+
+# Skills recognised in free-text descriptions when the posting has no explicit `skills` property
+KNOWN_SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "React", "Angular", "Vue.js", "Node.js", "Go", "Rust", "C++",
+    "C#", ".NET", "Ruby on Rails", "Ruby", "PHP", "Kotlin", "Swift", "Scala", "SQL", "PostgreSQL", "MySQL",
+    "MongoDB", "Redis", "Kafka", "Spark", "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform", "Linux",
+    "Git", "CI/CD", "GraphQL", "REST", "Microservices", "Django", "Flask", "FastAPI", "Spring", "HTML", "CSS",
+    "Tailwind", "Figma", "TensorFlow", "PyTorch", "Machine Learning", "Tableau", "Excel", "Agile", "Scrum",
+]
+KNOWN_SKILL_PATTERNS = [
+    (skill, re.compile(r"(?<![\w.+#])" + re.escape(skill) + r"(?![\w+#])", re.IGNORECASE if len(skill) > 3 else 0))
+    for skill in KNOWN_SKILLS
+]
+
+# Fields the extraction prompt is responsible for; when all are present the LLM is skipped
+REQUIRED_FIELDS = ("role", "company", "description", "skills")
+
+
+def extract_json_ld_job_data(page_html: str) -> Dict:
+    """
+    Reads the schema.org JobPosting JSON-LD embedded in page HTML and maps it onto
+    JobData fields. Only fields that were actually found are returned.
+    """
+    if not page_html:
+        return {}
+    posting = next(_find_job_postings(page_html), None)
+    return _compact(_map_job_posting(posting)) if posting else {}
+
+
+def extract_open_graph_job_data(page_html: str) -> Dict:
+    """
+    Reads OpenGraph / meta description tags. These are less precise than JSON-LD
+    (titles often read "Acme hiring X in Y"), so callers should only use them to fill gaps.
+    """
+    if not page_html:
+        return {}
+    return _compact(_read_open_graph(page_html))
+
+
+def has_job_posting(page_html: str) -> bool:
+    """True if the page embeds a schema.org JobPosting."""
+    return bool(page_html) and next(_find_job_postings(page_html), None) is not None
+
+
+def is_complete(data: Dict) -> bool:
+    return all(data.get(field) for field in REQUIRED_FIELDS)
+
+
+def missing_fields(data: Dict, fields: Sequence[str] = REQUIRED_FIELDS) -> List[str]:
+    return [field for field in fields if data.get(field) in (None, "", [])]
+
+
+def _compact(data: Dict) -> Dict:
+    return {key: value for key, value in data.items() if value not in (None, "", [])}
+
+
+def _find_job_postings(page_html: str) -> Iterator[Dict]:
+    for match in LD_JSON_SCRIPT.finditer(page_html):
+        try:
+            document = json.loads(match.group(1).strip(), strict=False)
+        except ValueError:
+            continue
+        yield from _walk_for_postings(document)
+
+
+def _walk_for_postings(node: Any) -> Iterator[Dict]:
+    if isinstance(node, list):
+        for item in node:
+            yield from _walk_for_postings(item)
+    elif isinstance(node, dict):
+        node_type = node.get("@type")
+        types = node_type if isinstance(node_type, list) else [node_type]
+        if "JobPosting" in types:
+            yield node
+        if "@graph" in node:
+            yield from _walk_for_postings(node["@graph"])
+
+
+def _map_job_posting(posting: Dict) -> Dict:
+    location, remote = _format_location(posting)
+    return {
+        "role": _text(posting.get("title")),
+        "company": _organization_name(posting.get("hiringOrganization")),
+        "description": summarize_description(_text(posting.get("description"))),
+        "skills": _skills(posting.get("skills")) or skills_from_text(_text(posting.get("description"))),
+        "experience": _experience(posting.get("experienceRequirements")),
+        "location": location,
+        "salary": _format_salary(posting.get("baseSalary") or posting.get("estimatedSalary")),
+        "remote": remote,
+        "jobType": _employment_type(posting.get("employmentType")),
+    }
+
+
+def _read_open_graph(page_html: str) -> Dict:
+    meta = {}
+    for tag in META_TAG.finditer(page_html):
+        attributes = {key.lower(): value[1:-1] for key, value in META_ATTR.findall(tag.group(0))}
+        key = attributes.get("property") or attributes.get("name")
+        if key and "content" in attributes:
+            meta.setdefault(key.lower(), html_lib.unescape(attributes["content"]).strip())
+    data = {}
+    if meta.get("og:title"):
+        data["role"] = TITLE_SUFFIX.sub("", meta["og:title"]).strip()
+    description = meta.get("og:description") or meta.get("description")
+    if description:
+        data["description"] = summarize_description(description)
+    return data
+
+
+def _text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = " ".join(str(item) for item in value)
+    text = html_lib.unescape(str(value))
+    if "<" in text:
+        text = BeautifulSoup(text, "html.parser").get_text(separator=" ")
+    return " ".join(text.split())
+
+
+def summarize_description(text: str, max_sentences: int = 3, max_chars: int = 600) -> str:
+    """
+    Trims a full posting description to the brief summary the API returns: its first
+    `max_sentences` sentences, fewer if they would run past `max_chars`. Only a first
+    sentence that is too long on its own is cut mid-sentence, at a word.
+    """
+    summary = ""
+    for sentence in re.split(r"(?<=[.!?])\s+", text.strip())[:max_sentences]:
+        candidate = f"{summary} {sentence}" if summary else sentence
+        if len(candidate) > max_chars:
+            break
+        summary = candidate
+    if summary or not text.strip():
+        return summary
+    return text.strip()[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+def _organization_name(organization: Any) -> str:
+    if isinstance(organization, dict):
+        return _text(organization.get("name"))
+    if isinstance(organization, list) and organization:
+        return _organization_name(organization[0])
+    return _text(organization)
+
+
+def _skills(skills: Any) -> List[str]:
+    if not skills:
+        return []
+    if isinstance(skills, list):
+        items = [_text(item.get("name") if isinstance(item, dict) else item) for item in skills]
+    else:
+        items = re.split(r"[,;•|\n]", _text(skills))
+    return [item.strip() for item in items if item.strip()]
+
+
+def skills_from_text(text: str, min_matches: int = 2) -> List[str]:
+    """Picks well-known technologies out of a description; too few matches counts as none."""
+    found = [skill for skill, pattern in KNOWN_SKILL_PATTERNS if pattern.search(text)]
+    if "Ruby on Rails" in found and "Ruby" in found:
+        found.remove("Ruby")
+    return found if len(found) >= min_matches else []
+
+
+def _experience(requirement: Any) -> str:
+    if isinstance(requirement, dict):
+        months = requirement.get("monthsOfExperience")
+        try:
+            months = float(months)
+        except (TypeError, ValueError):
+            return _text(requirement.get("description"))
+        years = months / 12
+        return f"{years:g}+ years" if years >= 1 else f"{months:g}+ months"
+    return _text(requirement)
+
+
+def _format_location(posting: Dict):
+    location_type = _text(posting.get("jobLocationType")).upper()
+    remote = True if location_type == "TELECOMMUTE" else None
+
+    places = posting.get("jobLocation") or []
+    if not isinstance(places, list):
+        places = [places]
+    labels = []
+    for place in places:
+        address = place.get("address") if isinstance(place, dict) else place
+        if isinstance(address, dict):
+            parts = [_text(address.get(key)) for key in ("addressLocality", "addressRegion")]
+            country = address.get("addressCountry")
+            parts.append(_text(country.get("name") if isinstance(country, dict) else country))
+            label = ", ".join(part for part in parts if part)
+        else:
+            label = _text(address)
+        if label and label not in labels:
+            labels.append(label)
+
+    if labels:
+        return "; ".join(labels), remote
+    return ("Remote" if remote else ""), remote
+
+
+def _format_salary(salary: Any) -> str:
+    if isinstance(salary, list):
+        salary = salary[0] if salary else None
+    if not isinstance(salary, dict):
+        return _text(salary)
+    currency = _text(salary.get("currency"))
+    value = salary.get("value")
+    unit = ""
+    if isinstance(value, dict):
+        unit = SALARY_UNITS.get(_text(value.get("unitText")).upper(), _text(value.get("unitText")).lower())
+        low, high = value.get("minValue"), value.get("maxValue")
+        amount = value.get("value")
+        if low is not None and high is not None and low != high:
+            figure = f"{_number(low)} - {_number(high)}"
+        else:
+            figure = _number(amount if amount is not None else (low if low is not None else high))
+    else:
+        figure = _number(value)
+    if not figure:
+        return ""
+    return " ".join(part for part in (currency, figure, f"per {unit}" if unit else "") if part)
+
+
+def _number(value: Any) -> str:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return _text(value)
+    return f"{number:,.0f}" if number == int(number) else f"{number:,.2f}"
+
+
+def _employment_type(employment_type: Any) -> Optional[str]:
+    values = employment_type if isinstance(employment_type, list) else [employment_type]
+    for value in values:
+        mapped = EMPLOYMENT_TYPES.get(_text(value).upper().replace("-", "_").replace(" ", "_"))
+        if mapped:
+            return mapped
+    return None
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import sys
+import os
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+from batch_runner import HostConcurrencyLimiter, run_bounded
+
+def test_work_is_capped_per_host_and_overall():
+    """No host should exceed its cap, nor the batch the global one"""
+    limiter = HostConcurrencyLimiter(global_limit=3, per_host_limit=2)
+    running = {"total": 0, "peak": 0}
+    per_host = {}
+    peaks = {}
+
+    async def work(url):
+        host = url.split("/")[2]
+        per_host[host] = per_host.get(host, 0) + 1
+        running["total"] += 1
+        peaks[host] = max(peaks.get(host, 0), per_host[host])
+        running["peak"] = max(running["peak"], running["total"])
+        await asyncio.sleep(0.01)
+        per_host[host] -= 1
+        running["total"] -= 1
+        return url
+
+    urls = [f"https://{host}/job/{number}" for host in ("a.example", "b.example") for number in range(5)]
+
+    async def run():
+        return [result async for result in run_bounded(urls, work, limiter.slot)]
+
+    results = asyncio.run(run())
+    assert sorted(result[2] for result in results) == sorted(urls)
+    assert peaks == {"a.example": 2, "b.example": 2}
+    assert running["peak"] == 3
+
+def test_results_arrive_in_completion_order_and_errors_stay_per_item():
+    """A slow item should not hold back fast ones, and a failing item should only fail itself"""
+    async def work(delay):
+        await asyncio.sleep(delay)
+        if delay == 0.02:
+            raise ValueError("page not found")
+        return delay * 1000
+
+    async def run():
+        return [result async for result in run_bounded([0.05, 0.0, 0.02], work)]
+
+    results = asyncio.run(run())
+    assert [index for index, _, _, _ in results] == [1, 2, 0]
+    assert results[0][2] == 0.0 and results[2][2] == 50.0
+    assert isinstance(results[1][3], ValueError)
+
+def test_outstanding_work_is_cancelled_when_the_consumer_stops():
+    """Leaving the stream early (a client disconnecting) should cancel what has not finished"""
+    cancelled = []
+
+    async def work(delay):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(delay)
+            raise
+        return delay
+
+    async def run():
+        stream = run_bounded([0.0, 1.0, 2.0], work)
+        first = await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0)
+        return first
+
+    assert asyncio.run(run())[2] == 0.0
+    assert sorted(cancelled) == [1.0, 2.0]
+
+def test_batch_endpoint_streams_ndjson():
+    """/api/extract-jobs should stream one line per URL, with failures reported inline"""
+    from fastapi.testclient import TestClient
+    import main
+    from services import get_job_scraper
+
+    class FakeScraper:
+        def __init__(self):
+            self.extracted = []
+
+        async def extract_job_data(self, url):
+            self.extracted.append(url)
+            await asyncio.sleep(0.01)
+            if "missing" in url:
+                raise Exception("Failed to extract job data: 404")
+            return {"role": "Backend Engineer", "company": "Acme", "description": "Build APIs", "skills": ["Python"],
+                    "_meta": {"fetch_tier": "static", "cache": "miss"}}
+
+    scraper = FakeScraper()
+    main.app.dependency_overrides[get_job_scraper] = lambda: scraper
+    try:
+        urls = ["https://jobs.example.com/1", "https://jobs.example.com/missing", "https://jobs.example.com/1?utm_source=x"]
+        response = TestClient(main.app).post("/api/extract-jobs", json={"urls": urls})
+    finally:
+        main.app.dependency_overrides.clear()
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+    assert [line["ok"] for line in lines] == [True, False, True]
+    assert lines[0]["data"]["role"] == "Backend Engineer" and lines[0]["fetchTier"] == "static"
+    assert "404" in lines[1]["error"]
+    # The same posting behind a tracking link shares the one extraction
+    assert len(scraper.extracted) == 2
+
+def main():
+    """Run all tests"""
+    print("Running batch runner tests...")
+    tests = [
+        test_work_is_capped_per_host_and_overall,
+        test_results_arrive_in_completion_order_and_errors_stay_per_item,
+        test_outstanding_work_is_cancelled_when_the_consumer_stops,
+        test_batch_endpoint_streams_ndjson,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
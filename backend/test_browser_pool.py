@@ -0,0 +1,171 @@
+import asyncio
+import sys
+import os
+import time
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from browser_pool import BrowserPool, BrowserPoolExhausted
+
+class FakeDriver:
+    """Stands in for a WebDriver: answers the liveness check until it is killed"""
+
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.quit_called = False
+
+    def execute_script(self, script, *args):
+        if not self.alive:
+            raise RuntimeError("chrome not reachable")
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+class FakePool(BrowserPool):
+    """A pool launching FakeDrivers, slowly, failing the launches listed in `failures`"""
+
+    def __init__(self, failures=(), launch_seconds=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.launched = []
+        self.failures = set(failures)
+        self.launch_seconds = launch_seconds
+        self.attempts = 0
+
+    def _create_driver(self):
+        self.attempts += 1
+        if self.attempts in self.failures:
+            raise RuntimeError("chrome failed to start")
+        time.sleep(self.launch_seconds)
+        driver = FakeDriver(len(self.launched) + 1)
+        self.launched.append(driver)
+        return driver
+
+async def _use(pool):
+    async with pool.acquire() as driver:
+        return driver
+
+def test_worn_out_drivers_are_recycled_after_release():
+    """A driver at its page limit should be replaced in the background, not by the next caller"""
+    pool = FakePool(size=1, max_pages_per_driver=2, launch_seconds=0.2)
+
+    async def run():
+        await pool.start()
+        first, second = await _use(pool), await _use(pool)
+        # The replacement launches in the background; checkout waits only for it to be idle
+        assert pool.stats()["replacing"] == 1
+        third = await _use(pool)
+        await pool.close()
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first is second and first.quit_called
+    assert third.number == 2
+    assert pool.stats()["recycled"] == 1
+
+def test_dead_idle_drivers_are_skipped_at_checkout():
+    """A driver that died while idle should be replaced and the caller given a live one"""
+    pool = FakePool(size=2)
+
+    async def run():
+        await pool.start()
+        pool.launched[0].alive = False
+        driver = await _use(pool)
+        await asyncio.sleep(0.05)
+        stats = pool.stats()
+        await pool.close()
+        return driver, stats
+
+    driver, stats = asyncio.run(run())
+    assert driver.number == 2
+    assert stats["alive"] == 2 and stats["recycled"] == 1 and not stats["degraded"]
+
+def test_failed_replacements_are_retried_and_reported():
+    """A relaunch that fails should be retried with backoff while the pool reports degraded capacity"""
+    pool = FakePool(size=2, failures=(2, 3), replace_backoff=0.05)
+
+    async def run():
+        await pool.start()
+        degraded = pool.stats()
+        await asyncio.sleep(0.3)
+        restored = pool.stats()
+        await pool.close()
+        return degraded, restored
+
+    degraded, restored = asyncio.run(run())
+    assert degraded["alive"] == 1 and degraded["degraded"]
+    assert restored["alive"] == 2 and not restored["degraded"]
+    assert restored["replace_failures"] == 1
+
+def test_cancelled_checkout_does_not_leak_the_driver():
+    """A caller cancelled during the liveness check should leave the pool usable"""
+    pool = FakePool(size=1, acquire_timeout=1)
+
+    async def run():
+        await pool.start()
+        pool._is_alive = lambda driver: time.sleep(0.1) or driver.alive
+        caller = asyncio.create_task(_use(pool))
+        await asyncio.sleep(0.02)
+        caller.cancel()
+        try:
+            await caller
+        except asyncio.CancelledError:
+            pass
+        driver = await _use(pool)
+        stats = pool.stats()
+        await pool.close()
+        return driver, stats
+
+    driver, stats = asyncio.run(run())
+    # The slot with the unfinished check was replaced rather than handed out again
+    assert driver.number == 2 and pool.launched[0].quit_called
+    assert stats["alive"] == 1 and stats["idle"] == 1
+
+def test_full_wait_queue_is_rejected():
+    """Callers beyond max_waiters should be turned away instead of queueing"""
+    pool = FakePool(size=1, max_waiters=1, acquire_timeout=0.1)
+
+    async def run():
+        await pool.start()
+        async with pool.acquire():
+            waiter = asyncio.create_task(_use(pool))
+            await asyncio.sleep(0.01)
+            try:
+                await _use(pool)
+                rejected = False
+            except BrowserPoolExhausted:
+                rejected = True
+            try:
+                await waiter
+            except BrowserPoolExhausted:
+                pass
+        await pool.close()
+        return rejected
+
+    assert asyncio.run(run())
+    assert pool.stats()["rejected"] == 2
+
+def main():
+    """Run all tests"""
+    print("Running browser pool tests...")
+    tests = [
+        test_worn_out_drivers_are_recycled_after_release,
+        test_dead_idle_drivers_are_skipped_at_checkout,
+        test_failed_replacements_are_retried_and_reported,
+        test_cancelled_checkout_does_not_leak_the_driver,
+        test_full_wait_queue_is_rejected,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import llm_client
+from batch_runner import RateLimitAwareScheduler
+from email_cache import EmailCache
+from email_service import EmailService
+from llm_router import LLMBackendError
+
+APPLICANT = {"name": "Jane Doe", "email": "jane@example.com", "skills": "Python and FastAPI"}
+JOBS = [
+    {"role": "Backend Engineer", "company": "Acme", "description": "Build APIs", "skills": ["Python"]},
+    {"role": "Platform Engineer", "company": "Globex", "description": "Run the platform", "skills": ["Go"]},
+    {"role": "Data Engineer", "company": "Initech", "description": "Own the pipelines", "skills": ["SQL"]},
+]
+
+def _answer(prompt_data):
+    content = f"Dear Hiring Manager, I would love to join {prompt_data['company']} as a {prompt_data['role']}. Best regards, {prompt_data['name']}"
+    return SimpleNamespace(content=json.dumps({"subject": f"{prompt_data['role']} at {prompt_data['company']}", "content": content}))
+
+def test_rate_limited_calls_pause_the_batch_and_are_retried():
+    """A 429 should hold back every call for Retry-After and retry the one that hit it"""
+    scheduler = RateLimitAwareScheduler(concurrency=2, base_delay=0.01)
+    attempts = []
+
+    async def call(number):
+        attempts.append((number, time.monotonic()))
+        if number == 0 and len(attempts) == 1:
+            raise LLMBackendError("groq", "rate limited", 429, retry_after=0.05)
+        return number
+
+    async def run():
+        started = time.monotonic()
+        first = asyncio.create_task(scheduler.run(lambda: call(0)))
+        await asyncio.sleep(0.01)
+        results = await asyncio.gather(first, scheduler.run(lambda: call(1)))
+        return results, started
+
+    results, started = asyncio.run(run())
+    assert results == [0, 1]
+    assert scheduler.rate_limited == 1
+    # Both the retry and the call that arrived during the pause waited out the Retry-After
+    assert all(at - started >= 0.05 for _, at in attempts[1:])
+
+def test_other_errors_are_not_retried():
+    """Only rate limits are retried; anything else fails that one call"""
+    scheduler = RateLimitAwareScheduler(concurrency=1)
+    calls = []
+
+    async def call():
+        calls.append(1)
+        raise LLMBackendError("groq", "bad request", 400)
+
+    try:
+        asyncio.run(scheduler.run(call))
+        raised = False
+    except LLMBackendError:
+        raised = True
+    assert raised and len(calls) == 1
+
+def test_applicant_fields_are_built_once_per_batch():
+    """Prompts built from shared applicant fields should match the per-request ones"""
+    service = EmailService()
+    fields = service.build_applicant_fields(APPLICANT)
+    for job in JOBS:
+        assert service._build_prompt_data(job, APPLICANT, fields) == service._build_prompt_data(job, APPLICANT)
+
+def test_bulk_endpoint_streams_one_line_per_job():
+    """/api/generate-emails should stream an NDJSON line per job, addressed to each company"""
+    from fastapi.testclient import TestClient
+    import main
+    from services import get_email_service
+
+    prompts = []
+
+    async def fake_ainvoke(chain, prompt_data):
+        prompts.append(prompt_data)
+        await asyncio.sleep(0.01)
+        return _answer(prompt_data)
+
+    service = EmailService()
+    service.cache = EmailCache(ttl_seconds=60, max_entries=10)
+    original_build = service.build_applicant_fields
+    builds = []
+    service.build_applicant_fields = lambda personal_info: builds.append(1) or original_build(personal_info)
+    main.app.dependency_overrides[get_email_service] = lambda: service
+    original = llm_client.ainvoke
+    llm_client.ainvoke = fake_ainvoke
+    try:
+        response = TestClient(main.app).post("/api/generate-emails", json={"personalInfo": APPLICANT, "jobs": JOBS})
+    finally:
+        llm_client.ainvoke = original
+        main.app.dependency_overrides.clear()
+    lines = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+    assert [line["company"] for line in lines] == ["Acme", "Globex", "Initech"]
+    assert all(line["ok"] for line in lines)
+    assert lines[1]["data"]["subject"] == "Platform Engineer at Globex"
+    assert len(builds) == 1 and len(prompts) == 3
+
+def main():
+    """Run all tests"""
+    print("Running bulk email tests...")
+    tests = [
+        test_rate_limited_calls_pause_the_batch_and_are_retried,
+        test_other_errors_are_not_retried,
+        test_applicant_fields_are_built_once_per_batch,
+        test_bulk_endpoint_streams_one_line_per_job,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
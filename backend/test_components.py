@@ -6,14 +6,14 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from email_service import EmailService
-from job_scraper import JobScraper
+from job_scraper_selenium import JobScraper
 
 async def test_email_service():
     """Test the email service"""
     print("Testing Email Service...")
     try:
         email_service = EmailService()
-        status = email_service.test_connection()
+        status = await email_service.test_connection()
         print(f"Email Service Status: {status}")
         return status == "online"
     except Exception as e:
@@ -25,7 +25,7 @@ async def test_job_scraper():
     print("Testing Job Scraper...")
     try:
         job_scraper = JobScraper()
-        status = job_scraper.test_connection()
+        status = await job_scraper.test_connection()
         print(f"Job Scraper Status: {status}")
         return status == "online"
     except Exception as e:
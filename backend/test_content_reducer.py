@@ -0,0 +1,62 @@
+import sys
+import os
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from content_reducer import ContentReducer, estimate_tokens
+
+POSTING = "\n".join([
+    "Senior Backend Engineer",
+    "Acme Corp · Remote",
+    "Sign in to apply",
+    "About the role",
+    "You will build Python APIs with FastAPI and PostgreSQL on AWS.",
+    "You will build Python APIs with FastAPI and PostgreSQL on AWS.",
+    "Requirements",
+    "5+ years experience with Python, Docker and Kubernetes",
+    "Similar jobs",
+] + [f"Data Engineer at Company {i} · {i} applicants · Promoted" for i in range(300)])
+
+def test_reduces_to_budget_and_keeps_posting():
+    """Listings and sign-in prompts should be dropped before the posting itself"""
+    result = ContentReducer(token_budget=200).reduce(POSTING)
+    assert result.tokens_after <= 200
+    assert result.tokens_saved > 0
+    assert "Senior Backend Engineer" in result.text
+    assert "5+ years experience with Python, Docker and Kubernetes" in result.text
+    assert "Sign in to apply" not in result.text
+    assert "Company 42" not in result.text
+
+def test_repeated_blocks_are_deduplicated():
+    """The same block repeated on the page should only be sent once"""
+    result = ContentReducer(token_budget=200).reduce(POSTING)
+    assert result.text.count("You will build Python APIs") == 1
+
+def test_short_pages_are_left_mostly_intact():
+    """Pages already within budget only lose boilerplate"""
+    text = "Junior Developer\nGlobex\nResponsibilities\nWrite JavaScript and React code"
+    result = ContentReducer(token_budget=3000).reduce(text)
+    assert result.text == text
+    assert result.tokens_before == estimate_tokens(text)
+
+def main():
+    """Run all tests"""
+    print("Running content reducer tests...")
+    tests = [
+        test_reduces_to_budget_and_keeps_posting,
+        test_repeated_blocks_are_deduplicated,
+        test_short_pages_are_left_mostly_intact,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,205 @@
+import asyncio
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import llm_client
+from email_cache import EmailCache, job_hash, minhash, similarity
+from email_service import EmailService
+
+JOB = {"role": "Backend Engineer", "company": "Acme", "description": "Build APIs", "skills": ["Python", "FastAPI"]}
+SKILLS = "Five years of Python and FastAPI backend development with PostgreSQL and Redis"
+IDENTITY = {"name": "Jane Doe", "email": "jane@example.com", "phone": "", "portfolio": "", "linkedin": "", "github": ""}
+
+def test_job_hash_ignores_formatting():
+    """The same posting with different casing, spacing or skill order should hash alike"""
+    reformatted = {"role": " backend  engineer", "company": "ACME", "description": "Build APIs", "skills": ["FastAPI", "Python"], "salary": None}
+    assert job_hash(JOB) == job_hash(reformatted)
+    assert job_hash(JOB) != job_hash(dict(JOB, company="Globex"))
+
+def test_exact_hits_are_isolated_per_tenant():
+    """A draft cached for one tenant should never be served to another"""
+    cache = EmailCache(ttl_seconds=60, max_entries=10, similarity_threshold=0)
+    cache.set("tenant-a", "job", "prompt", {"subject": "Hi"}, SKILLS, IDENTITY)
+    kind, email, _ = cache.lookup("tenant-a", "job", "prompt", SKILLS, IDENTITY)
+    assert (kind, email) == ("exact", {"subject": "Hi"})
+    assert cache.lookup("tenant-b", "job", "prompt", SKILLS, IDENTITY) is None
+    assert cache.stats()["hits"]["exact"] == 1 and cache.stats()["misses"] == 1
+
+def test_entries_expire_and_are_evicted_least_recently_used_first():
+    """Entries past their TTL, and the least recently used beyond the cap, should be dropped"""
+    cache = EmailCache(ttl_seconds=60, max_entries=2, similarity_threshold=0)
+    cache.set("t", "job", "first", {"n": 1}, SKILLS, IDENTITY)
+    cache.set("t", "job", "second", {"n": 2}, SKILLS, IDENTITY)
+    cache.lookup("t", "job", "first", SKILLS, IDENTITY)
+    cache.set("t", "job", "third", {"n": 3}, SKILLS, IDENTITY)
+    assert cache.lookup("t", "job", "second", SKILLS, IDENTITY) is None
+    assert cache.lookup("t", "job", "first", SKILLS, IDENTITY) is not None
+
+    expiring = EmailCache(ttl_seconds=0.01, max_entries=10, similarity_threshold=0)
+    expiring.set("t", "job", "prompt", {"n": 1}, SKILLS, IDENTITY)
+    time.sleep(0.02)
+    assert expiring.lookup("t", "job", "prompt", SKILLS, IDENTITY) is None
+    assert expiring.stats()["entries"] == 0
+
+def test_similar_skills_reuse_a_draft_for_the_same_job():
+    """A near-duplicate skill blurb should match a prior draft for the same posting only"""
+    similar = "Five years of Python and FastAPI backend development with PostgreSQL and Redis caching"
+    assert similarity(minhash(SKILLS), minhash(similar)) > 0.6
+    assert similarity(minhash(SKILLS), minhash("Figma, illustration and brand identity design")) < 0.2
+
+    cache = EmailCache(ttl_seconds=60, max_entries=10, similarity_threshold=0.6)
+    cache.set("t", "job", "prompt-jane", {"subject": "Hi"}, SKILLS, IDENTITY)
+    other = dict(IDENTITY, name="John Roe", email="john@example.com")
+    kind, _, previous = cache.lookup("t", "job", "prompt-john", similar, other)
+    assert kind == "similar" and previous["name"] == "Jane Doe"
+    assert cache.lookup("t", "other-job", "prompt-john", similar, other) is None
+    assert cache.lookup("t", "job", "prompt-john", "Figma, illustration and brand identity design", other) is None
+    # A draft without a phone number cannot be re-addressed to an applicant who has one
+    assert cache.lookup("t", "job", "prompt-john", similar, dict(other, phone="555-0100")) is None
+
+def test_email_service_serves_repeats_from_the_cache():
+    """Repeats should skip the LLM, similar applicants get a re-addressed draft, and force regenerates"""
+    calls = []
+
+    async def fake_ainvoke(chain, prompt_data):
+        calls.append(prompt_data["name"])
+        content = f"Dear Hiring Manager, I would love to join Acme as a Backend Engineer using Python and FastAPI. Best regards, {prompt_data['name']}"
+        return SimpleNamespace(content='{"subject": "Backend Engineer at Acme", "content": "%s"}' % content)
+
+    original = llm_client.ainvoke
+    llm_client.ainvoke = fake_ainvoke
+    try:
+        service = EmailService()
+        service.cache = EmailCache(ttl_seconds=60, max_entries=10, similarity_threshold=0.6)
+        jane = {"name": "Jane Doe", "email": "jane@example.com", "skills": SKILLS}
+        john = {"name": "John Roe", "email": "john@example.com", "skills": SKILLS + " caching"}
+
+        async def run():
+            first = await service.generate_email(JOB, jane, tenant="acme")
+            repeat = await service.generate_email(JOB, jane, tenant="acme")
+            similar = await service.generate_email(JOB, john, tenant="acme")
+            other_tenant = await service.generate_email(JOB, jane, tenant="other")
+            forced = await service.generate_email(JOB, jane, tenant="acme", force=True)
+            return first, repeat, similar, other_tenant, forced
+
+        first, repeat, similar, other_tenant, forced = asyncio.run(run())
+    finally:
+        llm_client.ainvoke = original
+
+    assert [first["_meta"]["cache"], repeat["_meta"]["cache"], similar["_meta"]["cache"]] == ["miss", "exact", "similar"]
+    assert other_tenant["_meta"]["cache"] == "miss" and forced["_meta"]["cache"] == "bypass"
+    assert calls == ["Jane Doe", "Jane Doe", "Jane Doe"]
+    assert "John Roe" in similar["content"] and "Jane" not in similar["content"]
+
+def test_another_applicants_own_words_are_never_reused():
+    """A similar draft should not carry one applicant's experience to another, nor cross the shared partition"""
+    calls = []
+
+    async def fake_ainvoke(chain, prompt_data):
+        calls.append(prompt_data["name"])
+        content = f"Dear Hiring Manager, {prompt_data['personal_experience']} Best regards, {prompt_data['name']}"
+        return SimpleNamespace(content='{"subject": "Backend Engineer at Acme", "content": "%s"}' % content)
+
+    original = llm_client.ainvoke
+    llm_client.ainvoke = fake_ainvoke
+    try:
+        service = EmailService()
+        service.cache = EmailCache(ttl_seconds=60, max_entries=10, similarity_threshold=0.6)
+        jane = {"name": "Jane Doe", "email": "jane@example.com", "skills": SKILLS, "experience": "I led the payments rewrite at Initech."}
+        john = {"name": "John Roe", "email": "john@example.com", "skills": SKILLS + " caching", "experience": "I ran the data team at Globex."}
+
+        async def run():
+            await service.generate_email(JOB, jane, tenant="acme")
+            other_experience = await service.generate_email(JOB, john, tenant="acme")
+            await service.generate_email(JOB, jane)
+            shared = await service.generate_email(JOB, dict(john, experience=jane["experience"]))
+            return other_experience, shared
+
+        other_experience, shared = asyncio.run(run())
+    finally:
+        llm_client.ainvoke = original
+
+    assert other_experience["_meta"]["cache"] == "miss"
+    assert "Initech" not in other_experience["content"] and "Globex" in other_experience["content"]
+    # Without a tenant even matching experience text is not enough: those applicants may be unrelated users
+    assert shared["_meta"]["cache"] == "miss"
+    assert calls == ["Jane Doe", "John Roe", "Jane Doe", "John Roe"]
+
+def test_repaired_drafts_are_not_cached():
+    """A draft whose JSON was cut short and repaired should be served but never cached"""
+    answers = ['{"subject": "Backend Engineer at Acme", "content": "Dear Hiring Manager, I build APIs',
+               '{"subject": "Backend Engineer at Acme", "content": "Dear Hiring Manager, I build APIs."}']
+
+    async def fake_ainvoke(chain, prompt_data):
+        return SimpleNamespace(content=answers.pop(0))
+
+    original = llm_client.ainvoke
+    llm_client.ainvoke = fake_ainvoke
+    try:
+        service = EmailService()
+        service.cache = EmailCache(ttl_seconds=60, max_entries=10)
+        jane = {"name": "Jane Doe", "email": "jane@example.com", "skills": SKILLS}
+
+        async def run():
+            return [(await service.generate_email(JOB, jane))["_meta"]["cache"] for _ in range(3)]
+
+        kinds = asyncio.run(run())
+    finally:
+        llm_client.ainvoke = original
+    assert kinds == ["miss", "miss", "exact"]
+    assert service.cache.stats()["skipped"] == 1
+
+def test_exact_hits_are_reported_as_hit():
+    """/api/generate-email should send X-Cache: HIT for an exact cache hit, as /api/extract-job does"""
+    from fastapi.testclient import TestClient
+    import main
+    from services import get_email_service
+
+    async def fake_ainvoke(chain, prompt_data):
+        return SimpleNamespace(content='{"subject": "Backend Engineer at Acme", "content": "Dear Hiring Manager, I build APIs."}')
+
+    service = EmailService()
+    service.cache = EmailCache(ttl_seconds=60, max_entries=10)
+    main.app.dependency_overrides[get_email_service] = lambda: service
+    original = llm_client.ainvoke
+    llm_client.ainvoke = fake_ainvoke
+    try:
+        client = TestClient(main.app)
+        body = {"jobData": JOB, "personalInfo": {"name": "Jane Doe", "email": "jane@example.com", "skills": SKILLS}}
+        headers = [client.post("/api/generate-email", json=body).headers["X-Cache"] for _ in range(2)]
+    finally:
+        llm_client.ainvoke = original
+        main.app.dependency_overrides.clear()
+    assert headers == ["MISS", "HIT"]
+
+def main():
+    """Run all tests"""
+    print("Running email cache tests...")
+    tests = [
+        test_job_hash_ignores_formatting,
+        test_exact_hits_are_isolated_per_tenant,
+        test_entries_expire_and_are_evicted_least_recently_used_first,
+        test_similar_skills_reuse_a_draft_for_the_same_job,
+        test_email_service_serves_repeats_from_the_cache,
+        test_another_applicants_own_words_are_never_reused,
+        test_repaired_drafts_are_not_cached,
+        test_exact_hits_are_reported_as_hit,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
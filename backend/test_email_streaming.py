@@ -0,0 +1,123 @@
+import asyncio
+import json
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import llm_client
+from email_cache import EmailCache
+from email_service import EmailService, _parse_complete_subject
+
+JOB = {"role": "Backend Engineer", "company": "Acme", "description": "Build APIs", "skills": ["Python", "FastAPI"]}
+APPLICANT = {"name": "Jane Doe", "email": "jane@example.com", "skills": "Python and FastAPI"}
+ANSWER = ('{"subject": "Backend Engineer at Acme", "content": "Dear Hiring Manager, I would love to join Acme '
+          'as a Backend Engineer using Python and FastAPI. Best regards, Jane Doe"}')
+
+def _chunks(text, size=12):
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+def _stream(service, chunks, fail_after=None, **kwargs):
+    """Every event of `service.stream_email`, with the LLM streaming `chunks` (and raising after `fail_after` of them)"""
+    async def fake_astream(chain, prompt_data):
+        for number, chunk in enumerate(chunks):
+            if number == fail_after:
+                raise RuntimeError("connection reset")
+            await asyncio.sleep(0)
+            yield SimpleNamespace(content=chunk)
+
+    async def run():
+        return [event async for event in service.stream_email(JOB, APPLICANT, **kwargs)]
+
+    original = llm_client.astream
+    llm_client.astream = fake_astream
+    try:
+        return asyncio.run(run())
+    finally:
+        llm_client.astream = original
+
+def _service():
+    service = EmailService()
+    service.cache = EmailCache(ttl_seconds=60, max_entries=10)
+    return service
+
+def test_subject_is_sent_as_soon_as_it_closes():
+    """Tokens should stream through, with the subject sent before the body has finished"""
+    events = _stream(_service(), _chunks(ANSWER))
+    names = [event["event"] for event in events]
+    assert names.count("subject") == 1 and names[-1] == "complete"
+    subject_at = names.index("subject")
+    assert 0 < subject_at < len(names) - 2
+    assert events[subject_at]["data"] == {"subject": "Backend Engineer at Acme"}
+    assert "".join(event["data"]["text"] for event in events if event["event"] == "token") == ANSWER
+    assert events[-1]["data"]["subject"] == "Backend Engineer at Acme"
+    assert "Jane Doe" in events[-1]["data"]["content"]
+
+def test_cached_drafts_are_sent_at_once():
+    """A repeat should be answered from the cache with no tokens"""
+    service = _service()
+    _stream(service, _chunks(ANSWER))
+    events = _stream(service, [], fail_after=0)
+    assert [event["event"] for event in events] == ["subject", "complete"]
+
+def test_failures_end_the_stream_with_an_error():
+    """An LLM failure mid-stream should end with an error event rather than raise"""
+    events = _stream(_service(), _chunks(ANSWER), fail_after=3)
+    assert [event["event"] for event in events] == ["token", "token", "token", "error"]
+    assert "connection reset" in events[-1]["data"]["message"]
+
+def test_partial_subjects_are_not_sent():
+    """The subject should only be parsed once its closing quote has arrived"""
+    assert _parse_complete_subject('{"subject": "Backend Eng') is None
+    assert _parse_complete_subject('{"subject": "Backend \\"Core\\" Engineer", "con') == 'Backend "Core" Engineer'
+
+def test_events_are_framed_as_server_sent_events():
+    """The endpoint should frame every event as `event:` and `data:` lines"""
+    from fastapi.testclient import TestClient
+    import main
+    from services import get_email_service
+
+    async def fake_astream(chain, prompt_data):
+        for chunk in _chunks(ANSWER):
+            yield SimpleNamespace(content=chunk)
+
+    service = _service()
+    main.app.dependency_overrides[get_email_service] = lambda: service
+    original = llm_client.astream
+    llm_client.astream = fake_astream
+    try:
+        response = TestClient(main.app).post("/api/generate-email/stream", json={"jobData": JOB, "personalInfo": APPLICANT})
+    finally:
+        llm_client.astream = original
+        main.app.dependency_overrides.clear()
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = [frame.split("\n") for frame in response.text.strip().split("\n\n")]
+    assert all(lines[0].startswith("event: ") and lines[1].startswith("data: ") for lines in frames)
+    assert frames[-1][0] == "event: complete"
+    assert json.loads(frames[-1][1][len("data: "):])["subject"] == "Backend Engineer at Acme"
+
+def main():
+    """Run all tests"""
+    print("Running email streaming tests...")
+    tests = [
+        test_subject_is_sent_as_soon_as_it_closes,
+        test_cached_drafts_are_sent_at_once,
+        test_failures_end_the_stream_with_an_error,
+        test_partial_subjects_are_not_sent,
+        test_events_are_framed_as_server_sent_events,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,76 @@
+import asyncio
+import sys
+import os
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from health_monitor import HealthMonitor
+
+def test_probe_results_are_cached():
+    """Snapshots should be served from the last probe run without probing again"""
+    calls = []
+
+    async def llm_probe():
+        calls.append(1)
+        return "online"
+
+    monitor = HealthMonitor({"email_service": llm_probe}, interval=60)
+
+    async def run():
+        await monitor.start()
+        await asyncio.sleep(0.01)
+        snapshots = [monitor.snapshot() for _ in range(100)]
+        await monitor.stop()
+        return snapshots
+
+    snapshots = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(snapshot["statuses"] == {"email_service": "online"} for snapshot in snapshots)
+    assert not snapshots[-1]["stale"]
+
+def test_failing_and_hanging_probes_report_offline():
+    """A probe that raises or times out should count as offline without affecting the others"""
+    async def broken():
+        raise ConnectionError("refused")
+
+    async def hanging():
+        await asyncio.sleep(10)
+        return "online"
+
+    async def healthy():
+        return "online"
+
+    monitor = HealthMonitor({"broken": broken, "hanging": hanging, "healthy": healthy}, interval=60, timeout=0.05)
+    statuses = asyncio.run(monitor.check_now())
+    assert statuses == {"broken": "offline", "hanging": "offline", "healthy": "online"}
+
+def test_snapshot_is_stale_before_the_first_probe():
+    """Until a probe has completed the status is unknown and marked stale"""
+    async def healthy():
+        return "online"
+
+    snapshot = HealthMonitor({"email_service": healthy}, interval=60).snapshot()
+    assert snapshot["statuses"] == {"email_service": "unknown"}
+    assert snapshot["stale"]
+
+def main():
+    """Run all tests"""
+    print("Running health monitor tests...")
+    tests = [
+        test_probe_results_are_cached,
+        test_failing_and_hanging_probes_report_offline,
+        test_snapshot_is_stale_before_the_first_probe,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import os
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from html_cleaner import AVAILABLE_PARSERS, HtmlCleaner, html_to_text, select_fields
+
+PAGE = """
+<html><head><title>Backend Engineer</title><style>h1 { color: red }</style></head>
+<body>
+  <nav>Jobs | Companies | Sign in</nav>
+  <!-- tracking pixel -->
+  <div class="posting">
+    <h1>Backend Engineer &amp; SRE</h1>
+    <p>Build APIs in   Python.<br>Café-grade coffee.</p>
+    <script>window.track("view")</script>
+  </div>
+  <footer>© Acme</footer>
+</body></html>
+"""
+
+def test_parsers_give_the_same_text():
+    """Every installed parser should drop scripts, comments and removed selectors identically"""
+    expected = "Backend Engineer\nBackend Engineer & SRE\nBuild APIs in   Python.\nCafé-grade coffee."
+    for parser in AVAILABLE_PARSERS:
+        assert html_to_text(PAGE.encode("utf-8"), ["nav", "footer"], None, parser) == expected, parser
+        assert html_to_text(PAGE, ["nav"], [".posting"], parser) == expected.split("\n", 1)[1], parser
+        assert html_to_text(b"", ["nav"], [".posting"], parser) == "", parser
+
+def test_large_pages_go_to_the_worker_pool():
+    """Pages over the inline size should be converted by a worker process, with the same result"""
+    cleaner = HtmlCleaner(workers=1, inline_bytes=len(PAGE.encode("utf-8")))
+    large = PAGE.replace("<nav>", "<nav>" + "x" * 1000)
+
+    async def run():
+        try:
+            return await cleaner.to_text(PAGE, ["nav"]), await cleaner.to_text(large, ["nav"])
+        finally:
+            cleaner.close()
+
+    small_text, large_text = asyncio.run(run())
+    assert small_text == large_text == html_to_text(PAGE, ["nav"], None, cleaner.parser)
+    stats = cleaner.stats()
+    assert (stats["inline"], stats["offloaded"]) == (1, 1)
+    assert stats["chars_out"] == 2 * len(small_text)
+
+def test_pool_can_be_disabled():
+    """With no workers every page should be converted on a thread"""
+    cleaner = HtmlCleaner(workers=0, inline_bytes=0)
+    text = asyncio.run(cleaner.to_text(PAGE * 50, ["nav"]))
+    assert text.startswith("Backend Engineer")
+    assert cleaner.stats()["offloaded"] == 0
+
+def test_page_fields_are_read_in_the_worker():
+    """Selector fields, JSON-LD and OpenGraph tags should be read by the worker, alike for every parser"""
+    selectors = {"role": ".posting h1", "company": "footer", "location": ".missing"}
+    for parser in AVAILABLE_PARSERS:
+        assert select_fields(PAGE, selectors, parser) == {"role": "Backend Engineer & SRE", "company": "© Acme"}, parser
+
+    page = PAGE.replace("</head>", '<meta property="og:title" content="Backend Engineer">'
+                        '<script type="application/ld+json">{"@type": "JobPosting", "title": "SRE",'
+                        ' "hiringOrganization": {"name": "Acme"}}</script></head>')
+    cleaner = HtmlCleaner(workers=1, inline_bytes=0)
+
+    async def run():
+        try:
+            return await cleaner.parse_page(page, selectors)
+        finally:
+            cleaner.close()
+
+    parsed = asyncio.run(run())
+    assert parsed["fields"]["role"] == "Backend Engineer & SRE"
+    assert (parsed["json_ld"]["role"], parsed["json_ld"]["company"]) == ("SRE", "Acme")
+    assert parsed["open_graph"].get("role") == "Backend Engineer", parsed["open_graph"]
+    assert cleaner.stats()["offloaded"] == 1
+
+def main():
+    """Run all tests"""
+    print("Running HTML cleaner tests...")
+    tests = [
+        test_parsers_give_the_same_text,
+        test_large_pages_go_to_the_worker_pool,
+        test_pool_can_be_disabled,
+        test_page_fields_are_read_in_the_worker,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,186 @@
+import asyncio
+import sys
+import os
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from idempotency import IdempotencyRegistry, IdempotencyKeyReused, ClientDisconnected
+
+def test_retries_attach_to_in_progress_work():
+    """A retry with the same key should attach to the running work, then replay its result"""
+    registry = IdempotencyRegistry(ttl_seconds=60)
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return {"role": "Developer"}
+
+    async def run():
+        first = asyncio.create_task(registry.run("key-1", "url-a", work))
+        await asyncio.sleep(0.01)
+        retry = await registry.run("key-1", "url-a", work)
+        replay = await registry.run("key-1", "url-a", work)
+        return await first, retry, replay
+
+    first, retry, replay = asyncio.run(run())
+    assert len(runs) == 1
+    assert first == ({"role": "Developer"}, False)
+    assert retry == ({"role": "Developer"}, False)
+    assert replay == ({"role": "Developer"}, True)
+
+def test_key_reused_with_different_body_is_rejected():
+    """The same key must not silently return the result of a different request"""
+    registry = IdempotencyRegistry()
+
+    async def work():
+        return "done"
+
+    async def run():
+        await registry.run("key-2", "url-a", work)
+        await registry.run("key-2", "url-b", work)
+
+    try:
+        asyncio.run(run())
+        assert False, "expected IdempotencyKeyReused"
+    except IdempotencyKeyReused:
+        pass
+
+def test_failed_work_is_not_replayed():
+    """A retry after a failure should run the work again"""
+    registry = IdempotencyRegistry()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        if len(runs) == 1:
+            raise ValueError("render failed")
+        return "ok"
+
+    async def run():
+        try:
+            await registry.run("key-3", "url-a", work)
+        except ValueError:
+            pass
+        return await registry.run("key-3", "url-a", work)
+
+    assert asyncio.run(run()) == ("ok", False)
+    assert len(runs) == 2
+
+def test_work_is_cancelled_when_every_client_disconnects():
+    """Once no client is waiting any more, the underlying work should be cancelled"""
+    registry = IdempotencyRegistry(disconnect_poll_interval=0.01, cancel_grace_seconds=0.05)
+    state = {"cancelled": False, "connected": 2}
+
+    async def work():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    def client(index):
+        async def is_disconnected():
+            return state["connected"] <= index
+        return registry.run("key-4", "url-a", work, is_disconnected)
+
+    async def run():
+        waiters = [asyncio.create_task(client(0)), asyncio.create_task(client(1))]
+        await asyncio.sleep(0.03)
+        state["connected"] = 1
+        await asyncio.sleep(0.03)
+        # One client is still listening, so the work keeps running
+        assert not state["cancelled"]
+        state["connected"] = 0
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        # Still running during the grace window in case a retry attaches
+        assert not state["cancelled"]
+        await asyncio.sleep(0.1)
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ClientDisconnected) for result in results)
+    assert state["cancelled"]
+    assert registry.stats()["cancelled_after_disconnect"] == 1
+
+def test_retry_within_the_grace_window_attaches():
+    """A client that times out and retries with the same key should get the original work's result"""
+    registry = IdempotencyRegistry(disconnect_poll_interval=0.01, cancel_grace_seconds=0.5)
+    runs = []
+    state = {"connected": True}
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.2)
+        return {"role": "Developer"}
+
+    async def is_disconnected():
+        return not state["connected"]
+
+    async def run():
+        first = asyncio.create_task(registry.run("key-5", "url-a", work, is_disconnected))
+        await asyncio.sleep(0.03)
+        # The frontend's AbortController drops the connection, then it backs off and retries
+        state["connected"] = False
+        try:
+            await first
+        except ClientDisconnected:
+            pass
+        await asyncio.sleep(0.05)
+        state["connected"] = True
+        return await registry.run("key-5", "url-a", work, is_disconnected)
+
+    assert asyncio.run(run()) == ({"role": "Developer"}, False)
+    assert len(runs) == 1
+    stats = registry.stats()
+    assert (stats["executions"], stats["attached_retries"], stats["cancelled_after_disconnect"]) == (1, 1, 0)
+
+def test_keyless_work_is_cancelled_at_once():
+    """Without a key no retry can attach, so there is no grace window"""
+    registry = IdempotencyRegistry(disconnect_poll_interval=0.01, cancel_grace_seconds=60)
+    state = {"cancelled": False}
+
+    async def work():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    async def is_disconnected():
+        return True
+
+    async def run():
+        try:
+            await registry.run(None, "url-a", work, is_disconnected)
+        except ClientDisconnected:
+            pass
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert state["cancelled"]
+
+def main():
+    """Run all tests"""
+    print("Running idempotency tests...")
+    tests = [
+        test_retries_attach_to_in_progress_work,
+        test_key_reused_with_different_body_is_rejected,
+        test_failed_work_is_not_replayed,
+        test_work_is_cancelled_when_every_client_disconnects,
+        test_retry_within_the_grace_window_attaches,
+        test_keyless_work_is_cancelled_at_once,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
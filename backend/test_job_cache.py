@@ -0,0 +1,108 @@
+import asyncio
+import sys
+import os
+import tempfile
+import time
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from job_cache import JobDataCache, cache_key, canonicalize_url
+
+JOB = {"role": "Backend Engineer", "company": "Acme", "skills": ["Python"]}
+
+def test_tracking_noise_is_dropped():
+    """Links differing only in tracking parameters, case, fragment or trailing slash should share a key"""
+    base = "https://boards.greenhouse.io/acme/jobs/123"
+    noisy = "HTTPS://Boards.Greenhouse.io:443/acme/jobs/123/?utm_source=x&gh_src=abc&fbclid=1#apply"
+    assert canonicalize_url(noisy) == base
+    assert cache_key(noisy) == cache_key(base)
+    linkedin = "https://www.linkedin.com/jobs/view/42/?refId=a&trackingId=b&trk=public_jobs&trkInfo=c"
+    assert canonicalize_url(linkedin) == "https://www.linkedin.com/jobs/view/42"
+    assert canonicalize_url("https://example.com/job?b=2&a=1") == "https://example.com/job?a=1&b=2"
+
+def test_generic_parameters_are_kept():
+    """ref, source, from and src may select the posting, so only the sites known to track with them lose them"""
+    url = "https://jobs.example.com/view?id=7&ref=senior&source=eu&from=list&src=board"
+    assert canonicalize_url(url) == "https://jobs.example.com/view?from=list&id=7&ref=senior&source=eu&src=board"
+    assert canonicalize_url("https://www.indeed.com/viewjob?jk=abc&from=serp&tk=1") == "https://www.indeed.com/viewjob?jk=abc"
+    assert cache_key("https://jobs.example.com/view?id=7") != cache_key("https://jobs.example.com/view?id=8")
+
+def test_entries_expire():
+    """An entry older than the TTL should be a miss"""
+    cache = JobDataCache(ttl_seconds=0.05, max_entries=10, db_path="")
+
+    async def run():
+        await cache.set("https://example.com/job/1", JOB)
+        fresh = await cache.get("https://example.com/job/1")
+        await asyncio.sleep(0.1)
+        return fresh, await cache.get("https://example.com/job/1")
+
+    fresh, expired = asyncio.run(run())
+    assert fresh == JOB and expired is None
+    assert cache.stats()["entries"] == 0
+
+def test_least_recently_used_is_evicted():
+    """Over the size cap, the entry used least recently should go first"""
+    cache = JobDataCache(ttl_seconds=60, max_entries=2, db_path="")
+
+    async def run():
+        await cache.set("https://example.com/job/1", JOB)
+        await cache.set("https://example.com/job/2", JOB)
+        await cache.get("https://example.com/job/1")
+        await cache.set("https://example.com/job/3", JOB)
+        return [await cache.get(f"https://example.com/job/{number}") is not None for number in (1, 2, 3)]
+
+    assert asyncio.run(run()) == [True, False, True]
+
+def test_sqlite_tier_survives_a_restart():
+    """A new cache on the same file should serve the entry from disk, then from memory"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "job_cache.db")
+        first = JobDataCache(ttl_seconds=60, max_entries=10, db_path=path)
+        asyncio.run(first.set("https://example.com/job/1?utm_medium=mail", JOB))
+        first.close()
+
+        second = JobDataCache(ttl_seconds=60, max_entries=10, db_path=path)
+
+        async def run():
+            return await second.get("https://example.com/job/1"), await second.get("https://example.com/job/1")
+
+        from_disk, from_memory = asyncio.run(run())
+        second.close()
+    assert from_disk == from_memory == JOB
+    assert second.stats()["hits"] == {"memory": 1, "disk": 1}
+
+def test_sqlite_tier_drops_expired_rows():
+    """An expired row on disk should be a miss"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = JobDataCache(ttl_seconds=0.05, max_entries=10, db_path=os.path.join(directory, "job_cache.db"))
+        asyncio.run(cache.set("https://example.com/job/1", JOB))
+        cache._memory.clear()
+        time.sleep(0.1)
+        assert asyncio.run(cache.get("https://example.com/job/1")) is None
+        cache.close()
+
+def main():
+    """Run all tests"""
+    print("Running job cache tests...")
+    tests = [
+        test_tracking_noise_is_dropped,
+        test_generic_parameters_are_kept,
+        test_entries_expire,
+        test_least_recently_used_is_evicted,
+        test_sqlite_tier_survives_a_restart,
+        test_sqlite_tier_drops_expired_rows,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,145 @@
+import asyncio
+import sys
+import os
+import tempfile
+import time
+
+import httpx
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from job_queue import JobQueue, SQLiteQueueBackend, STATUS_QUEUED, STATUS_SUCCEEDED, _new_record
+
+def test_a_job_is_claimed_once_across_processes():
+    """Two backends on one database (as two processes would be) should never claim the same job"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "jobs.db")
+        first, second = SQLiteQueueBackend(path), SQLiteQueueBackend(path)
+
+        async def run():
+            for index in range(20):
+                await first.put(_new_record("extract", {"index": index}, None))
+            claims = await asyncio.gather(*(backend.claim() for _ in range(10) for backend in (first, second)))
+            await first.close()
+            await second.close()
+            return claims
+
+        claims = asyncio.run(run())
+        assert sorted(claim["payload"]["index"] for claim in claims) == list(range(20))
+
+def test_running_jobs_are_only_taken_over_once_their_lease_lapses():
+    """A restarting process should leave jobs another live process is running alone"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "jobs.db")
+        live = SQLiteQueueBackend(path, lease_seconds=0.15)
+
+        async def run():
+            await live.put(_new_record("extract", {}, None))
+            claimed = await live.claim()
+            restarted = SQLiteQueueBackend(path, lease_seconds=0.15)
+            recovered = await restarted.recover()
+            # Outlive the original lease; the heartbeat keeps the job with the live process
+            try:
+                await asyncio.wait_for(restarted.claim(), timeout=0.4)
+                stolen = True
+            except asyncio.TimeoutError:
+                stolen = False
+            # The live process dies without handing the job back
+            live._heartbeat.cancel()
+            await asyncio.sleep(0.2)
+            taken_over = await asyncio.wait_for(restarted.claim(), timeout=1)
+            await restarted.close()
+            await live.close()
+            return claimed, recovered, stolen, taken_over
+
+        claimed, recovered, stolen, taken_over = asyncio.run(run())
+        assert recovered == [] and not stolen
+        assert taken_over["id"] == claimed["id"]
+
+def test_queue_depth_is_served_from_memory():
+    """depth() should track enqueues and claims without querying the database itself"""
+    with tempfile.TemporaryDirectory() as directory:
+        backend = SQLiteQueueBackend(os.path.join(directory, "jobs.db"))
+
+        async def run():
+            for _ in range(3):
+                await backend.put(_new_record("extract", {}, None))
+            queued = backend.depth()
+            await backend.claim()
+            claimed = backend.depth()
+            await backend.close()
+            # The connection is gone, so this can only come from the cached count
+            return queued, claimed, backend.depth()
+
+        assert asyncio.run(run()) == (3, 2, 2)
+
+def test_finished_jobs_are_pruned():
+    """Finished jobs older than the retention should be deleted; queued ones never are"""
+    with tempfile.TemporaryDirectory() as directory:
+        backend = SQLiteQueueBackend(os.path.join(directory, "jobs.db"), retention_seconds=60)
+        old, queued, fresh = (_new_record("extract", {}, None) for _ in range(3))
+        old.update(status=STATUS_SUCCEEDED, updated_at=time.time() - 120)
+        queued.update(updated_at=time.time() - 120)
+
+        async def run():
+            await backend.save(old)
+            await backend.save(queued)
+            fresh["status"] = STATUS_SUCCEEDED
+            await backend.save(fresh)
+            loaded = [await backend.load(record["id"]) for record in (old, queued, fresh)]
+            await backend.close()
+            return loaded
+
+        loaded_old, loaded_queued, loaded_fresh = asyncio.run(run())
+        assert loaded_old is None
+        assert loaded_queued["status"] == STATUS_QUEUED
+        assert loaded_fresh["status"] == STATUS_SUCCEEDED
+
+def test_callbacks_are_held_until_delivered():
+    """Callback deliveries in flight should be referenced by the queue until they finish"""
+    delivered = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.05)
+        delivered.append(request.url.path)
+        return httpx.Response(200)
+
+    async def run():
+        queue = JobQueue({"echo": lambda payload: asyncio.sleep(0, payload)}, workers=1)
+        queue._callback_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await queue.start()
+        await queue.submit("echo", {"ok": True}, "http://receiver/done")
+        await asyncio.sleep(0.02)
+        pending = queue.stats()["callbacks_pending"]
+        await asyncio.sleep(0.1)
+        settled = queue.stats()["callbacks_pending"]
+        await queue.stop()
+        return pending, settled
+
+    pending, settled = asyncio.run(run())
+    assert (pending, settled) == (1, 0)
+    assert delivered == ["/done"]
+
+def main():
+    """Run all tests"""
+    print("Running job queue tests...")
+    tests = [
+        test_a_job_is_claimed_once_across_processes,
+        test_running_jobs_are_only_taken_over_once_their_lease_lapses,
+        test_queue_depth_is_served_from_memory,
+        test_finished_jobs_are_pruned,
+        test_callbacks_are_held_until_delivered,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
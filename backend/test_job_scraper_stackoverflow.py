@@ -9,7 +9,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # Load environment variables
 load_dotenv()
 
-from job_scraper import JobScraper
+from job_scraper_selenium import JobScraper
 
 async def test_job_scraper_with_stackoverflow():
     """Test the job scraper with Stack Overflow jobs page"""
@@ -25,7 +25,7 @@ async def test_job_scraper_with_stackoverflow():
     
     # Test connection
     try:
-        status = job_scraper.test_connection()
+        status = await job_scraper.test_connection()
         print(f"Job Scraper Connection Status: {status}")
         if status != "online":
             print("Job Scraper is not online. Cannot proceed with live test.")
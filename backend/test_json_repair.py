@@ -0,0 +1,108 @@
+import asyncio
+import sys
+import os
+from types import SimpleNamespace
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("GROQ_API_KEY", "test-key")
+
+import llm_client
+from json_repair import IncrementalJsonParser, JsonRepairError, TolerantJsonParser, parse
+
+def test_valid_json_is_untouched():
+    """Valid JSON should take the fast path and report no repairs"""
+    assert parse('{"role": "Dev", "skills": ["Go"]}') == ({"role": "Dev", "skills": ["Go"]}, [])
+
+def test_common_malformations_are_repaired():
+    """Preambles, fences, trailing commas, quotes and literals should all be fixed locally"""
+    cases = {
+        'Here is the JSON:\n```json\n{"role": "Dev",}\n```': {"role": "Dev"},
+        "{'role': 'Dev', 'remote': True, 'salary': None}": {"role": "Dev", "remote": True, "salary": None},
+        '{"role": "Dev" "company": "Acme"}': {"role": "Dev", "company": "Acme"},
+        '{role: "Dev", location: Remote}': {"role": "Dev", "location": "Remote"},
+        '{"content": "line one\nline two"}': {"content": "line one\nline two"},
+        '{"skills": ["Go", "Rust", "role": "Dev"}': {"skills": ["Go", "Rust"], "role": "Dev"},
+        '{"content": "He said "hello" twice"}': {"content": 'He said "hello" twice'},
+    }
+    for text, expected in cases.items():
+        value, repairs = parse(text)
+        assert value == expected, (text, value)
+        assert repairs, text
+
+def test_truncated_output_is_closed():
+    """Output cut off mid-string or mid-array should keep everything that arrived"""
+    assert parse('{"role": "Dev", "skills": ["Go", "Ru')[0] == {"role": "Dev", "skills": ["Go", "Ru"]}
+    assert parse('{"role": "Dev", "company":')[0] == {"role": "Dev", "company": None}
+
+def test_incremental_parsing_matches_whole_text():
+    """Feeding chunks should give the same result as parsing the text at once"""
+    text = 'Sure!\n{"subject": "Hi", "content": "Dear team,\nthanks",}'
+    parser = IncrementalJsonParser()
+    for i in range(0, len(text), 5):
+        parser.feed(text[i:i + 5])
+    assert parser.value() == parse(text)[0] == {"subject": "Hi", "content": "Dear team,\nthanks"}
+
+def test_no_json_raises():
+    """Text without any JSON should raise with nothing to salvage"""
+    try:
+        parse("I could not find a job posting on this page.")
+    except JsonRepairError as e:
+        assert e.fragment == ""
+    else:
+        assert False, "expected JsonRepairError"
+
+def test_unrepairable_output_is_reasked_without_the_prompt():
+    """Only the model's broken answer should go back to the LLM, and outcomes should be counted"""
+    sent = []
+
+    async def fake_ainvoke(chain, inputs):
+        sent.append(inputs["fragment"])
+        return SimpleNamespace(content='{"subject": "Hi", "content": "He said \\"hello\\""}')
+
+    original = llm_client.ainvoke
+    llm_client.ainvoke = fake_ainvoke
+    try:
+        json_parser = TolerantJsonParser("test_stage", max_reasks=1)
+        broken = 'subject: Hi\ncontent: He said "hello"'
+
+        async def run():
+            clean = await json_parser.parse('{"subject": "Hi"}')
+            repaired = await json_parser.parse('{"subject": "Hi",}')
+            reasked = await json_parser.parse(broken)
+            return clean, repaired, reasked
+
+        clean, repaired, reasked = asyncio.run(run())
+    finally:
+        llm_client.ainvoke = original
+
+    assert clean == repaired == {"subject": "Hi"}
+    assert reasked == {"subject": "Hi", "content": 'He said "hello"'}
+    assert sent == [broken]
+    stats = json_parser.stats()
+    assert stats["outcomes"] == {"clean": 1, "repaired": 1, "reasked": 1, "failed": 0}
+    assert stats["repair_rate"] == 0.667
+
+def main():
+    """Run all tests"""
+    print("Running JSON repair tests...")
+    tests = [
+        test_valid_json_is_untouched,
+        test_common_malformations_are_repaired,
+        test_truncated_output_is_closed,
+        test_incremental_parsing_matches_whole_text,
+        test_no_json_raises,
+        test_unrepairable_output_is_reasked_without_the_prompt,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,168 @@
+import asyncio
+import sys
+import os
+
+import httpx
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from llm_router import LLMBackend, LLMBackendError, LLMRouter, CircuitBreaker, BREAKER_CLOSED, BREAKER_OPEN
+from llm_client import rate_limit_retry_after
+
+MESSAGES = [{"role": "user", "content": "Write a cold email"}]
+
+def stub_backends(behaviours):
+    """
+    Builds a router over in-process stub servers. `behaviours` maps a backend name to
+    (latency seconds, status code); every backend answers with its own name.
+    """
+    calls = {name: 0 for name in behaviours}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        name = request.url.host
+        calls[name] += 1
+        latency, status = behaviours[name]
+        await asyncio.sleep(latency)
+        if status != 200:
+            return httpx.Response(status, headers={"retry-after": "7"}, json={"error": {"message": "unavailable"}})
+        return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": name}}]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    backends = [
+        LLMBackend(name, f"http://{name}/v1", "stub-model", breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        for name in behaviours
+    ]
+    return backends, client, calls
+
+def test_fails_over_to_the_next_backend():
+    """A backend returning errors should be failed over to, then ranked behind healthy ones"""
+    backends, client, calls = stub_backends({"groq": (0, 503), "local": (0, 200)})
+    router = LLMRouter(backends, lambda: client, hedge_delay=0)
+
+    async def run():
+        return [await router.complete(MESSAGES, 0) for _ in range(4)]
+
+    results = asyncio.run(run())
+    assert all(backend == "local" for _, backend in results)
+    assert calls["groq"] == 1
+    assert router.stats()["failovers"] == 1
+
+def test_circuit_breaker_opens_after_repeated_failures():
+    """After `failure_threshold` failures the backend should not be called at all"""
+    backends, client, calls = stub_backends({"groq": (0, 503)})
+    router = LLMRouter(backends, lambda: client, hedge_delay=0)
+
+    async def run():
+        for _ in range(4):
+            try:
+                await router.complete(MESSAGES, 0)
+            except LLMBackendError as e:
+                last_error = e
+        return last_error
+
+    error = asyncio.run(run())
+    assert backends[0].breaker.state == BREAKER_OPEN
+    assert calls["groq"] == 2
+    assert error.status_code == 503
+
+def test_slow_backend_is_hedged():
+    """When the primary is slow, a hedged request to the next backend should answer first"""
+    backends, client, calls = stub_backends({"groq": (1.0, 200), "local": (0.01, 200)})
+    router = LLMRouter(backends, lambda: client, hedge_delay=0.05)
+
+    content, backend = asyncio.run(router.complete(MESSAGES, 0))
+    assert (content, backend) == ("local", "local")
+    assert router.stats()["hedge_wins"] == 1
+
+def test_routes_to_the_fastest_backend():
+    """Once latencies are known, traffic should prefer the backend with the lower latency"""
+    backends, client, calls = stub_backends({"groq": (0.05, 200), "local": (0.005, 200)})
+    router = LLMRouter(backends, lambda: client, hedge_delay=0)
+
+    async def run():
+        # Give both backends latency samples, then route normally
+        await backends[0].complete(client, MESSAGES, 0)
+        await backends[1].complete(client, MESSAGES, 0)
+        return [await router.complete(MESSAGES, 0) for _ in range(5)]
+
+    assert all(backend == "local" for _, backend in asyncio.run(run()))
+
+def test_rate_limited_everywhere_reports_retry_after():
+    """When every backend is rate limited the router should surface a 429 with a wait time"""
+    backends, client, calls = stub_backends({"groq": (0, 429)})
+    router = LLMRouter(backends, lambda: client, hedge_delay=0, max_rate_limit_wait=0)
+
+    async def run():
+        errors = []
+        for _ in range(2):
+            try:
+                await router.complete(MESSAGES, 0)
+            except LLMBackendError as e:
+                errors.append(e)
+        return errors
+
+    first, second = asyncio.run(run())
+    assert rate_limit_retry_after(first) == 7
+    # The second call is refused without reaching the backend
+    assert calls["groq"] == 1
+    assert second.status_code == 429 and rate_limit_retry_after(second) > 0
+
+def test_rate_limited_call_waits_instead_of_failing():
+    """A 429 with a short retry-after should be waited out and the call retried"""
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(1)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"retry-after": "0.05"}, json={"error": {"message": "slow down"}})
+        return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": "ok"}}]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    router = LLMRouter([LLMBackend("groq", "http://groq/v1", "stub-model")], lambda: client, hedge_delay=0)
+
+    assert asyncio.run(router.complete(MESSAGES, 0)) == ("ok", "groq")
+    assert len(calls) == 2
+    assert router.stats()["rate_limit_waits"] == 1
+
+def test_half_open_breaker_admits_one_probe():
+    """Once the reset timeout passes, only one of several concurrent callers should reach the backend"""
+    backends, client, calls = stub_backends({"groq": (0.05, 200)})
+    backend = backends[0]
+    backend.breaker.reset_timeout = 0.01
+    backend.breaker.trip(0.01)
+
+    async def run():
+        await asyncio.sleep(0.02)
+        return await asyncio.gather(*(backend.complete(client, MESSAGES, 0) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert calls["groq"] == 1
+    assert results.count("groq") == 1
+    assert all(isinstance(result, LLMBackendError) and result.status_code == 503 for result in results if result != "groq")
+    assert backend.breaker.state == BREAKER_CLOSED
+
+def main():
+    """Run all tests"""
+    print("Running LLM router tests...")
+    tests = [
+        test_fails_over_to_the_next_backend,
+        test_circuit_breaker_opens_after_repeated_failures,
+        test_slow_backend_is_hedged,
+        test_routes_to_the_fastest_backend,
+        test_rate_limited_everywhere_reports_retry_after,
+        test_rate_limited_call_waits_instead_of_failing,
+        test_half_open_breaker_admits_one_probe,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,85 @@
+import asyncio
+import sys
+import os
+
+import httpx
+from prometheus_client import REGISTRY
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import metrics
+from llm_router import LLMBackend
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels)
+
+def test_stage_is_labelled_with_the_current_site():
+    """Stage timings recorded inside `metrics.site` should carry that site's label"""
+    before = sample("coldmail_stage_duration_seconds_count", stage="page_fetch", site="Greenhouse") or 0
+    with metrics.site("Greenhouse"):
+        with metrics.stage("page_fetch"):
+            pass
+    with metrics.stage("page_fetch"):
+        pass
+    assert sample("coldmail_stage_duration_seconds_count", stage="page_fetch", site="Greenhouse") == before + 1
+    assert metrics.current_site.get() == "none"
+
+def test_in_flight_requests_are_labelled_by_route():
+    """The middleware should count a request against its route template while it runs"""
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware)
+    seen = {}
+
+    @app.get("/api/jobs/{job_id}")
+    async def get_job(job_id: str):
+        seen["in_flight"] = sample("coldmail_http_requests_in_flight", endpoint="/api/jobs/{job_id}")
+        seen["endpoint"] = metrics.current_endpoint.get()
+        return {}
+
+    TestClient(app).get("/api/jobs/abc123")
+    assert seen == {"in_flight": 1, "endpoint": "/api/jobs/{job_id}"}
+    assert sample("coldmail_http_requests_in_flight", endpoint="/api/jobs/{job_id}") == 0
+
+def test_llm_tokens_are_counted_per_endpoint():
+    """Reported usage should be added to the token counters of the calling endpoint"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={
+            "choices": [{"message": {"role": "assistant", "content": "hello"}}],
+            "usage": {"prompt_tokens": 120, "completion_tokens": 30, "total_tokens": 150}
+        })
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    backend = LLMBackend("groq", "http://groq/v1", "stub-model")
+
+    async def run():
+        metrics.current_endpoint.set("/api/generate-email")
+        await backend.complete(client, [{"role": "user", "content": "Write a cold email"}], 0)
+
+    before = sample("coldmail_llm_tokens_total", endpoint="/api/generate-email", kind="prompt") or 0
+    asyncio.run(run())
+    assert sample("coldmail_llm_tokens_total", endpoint="/api/generate-email", kind="prompt") == before + 120
+    assert sample("coldmail_llm_tokens_total", endpoint="/api/generate-email", kind="completion") >= 30
+
+def main():
+    """Run all tests"""
+    print("Running metrics tests...")
+    tests = [
+        test_stage_is_labelled_with_the_current_site,
+        test_in_flight_requests_are_labelled_by_route,
+        test_llm_tokens_are_counted_per_endpoint,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
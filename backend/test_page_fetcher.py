@@ -0,0 +1,118 @@
+import asyncio
+import sys
+import os
+
+import httpx
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from html_cleaner import HtmlCleaner
+from page_fetcher import PageFetcher, TIER_API, TIER_BROWSER, TIER_STATIC
+from site_adapters import GENERIC_ADAPTER, STRATEGY_API, STRATEGY_BROWSER, SiteAdapter
+
+POSTING = """<html><body><nav>Jobs</nav><main>
+<h1>Backend Engineer</h1>
+<p>Responsibilities: build and run the APIs that match applicants to jobs, with Python and PostgreSQL.</p>
+<p>Requirements: five years of experience with web services. Full-time, remote within Europe.</p>
+</main></body></html>"""
+JS_SHELL = "<html><body><noscript>Please enable JavaScript to view this job.</noscript><div id='root'></div></body></html>"
+JSON_LD_ONLY = """<html><head><script type="application/ld+json">
+{"@type": "JobPosting", "title": "QA Analyst", "hiringOrganization": {"name": "Acme"}}
+</script></head><body><div id="root"></div></body></html>"""
+
+class FakeBrowserPool:
+    """Records the URLs it is asked to render and returns the posting"""
+
+    def __init__(self):
+        self.rendered = []
+
+    async def render(self, url, remove_selectors=None, wait_selector=None):
+        self.rendered.append(url)
+        return POSTING
+
+def _fetcher(pages):
+    """A fetcher whose static tier is served `pages` (path -> (status, HTML)) in process"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        status, html = pages.get(request.url.path, (404, ""))
+        return httpx.Response(status, text=html, headers={"content-type": "text/html; charset=utf-8"})
+
+    browser = FakeBrowserPool()
+    fetcher = PageFetcher(browser, html_cleaner=HtmlCleaner(workers=0))
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return fetcher, browser
+
+def _fetch(fetcher, url, adapter=GENERIC_ADAPTER):
+    async def run():
+        try:
+            return await fetcher.fetch(url, adapter)
+        finally:
+            await fetcher.close()
+    return asyncio.run(run())
+
+def test_static_posting_skips_the_browser():
+    """A page whose HTML already holds the posting should be served by the static tier"""
+    fetcher, browser = _fetcher({"/job": (200, POSTING)})
+    result = _fetch(fetcher, "https://jobs.example.com/job")
+    assert result.tier == TIER_STATIC and "Backend Engineer" in result.text and "Jobs" not in result.text
+    assert browser.rendered == []
+    assert fetcher.stats()["browser_avoidance_rate"] == 1.0
+
+def test_javascript_shells_and_errors_fall_back_to_the_browser():
+    """A JS-only shell or a failed static fetch should be rendered by the browser"""
+    for pages in ({"/job": (200, JS_SHELL)}, {"/job": (503, POSTING)}):
+        fetcher, browser = _fetcher(pages)
+        result = _fetch(fetcher, "https://jobs.example.com/job")
+        assert result.tier == TIER_BROWSER and "Backend Engineer" in result.text
+        assert browser.rendered == ["https://jobs.example.com/job"]
+
+def test_embedded_job_posting_is_enough():
+    """Thin visible text with a JSON-LD JobPosting should still be served statically"""
+    fetcher, browser = _fetcher({"/job": (200, JSON_LD_ONLY)})
+    result = _fetch(fetcher, "https://jobs.example.com/job")
+    assert result.tier == TIER_STATIC and browser.rendered == []
+
+def test_browser_sites_skip_the_static_attempt():
+    """Sites known to need JavaScript should go straight to the browser"""
+    fetcher, browser = _fetcher({"/job": (200, POSTING)})
+    adapter = SiteAdapter("Spa", ["spa.example.com"], fetch_strategy=STRATEGY_BROWSER)
+    result = _fetch(fetcher, "https://spa.example.com/job", adapter)
+    assert result.tier == TIER_BROWSER and browser.rendered == ["https://spa.example.com/job"]
+
+def test_api_sites_fall_back_to_the_page():
+    """An API-backed site should be served by its API, and by the page when the API fails"""
+    async def api_fetcher(client, url):
+        if url.endswith("broken"):
+            raise httpx.ConnectError("API down")
+        return {"structured": {"role": "Designer"}, "text": "Designer at Globex"}
+
+    adapter = SiteAdapter("Board", ["board.example.com"], fetch_strategy=STRATEGY_API, api_fetcher=api_fetcher)
+    fetcher, browser = _fetcher({"/broken": (200, POSTING)})
+    result = _fetch(fetcher, "https://board.example.com/ok", adapter)
+    assert result.tier == TIER_API and result.structured == {"role": "Designer"}
+    fetcher, browser = _fetcher({"/broken": (200, POSTING)})
+    result = _fetch(fetcher, "https://board.example.com/broken", adapter)
+    assert result.tier == TIER_STATIC and browser.rendered == []
+
+def main():
+    """Run all tests"""
+    print("Running page fetcher tests...")
+    tests = [
+        test_static_posting_skips_the_browser,
+        test_javascript_shells_and_errors_fall_back_to_the_browser,
+        test_embedded_job_posting_is_enough,
+        test_browser_sites_skip_the_static_attempt,
+        test_api_sites_fall_back_to_the_page,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,80 @@
+import sys
+import os
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+import metrics
+from prompts import SplitPrompt
+
+def _prompt():
+    return SplitPrompt(
+        "test_prompt",
+        """
+        Extract the job. Example output: {"role": "Dev", "skills": ["Go"]}
+        """,
+        [
+            ("applicant", """
+            Name: {name}
+            """),
+            ("page", """
+            Page: {page_data}
+            """),
+        ],
+        memoize=["applicant"]
+    )
+
+def test_instructions_come_first_and_never_change():
+    """The static prefix should be identical across calls and the variable fields come last"""
+    prompt = _prompt()
+    first = prompt.messages({"name": "Jane", "page_data": "Backend Engineer at Acme"})
+    second = prompt.messages({"name": "John", "page_data": "Designer at Globex"})
+    assert isinstance(first[0], SystemMessage) and isinstance(first[1], HumanMessage)
+    assert first[0].content == second[0].content == 'Extract the job. Example output: {"role": "Dev", "skills": ["Go"]}'
+    assert first[1].content == "Name: Jane\n\nPage: Backend Engineer at Acme"
+    assert prompt.input_variables == ["name", "page_data"]
+
+def test_tokens_are_counted_per_section():
+    """Each render should count the instructions and every variable section separately"""
+    prompt = _prompt()
+    def count(section):
+        return metrics.PROMPT_TOKENS.labels("test_prompt", section)._value.get()
+    before = {section: count(section) for section in ("instructions", "applicant", "page")}
+    prompt.messages({"name": "Jane", "page_data": "x" * 400})
+    assert count("instructions") - before["instructions"] == prompt.instruction_tokens
+    assert count("page") - before["page"] == 102
+    assert count("applicant") - before["applicant"] == 3
+    # Hashing the prompt must not count as sending it
+    prompt.format(name="Jane", page_data="x")
+    assert count("page") - before["page"] == 102
+
+def test_memoized_sections_are_rendered_once():
+    """A repeated applicant should come from the section cache; pages are never memoized"""
+    prompt = _prompt()
+    for page in ("first job", "second job", "third job"):
+        prompt.messages({"name": "Jane", "page_data": page})
+    assert prompt.stats()["section_cache_hits"] == 2
+    assert prompt.stats()["renders"] == 3
+
+def main():
+    """Run all tests"""
+    print("Running prompt tests...")
+    tests = [
+        test_instructions_come_first_and_never_change,
+        test_tokens_are_counted_per_section,
+        test_memoized_sections_are_rendered_once,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
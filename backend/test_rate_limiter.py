@@ -0,0 +1,127 @@
+import asyncio
+import sys
+import os
+import time
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rate_limiter import RateLimiter, parse_reset_duration
+
+def test_requests_are_paced_by_the_minute_budget():
+    """Callers beyond the requests-per-minute budget should queue, not fail"""
+    limiter = RateLimiter(max_concurrency=10, requests_per_minute=1200, initial_concurrency=10)
+    limiter.requests.level = 2  # two requests left; refills at 20 per second
+
+    async def run():
+        started = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire(estimated_tokens=0)
+            limiter.release(0, status_code=200, latency=0.01)
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+    assert 0.08 <= elapsed < 0.5
+    assert limiter.stats()["wait_ms_max"] >= 40
+
+def test_limits_are_learned_from_response_headers():
+    """x-ratelimit headers should set the per-minute buckets and what is left in them"""
+    limiter = RateLimiter(max_concurrency=4, daily_limits=["requests"])
+    limiter.in_flight = 1
+    limiter.release(0, headers={
+        "x-ratelimit-limit-tokens": "6000",
+        "x-ratelimit-remaining-tokens": "100",
+        "x-ratelimit-reset-tokens": "7.66s",
+        # Groq's request limit is per day; it must not become a per-minute pace
+        "x-ratelimit-limit-requests": "14400",
+        "x-ratelimit-remaining-requests": "14370",
+        "x-ratelimit-reset-requests": "2m59.56s",
+    }, status_code=200, latency=0.2)
+    assert limiter.tokens.capacity == 6000
+    assert limiter.tokens.level <= 101
+    assert limiter.requests.capacity is None
+    # 500 tokens with ~100 left at 100 tokens/second is roughly a four second wait
+    assert 3 < limiter.tokens.time_until(500) < 5
+
+def test_quota_windows_are_read_from_header_names():
+    """The window comes from the header name, never from how far away the reset is"""
+    limiter = RateLimiter(max_concurrency=4)
+    limiter.in_flight = 1
+    limiter.release(0, headers={
+        # A per-minute limit whose reset is minutes away still paces
+        "x-ratelimit-limit-requests": "30",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "2m",
+        "x-ratelimit-limit-tokens-day": "1000000",
+        "x-ratelimit-remaining-tokens-day": "0",
+        "x-ratelimit-reset-tokens-day": "5s",
+    })
+    assert limiter.requests.capacity == 30 and limiter.tokens.capacity is None
+    # The spent daily quota blocks until its reset even though that is seconds away
+    assert 4 < limiter.blocked_until - time.monotonic() <= 5
+
+def test_queue_is_exported_to_prometheus():
+    """Queued calls should show in the queue depth gauge and their waits in the histogram"""
+    from prometheus_client import REGISTRY
+    limiter = RateLimiter(max_concurrency=1, initial_concurrency=1, name="test_queue")
+
+    def sample(name):
+        return REGISTRY.get_sample_value(name, {"backend": "test_queue"}) or 0
+
+    async def run():
+        await limiter.acquire(0)
+        waiter = asyncio.create_task(limiter.acquire(0))
+        await asyncio.sleep(0.01)
+        depth = sample("coldmail_llm_queue_depth")
+        limiter.release(0)
+        await waiter
+        return depth
+
+    assert asyncio.run(run()) == 1
+    assert sample("coldmail_llm_queue_depth") == 0
+    assert sample("coldmail_llm_queue_wait_seconds_count") == 2
+    assert sample("coldmail_llm_queue_wait_seconds_sum") >= 0.01
+
+def test_concurrency_adapts_to_rate_limits():
+    """The concurrency limit should halve on a 429 and grow back additively on fast successes"""
+    limiter = RateLimiter(max_concurrency=16, initial_concurrency=8)
+    limiter.in_flight = 1
+    limiter.release(0, status_code=429, retry_after=0.01)
+    assert limiter.stats()["concurrency_limit"] == 4
+    assert limiter.stats()["throttled_429"] == 1
+    for _ in range(12):
+        limiter.in_flight = 1
+        limiter.release(0, status_code=200, latency=0.1)
+    assert limiter.stats()["concurrency_limit"] > 4
+
+def test_parse_reset_duration():
+    """Reset headers come in Go duration format"""
+    assert parse_reset_duration("7.66s") == 7.66
+    assert abs(parse_reset_duration("2m59.56s") - 179.56) < 1e-9
+    assert parse_reset_duration("120ms") == 0.12
+    assert parse_reset_duration("3") == 3.0
+    assert parse_reset_duration(None) is None
+
+def main():
+    """Run all tests"""
+    print("Running rate limiter tests...")
+    tests = [
+        test_requests_are_paced_by_the_minute_budget,
+        test_limits_are_learned_from_response_headers,
+        test_quota_windows_are_read_from_header_names,
+        test_queue_is_exported_to_prometheus,
+        test_concurrency_adapts_to_rate_limits,
+        test_parse_reset_duration,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
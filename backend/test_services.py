@@ -0,0 +1,109 @@
+import asyncio
+import sys
+import os
+import time
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import services
+
+def fresh_factory(build):
+    """Registers `build` as a service and returns how many times it was constructed"""
+    services._instances.pop("stub", None)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return build()
+
+    services.FACTORIES["stub"] = factory
+    return calls
+
+def test_concurrent_callers_share_one_construction():
+    """Callers arriving while the service is being built should all get the same instance"""
+    calls = fresh_factory(lambda: time.sleep(0.05) or object())
+
+    async def run():
+        return await asyncio.gather(*(services._get("stub") for _ in range(10)))
+
+    instances = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(instance is instances[0] for instance in instances)
+    assert services.peek("stub") is instances[0]
+
+def test_failed_construction_is_retried():
+    """A construction that raises should not be cached; the next caller builds again"""
+    attempts = []
+
+    def build():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("missing credentials")
+        return "ready"
+
+    fresh_factory(build)
+
+    async def run():
+        try:
+            await services._get("stub")
+        except RuntimeError:
+            pass
+        assert services.peek("stub") is None
+        return await services._get("stub")
+
+    assert asyncio.run(run()) == "ready"
+    assert len(attempts) == 2
+
+def test_prewarm_can_be_disabled():
+    """With PREWARM_ON_STARTUP=false nothing is scheduled and nothing is built"""
+    previous, previous_state = os.environ.get("PREWARM_ON_STARTUP"), services.prewarm_state
+    os.environ["PREWARM_ON_STARTUP"] = "false"
+    try:
+        assert services.start_prewarm() is None
+        assert services.prewarm_state == services.PREWARM_DISABLED
+    finally:
+        # Leave the environment and module state as other tests in this process expect them
+        if previous is None:
+            os.environ.pop("PREWARM_ON_STARTUP", None)
+        else:
+            os.environ["PREWARM_ON_STARTUP"] = previous
+        services.prewarm_state = previous_state
+
+def test_supported_sites_do_not_build_the_scraper():
+    """Listing the site adapters should not pay for constructing the scraper"""
+    from fastapi.testclient import TestClient
+    import main
+
+    built = []
+    factory = services.FACTORIES["job_scraper"]
+    services.FACTORIES["job_scraper"] = lambda: built.append(1) or factory()
+    try:
+        response = TestClient(main.app).get("/api/supported-sites")
+    finally:
+        services.FACTORIES["job_scraper"] = factory
+    assert response.status_code == 200
+    assert "Greenhouse" in response.json()["supported_sites"]
+    assert built == []
+
+def main():
+    """Run all tests"""
+    print("Running service construction tests...")
+    tests = [
+        test_concurrent_callers_share_one_construction,
+        test_failed_construction_is_retried,
+        test_prewarm_can_be_disabled,
+        test_supported_sites_do_not_build_the_scraper,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
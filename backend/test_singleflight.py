@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import os
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from singleflight import SingleFlight, payload_key
+
+def test_concurrent_calls_share_one_execution():
+    """Concurrent callers with the same key should run the work once"""
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return {"skills": ["Python"]}
+
+    async def run():
+        return await asyncio.gather(*(flight.do("same-url", work) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert len(runs) == 1
+    assert flight.stats()["coalesced_callers"] == 9
+    # Each caller gets its own copy of the shared result
+    results[0]["skills"].append("Go")
+    assert results[1] == {"skills": ["Python"]}
+
+def test_errors_reach_every_caller():
+    """A failing shared call should raise for every coalesced caller"""
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("render failed")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("broken", work) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["in_flight"] == 0
+
+def test_payload_key_ignores_ordering():
+    """Identical payloads should coalesce regardless of key order"""
+    assert payload_key({"role": "Dev", "company": "Acme"}) == payload_key({"company": "Acme", "role": "Dev"})
+    assert payload_key({"role": "Dev"}) != payload_key({"role": "QA"})
+
+def main():
+    """Run all tests"""
+    print("Running single-flight tests...")
+    tests = [
+        test_concurrent_calls_share_one_execution,
+        test_errors_reach_every_caller,
+        test_payload_key_ignores_ordering,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
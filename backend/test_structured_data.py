@@ -0,0 +1,85 @@
+import sys
+import os
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from structured_data import extract_json_ld_job_data, extract_open_graph_job_data, is_complete, missing_fields, summarize_description
+
+JOB_POSTING_PAGE = """
+<html><head>
+<meta property="og:title" content="Acme Corp hiring Senior Backend Engineer | LinkedIn">
+<script type="application/ld+json">
+{"@context": "https://schema.org", "@graph": [
+  {"@type": "Organization", "name": "Job Board"},
+  {"@type": "JobPosting",
+   "title": "Senior Backend Engineer",
+   "hiringOrganization": {"@type": "Organization", "name": "Acme Corp"},
+   "description": "&lt;p&gt;We build hiring tools. You will own Python and FastAPI services on AWS. You will tune PostgreSQL. Extra detail.&lt;/p&gt;",
+   "employmentType": ["FULL_TIME"],
+   "jobLocationType": "TELECOMMUTE",
+   "jobLocation": {"@type": "Place", "address": {"addressLocality": "Berlin", "addressCountry": "DE"}},
+   "baseSalary": {"@type": "MonetaryAmount", "currency": "EUR",
+                  "value": {"@type": "QuantitativeValue", "minValue": 80000, "maxValue": 100000, "unitText": "YEAR"}},
+   "experienceRequirements": {"@type": "OccupationalExperienceRequirements", "monthsOfExperience": 60}}
+]}
+</script></head><body></body></html>
+"""
+
+def test_json_ld_job_posting_fills_job_data():
+    """A complete JobPosting should fill every field without the LLM"""
+    data = extract_json_ld_job_data(JOB_POSTING_PAGE)
+    assert data["role"] == "Senior Backend Engineer"
+    assert data["company"] == "Acme Corp"
+    assert data["description"].startswith("We build hiring tools.")
+    assert "Extra detail" not in data["description"]
+    assert set(data["skills"]) == {"Python", "FastAPI", "AWS", "PostgreSQL"}
+    assert data["experience"] == "5+ years"
+    assert data["location"] == "Berlin, DE"
+    assert data["salary"] == "EUR 80,000 - 100,000 per year"
+    assert data["remote"] is True
+    assert data["jobType"] == "full-time"
+    assert is_complete(data)
+
+def test_partial_posting_reports_missing_fields():
+    """Fields absent from the JSON-LD should be left for the LLM"""
+    page = '<script type="application/ld+json">{"@type": "JobPosting", "title": "QA Analyst"}</script>'
+    data = extract_json_ld_job_data(page)
+    assert data == {"role": "QA Analyst"}
+    assert missing_fields(data) == ["company", "description", "skills"]
+
+def test_open_graph_fallback():
+    """OpenGraph titles should lose the job board suffix"""
+    page = '<meta property="og:title" content="Data Engineer - Indeed.com"><meta name="description" content="Join us.">'
+    assert extract_open_graph_job_data(page) == {"role": "Data Engineer", "description": "Join us."}
+    assert extract_json_ld_job_data(page) == {}
+
+def test_summary_ends_at_a_sentence():
+    """The summary should stop before the sentence that would run past the limit"""
+    text = "We build hiring tools. " + "You will own the services that match people to jobs. " * 3
+    summary = summarize_description(text, max_chars=100)
+    assert summary == "We build hiring tools. You will own the services that match people to jobs."
+    assert summarize_description("word " * 200, max_chars=50).endswith("word...")
+    assert summarize_description("One. Two. Three. Four.") == "One. Two. Three."
+
+def main():
+    """Run all tests"""
+    print("Running structured data tests...")
+    tests = [
+        test_json_ld_job_posting_fills_job_data,
+        test_partial_posting_reports_missing_fields,
+        test_open_graph_fallback,
+        test_summary_ends_at_a_sentence,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
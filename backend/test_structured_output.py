@@ -0,0 +1,135 @@
+import asyncio
+import json
+import sys
+import os
+
+import httpx
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from llm_router import BREAKER_CLOSED, LLMBackend, StructuredOutput
+from models import JobData, strict_json_schema
+
+LEAN = [{"role": "user", "content": "Extract the job as JSON"}]
+FEW_SHOT = [{"role": "system", "content": "Examples..."}, {"role": "user", "content": "Extract the job"}]
+ANSWER = {"role": "Dev", "company": "Acme"}
+
+def stub_backend(mode, reject=None):
+    """
+    A backend asking in `mode`, over an in-process server that records request bodies and
+    answers 400 with `reject` as the error message to any request with a response format or tool.
+    """
+    bodies = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        bodies.append(body)
+        if reject and ("response_format" in body or "tools" in body):
+            return httpx.Response(400, json={"error": {"message": reject}})
+        if "tools" in body:
+            call = {"id": "call_1", "type": "function", "function": {"name": "job_data", "arguments": json.dumps(ANSWER)}}
+            return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": None, "tool_calls": [call]}}]})
+        return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": json.dumps(ANSWER)}}]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return LLMBackend("groq", "http://groq/v1", "stub-model", structured_output=mode), client, bodies
+
+def _complete(backend, client):
+    structured = StructuredOutput("job_data", {"type": "object"}, fallback=lambda: FEW_SHOT)
+    content = asyncio.run(backend.complete(client, LEAN, 0, structured))
+    return json.loads(content), structured.modes[backend.name]
+
+def test_schema_is_strict():
+    """Every JobData field should be required, optional ones nullable, and nothing else allowed"""
+    schema = strict_json_schema(JobData)
+    assert schema["required"] == list(JobData.model_fields)
+    assert schema["additionalProperties"] is False
+    assert {"type": "null"} in schema["properties"]["salary"]["anyOf"]
+    assert "title" not in schema and not any("title" in spec for spec in schema["properties"].values())
+    compact = strict_json_schema(JobData, descriptions=False)
+    assert not any("description" in spec for spec in compact["properties"].values())
+
+def test_backends_are_asked_in_their_mode():
+    """Schema, tool and JSON mode requests should carry the lean messages and return the answer"""
+    for mode in ("json_schema", "tools", "json_object"):
+        backend, client, bodies = stub_backend(mode)
+        assert _complete(backend, client) == (ANSWER, mode)
+        assert bodies[0]["messages"] == LEAN
+    backend, client, bodies = stub_backend("json_schema")
+    _complete(backend, client)
+    assert bodies[0]["response_format"]["json_schema"] == {"name": "job_data", "schema": {"type": "object"}, "strict": True}
+
+def test_backends_without_support_get_the_prompt():
+    """A backend with no structured output should be sent the fallback few-shot prompt"""
+    backend, client, bodies = stub_backend("none")
+    assert _complete(backend, client) == (ANSWER, "prompt")
+    assert bodies[0]["messages"] == FEW_SHOT and "response_format" not in bodies[0]
+
+def test_rejected_mode_falls_back_to_the_prompt():
+    """An unsupported mode should be dropped for good; a one-off format failure should not"""
+    backend, client, bodies = stub_backend("json_schema", reject="response_format json_schema is not supported")
+    assert _complete(backend, client) == (ANSWER, "prompt")
+    assert bodies[1]["messages"] == FEW_SHOT
+    assert backend.structured_output == "none"
+    assert backend.stats()["structured_fallbacks"] == 1
+
+    backend, client, bodies = stub_backend("json_object", reject="json_validate_failed: output did not match")
+    assert _complete(backend, client) == (ANSWER, "prompt")
+    assert backend.structured_output == "json_object"
+
+def test_rejected_modes_do_not_count_against_the_backend():
+    """Format rejections answered by the prompt fallback should not trip the breaker or raise the error rate"""
+    backend, client, bodies = stub_backend("json_object", reject="json_validate_failed: output did not match")
+    backend.breaker.failure_threshold = 2
+    for _ in range(3):
+        assert _complete(backend, client) == (ANSWER, "prompt")
+    assert backend.breaker.state == BREAKER_CLOSED
+    assert backend.error_rate() == 0.0
+
+def test_only_missing_fields_are_asked_for():
+    """The LLM should get a schema and key list covering just the fields structured data left empty"""
+    os.environ.setdefault("GROQ_API_KEY", "test-key")
+    import llm_client
+    from job_scraper_selenium import JobScraper
+    asked = []
+
+    async def fake_acomplete_structured(messages, structured, temperature=0.0):
+        asked.append((messages, structured.schema))
+        return json.dumps({"company": "Acme", "skills": ["Go"]}), "json_schema"
+
+    original = llm_client.acomplete_structured
+    llm_client.acomplete_structured = fake_acomplete_structured
+    try:
+        scraper = JobScraper()
+        job_data, _ = asyncio.run(scraper._llm_extract("Backend Engineer at Acme", ["company", "skills"]))
+    finally:
+        llm_client.acomplete_structured = original
+    messages, schema = asked[0]
+    assert job_data == {"company": "Acme", "skills": ["Go"]}
+    assert list(schema["properties"]) == schema["required"] == ["company", "skills"]
+    assert messages[1]["content"].startswith("Keys: company, skills")
+
+def main():
+    """Run all tests"""
+    print("Running structured output tests...")
+    tests = [
+        test_schema_is_strict,
+        test_backends_are_asked_in_their_mode,
+        test_backends_without_support_get_the_prompt,
+        test_rejected_mode_falls_back_to_the_prompt,
+        test_rejected_modes_do_not_count_against_the_backend,
+        test_only_missing_fields_are_asked_for,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,105 @@
+import asyncio
+import sys
+import os
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+# Add the current directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import tracing
+from llm_router import LLMBackend
+
+# Spans are kept in memory instead of exported
+EXPORTER = InMemorySpanExporter()
+provider = TracerProvider()
+provider.add_span_processor(SimpleSpanProcessor(EXPORTER))
+trace.set_tracer_provider(provider)
+
+def traced_app():
+    app = FastAPI()
+    app.add_middleware(tracing.TracingMiddleware)
+
+    @app.get("/api/jobs/{job_id}")
+    async def get_job(job_id: str):
+        with tracing.span("job_scraper.extract_job_data", {"url.host": tracing.host("https://boards.greenhouse.io/acme/1")}):
+            pass
+        return {}
+
+    return TestClient(app)
+
+def test_request_id_is_echoed_and_stamped_on_spans():
+    """A client-supplied X-Request-ID should come back and label every span of the request"""
+    EXPORTER.clear()
+    response = traced_app().get("/api/jobs/abc", headers={"X-Request-ID": "req-42"})
+    assert response.headers["X-Request-ID"] == "req-42"
+
+    # FastAPI may add spans of its own around ours; only the ones carrying a request id are ours
+    spans = {span.name: span for span in EXPORTER.get_finished_spans() if "request.id" in span.attributes}
+    root, child = spans["GET /api/jobs/{job_id}"], spans["job_scraper.extract_job_data"]
+    assert child.context.trace_id == root.context.trace_id
+    assert child.attributes["request.id"] == root.attributes["request.id"] == "req-42"
+    assert child.attributes["url.host"] == "boards.greenhouse.io"
+    assert root.attributes["http.status_code"] == 200
+
+def test_request_id_is_generated_when_missing():
+    """Requests without an id should get a fresh one per request"""
+    client = traced_app()
+    first = client.get("/api/jobs/abc").headers["X-Request-ID"]
+    second = client.get("/api/jobs/abc").headers["X-Request-ID"]
+    assert first and second and first != second
+
+def test_llm_calls_carry_request_id_and_trace_context():
+    """Outgoing LLM requests should forward the request id and traceparent, and record tokens"""
+    seen = {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.update(request.headers)
+        return httpx.Response(200, json={
+            "choices": [{"message": {"role": "assistant", "content": "hello"}}],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15}
+        })
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    backend = LLMBackend("groq", "http://groq/v1", "stub-model")
+
+    async def run():
+        tracing.current_request_id.set("req-7")
+        with tracing.span("llm.invoke"):
+            await backend.complete(client, [{"role": "user", "content": "Write a cold email"}], 0)
+
+    EXPORTER.clear()
+    asyncio.run(run())
+    assert seen["x-request-id"] == "req-7"
+    assert "traceparent" in seen
+    spans = {span.name: span for span in EXPORTER.get_finished_spans()}
+    assert spans["llm.backend.complete"].attributes["llm.prompt_tokens"] == 12
+    assert spans["llm.backend.complete"].attributes["llm.completion_tokens"] == 3
+    assert spans["llm.rate_limiter.wait"].parent.span_id == spans["llm.backend.complete"].context.span_id
+
+def main():
+    """Run all tests"""
+    print("Running tracing tests...")
+    tests = [
+        test_request_id_is_echoed_and_stamped_on_spans,
+        test_request_id_is_generated_when_missing,
+        test_llm_calls_carry_request_id_and_trace_context,
+    ]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"[PASS] {test.__name__}")
+            passed += 1
+        except AssertionError as e:
+            print(f"[FAIL] {test.__name__}: {e}")
+    return passed == len(tests)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
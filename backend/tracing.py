@@ -0,0 +1,146 @@
+import os
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+from opentelemetry import propagate, trace
+from opentelemetry.trace import Span, SpanKind, Status, StatusCode
+
+from metrics import route_template
+
+load_dotenv()
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Set for the duration of each API request and stamped onto every span and outgoing LLM call
+current_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Until `configure` installs an SDK provider this tracer is a no-op, so spans cost next to nothing
+tracer = trace.get_tracer("cold-mail-generator")
+_provider = None
+
+
+def configure() -> Optional[str]:
+    """
+    Installs the span exporter named by TRACING_EXPORTER: "console", "file" (one JSON span
+    per line in TRACING_FILE, for offline inspection), "otlp" (OTLP over HTTP, configured by
+    the standard OTEL_EXPORTER_OTLP_* variables) or "none". Returns the exporter in use.
+    The SDK is only imported when tracing is enabled.
+    """
+    global _provider
+    exporter_name = os.getenv("TRACING_EXPORTER", "none").lower()
+    if exporter_name == "none" or _provider is not None:
+        return None
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    if exporter_name == "console":
+        exporter = ConsoleSpanExporter()
+    elif exporter_name == "file":
+        exporter = ConsoleSpanExporter(
+            out=open(os.getenv("TRACING_FILE", "traces.jsonl"), "a"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    elif exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()
+    else:
+        raise ValueError(f"Unknown TRACING_EXPORTER '{exporter_name}' (expected none, console, file or otlp)")
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": os.getenv("OTEL_SERVICE_NAME", "cold-mail-generator")}))
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(_provider)
+    return exporter_name
+
+
+def shutdown() -> None:
+    """Flushes spans still waiting in the batch processor."""
+    if _provider is not None:
+        _provider.shutdown()
+
+
+@contextmanager
+def span(name: str, attributes: Optional[Dict] = None) -> Iterator[Span]:
+    """
+    Runs the block in a child span of the current one. Attributes that are None are left
+    out; exceptions are recorded on the span and mark it as failed.
+    """
+    with tracer.start_as_current_span(name, attributes=_attributes(attributes)) as current:
+        yield current
+
+
+def start_span(name: str, attributes: Optional[Dict] = None) -> Span:
+    """
+    Starts a span without making it current, for async generators: a current span entered in
+    a generator would leak into the consumer between yields. The caller must `end()` it.
+    """
+    return tracer.start_span(name, attributes=_attributes(attributes))
+
+
+def outgoing_headers() -> Dict[str, str]:
+    """Headers carrying the request id and trace context to a downstream service."""
+    headers: Dict[str, str] = {}
+    propagate.inject(headers)
+    request_id = current_request_id.get()
+    if request_id:
+        headers[REQUEST_ID_HEADER] = request_id
+    return headers
+
+
+def host(url: str) -> Optional[str]:
+    return urlsplit(url).hostname
+
+
+def _attributes(attributes: Optional[Dict]) -> Dict:
+    cleaned = {key: value for key, value in (attributes or {}).items() if value is not None}
+    request_id = current_request_id.get()
+    if request_id:
+        cleaned["request.id"] = request_id
+    return cleaned
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        """
+        ASGI middleware opening the root span of every API request. The request id comes
+        from the client's X-Request-ID header (or is generated), is echoed in the response
+        and is attached to every span below; an incoming W3C `traceparent` is continued.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        request_id = headers.get(REQUEST_ID_HEADER.lower()) or uuid.uuid4().hex
+        route = route_template(scope)
+        # Nest under a server span the framework may already have opened, else continue the caller's trace
+        parent = None if trace.get_current_span().get_span_context().is_valid else propagate.extract(headers)
+        token = current_request_id.set(request_id)
+        try:
+            with tracer.start_as_current_span(
+                f"{scope['method']} {route}",
+                context=parent,
+                kind=SpanKind.SERVER,
+                attributes=_attributes({"http.method": scope["method"], "http.route": route}),
+            ) as root:
+
+                async def send_with_request_id(message):
+                    if message["type"] == "http.response.start":
+                        root.set_attribute("http.status_code", message["status"])
+                        if message["status"] >= 500:
+                            root.set_status(Status(StatusCode.ERROR))
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (REQUEST_ID_HEADER.lower().encode("latin-1"), request_id.encode("latin-1"))
+                        ]
+                    await send(message)
+
+                await self.app(scope, receive, send_with_request_id)
+        finally:
+            current_request_id.reset(token)
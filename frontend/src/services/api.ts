@@ -7,18 +7,38 @@ const API_CONFIG = {
   retryAttempts: 2
 };
 
+/**
+ * Generates a random v4 UUID for the Idempotency-Key header.
+ * crypto.randomUUID() only exists in secure contexts (https or localhost), so
+ * deployments served over plain http fall back to crypto.getRandomValues().
+ */
+function newIdempotencyKey(): string {
+  if (typeof crypto.randomUUID === 'function') {
+    return crypto.randomUUID();
+  }
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  bytes[6] = (bytes[6] & 0x0f) | 0x40; // version 4
+  bytes[8] = (bytes[8] & 0x3f) | 0x80; // RFC 4122 variant
+  const hex = Array.from(bytes, byte => byte.toString(16).padStart(2, '0')).join('');
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+}
+
 /**
  * A robust utility function for making API calls to the backend.
  * It includes a timeout, retry logic for network errors, and detailed error handling.
+ * Every attempt of one call sends the same Idempotency-Key, so a retry after a timeout
+ * attaches to the work the backend already started instead of starting it again.
  * @param endpoint The API endpoint to call (e.g., '/api/extract-job').
  * @param options The standard RequestInit options for fetch().
  * @param retryCount The current retry attempt number.
+ * @param idempotencyKey The key shared by all attempts of this call.
  * @returns A promise that resolves with the JSON data from the API.
  */
 async function apiCall<T>(
   endpoint: string, 
   options: RequestInit = {}, 
-  retryCount = 0
+  retryCount = 0,
+  idempotencyKey: string = newIdempotencyKey()
 ): Promise<T> {
   const controller = new AbortController();
   const timeoutId = setTimeout(() => controller.abort(), API_CONFIG.timeout);
@@ -29,6 +49,7 @@ async function apiCall<T>(
       signal: controller.signal,
       headers: {
         'Content-Type': 'application/json',
+        'Idempotency-Key': idempotencyKey,
         ...options.headers
       }
     });
@@ -49,7 +70,7 @@ async function apiCall<T>(
     if (retryCount < API_CONFIG.retryAttempts && 
         (error instanceof TypeError || (error as any).name === 'AbortError')) {
       await new Promise(resolve => setTimeout(resolve, 1000 * Math.pow(2, retryCount)));
-      return apiCall<T>(endpoint, options, retryCount + 1);
+      return apiCall<T>(endpoint, options, retryCount + 1, idempotencyKey);
     }
     
     // Re-throw the error after retries or for other error types